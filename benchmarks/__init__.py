@@ -0,0 +1,5 @@
+"""
+Benchmarks for drf-access-policy. Run them from the repository root, e.g.
+
+    python -m benchmarks.parse_throughput
+"""
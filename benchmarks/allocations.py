@@ -0,0 +1,244 @@
+"""
+Measure with tracemalloc the memory each stage of an authorization
+decision allocates: the peak of transient allocations during one call
+and what each call leaves behind, plus the resident size of a compiled
+policy. With --check, exits with an error if a measurement exceeds its
+threshold in THRESHOLDS.
+
+    python -m benchmarks.allocations [--check]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from benchmarks.utils import setup_django
+
+# name: (max peak bytes per call, max retained bytes per call)
+THRESHOLDS: Dict[str, Tuple[Optional[int], int]] = {
+    "normalize statements": (1_000, 0),
+    "match principal (interpreted)": (1_500, 0),
+    "match action (interpreted)": (1_000, 0),
+    "match conditions (interpreted)": (1_000, 0),
+    "decide (interpreted)": (2_000, 0),
+    "decide (statement index)": (2_000, 0),
+    "decide (generated function)": (1_500, 0),
+    "resolve principals": (3_000, 0),
+    # Django and DRF fill caches of their own lazily, which can show up as
+    # a byte or two per call depending on what ran before
+    "serializer without FieldAccessMixin": (40_000, 8),
+    "serializer with FieldAccessMixin": (40_000, 8),
+    # Retained once by compiling a policy of 20 statements
+    "compiled policy": (None, 60_000),
+}
+
+
+class AllocationStats(NamedTuple):
+    peak: int  # bytes allocated at the high-water mark of one call
+    retained: int  # bytes still allocated per call after all calls
+
+
+def measure_allocations(fn: Callable[[], object], calls: int = 100) -> AllocationStats:
+    """Measure fn with tracemalloc, which must be tracing; fn is warmed up first."""
+    fn()
+    gc.collect()
+    peak = 0
+    started = tracemalloc.get_traced_memory()[0]
+
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+
+    gc.collect()
+    retained = (tracemalloc.get_traced_memory()[0] - started) // calls
+    return AllocationStats(peak, max(retained, 0))
+
+
+def measure_resident(fn: Callable[[], object]) -> int:
+    """Bytes still allocated after a single call of fn."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    gc.collect()
+    resident = tracemalloc.get_traced_memory()[0] - before
+    del result
+    return resident
+
+
+class FakeUser(object):
+    def __init__(self, pk, groups=()):
+        self.pk = pk
+        self.is_anonymous = False
+        self.is_staff = False
+        self.is_superuser = False
+        self.group_names = list(groups)
+
+
+class FakeRequest(object):
+    def __init__(self, user, method="GET"):
+        self.user = user
+        self.method = method
+
+
+def make_statements(count: int) -> List[dict]:
+    return [
+        {
+            "principal": [f"group:team{i}", f"id:{i}"],
+            "action": [f"action{i % 5}", "<method:delete>"],
+            "effect": "deny" if i % 7 == 0 else "allow",
+            "condition": ["is_owner"] if i % 3 == 0 else [],
+            "condition_expression": ["is_owner and not is_banned"] if i % 4 == 0 else [],
+        }
+        for i in range(count)
+    ]
+
+
+def run_suite() -> List[Tuple[str, AllocationStats]]:
+    from rest_framework import serializers
+
+    from rest_access_policy import AccessPolicy, FieldAccessMixin
+    from rest_access_policy.compiler import get_compiled_policy
+    from rest_access_policy.precompile import precompile_policy
+    from test_project.testapp.models import UserAccount
+
+    class BasePolicy(AccessPolicy):
+        statements = make_statements(20)
+        field_permissions = {
+            "read_only": [
+                {"principal": "group:team3", "fields": ["status"]},
+                {"principal": "group:team8", "fields": "*"},
+            ]
+        }
+
+        def get_user_group_values(self, user):
+            return user.group_names
+
+        def is_owner(self, request, view, action):
+            return True
+
+        def is_banned(self, request, view, action):
+            return False
+
+    class StagedPolicy(BasePolicy):
+        def _normalize_statements(self, statements):
+            return super()._normalize_statements(statements)
+
+    class GeneratedPolicy(BasePolicy):
+        codegen = True
+
+    class PlainSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = UserAccount
+            fields = ["username", "first_name", "last_name", "status"]
+
+    class FieldAccessSerializer(FieldAccessMixin, PlainSerializer):
+        class Meta(PlainSerializer.Meta):
+            access_policy = BasePolicy
+
+    statements = BasePolicy.statements
+    request = FakeRequest(FakeUser(3, ["team3", "other"]), "PATCH")
+    staged = StagedPolicy()
+    normalized = staged._normalize_statements(statements)
+    matched = staged._get_statements_matching_principal(request, normalized)
+
+    stages = {
+        "normalize statements": lambda: staged._normalize_statements(statements),
+        "match principal (interpreted)": lambda: staged._get_statements_matching_principal(
+            request, normalized
+        ),
+        "match action (interpreted)": lambda: staged._get_statements_matching_action(
+            request, "action3", matched
+        ),
+        "match conditions (interpreted)": lambda: staged._get_statements_matching_conditions(
+            request, None, action="action3", statements=matched, is_expression=True
+        ),
+        "decide (interpreted)": lambda: staged._evaluate_statements(
+            statements, request, None, "action3"
+        ),
+        "decide (statement index)": lambda: BasePolicy()._evaluate_statements(
+            statements, request, None, "action3"
+        ),
+        "decide (generated function)": lambda: GeneratedPolicy()._evaluate_statements(
+            statements, request, None, "action3"
+        ),
+        "resolve principals": lambda: BasePolicy._get_principals(request),
+        "serializer without FieldAccessMixin": lambda: PlainSerializer(
+            context={"request": request}
+        ).fields,
+        "serializer with FieldAccessMixin": lambda: FieldAccessSerializer(
+            context={"request": request}
+        ).fields,
+    }
+
+    def compile_policy():
+        policy_cls = type("CompiledPolicy", (BasePolicy,), {"statements": make_statements(20)})
+        precompile_policy(policy_cls)
+        return policy_cls, get_compiled_policy(policy_cls)
+
+    started = not tracemalloc.is_tracing()
+
+    if started:
+        tracemalloc.start()
+
+    try:
+        results = [(name, measure_allocations(fn)) for name, fn in stages.items()]
+        compile_policy()  # Warm up imports and shared caches
+        results.append(("compiled policy", AllocationStats(0, measure_resident(compile_policy))))
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    return results
+
+
+def check_thresholds(
+    results: List[Tuple[str, AllocationStats]], peaks: bool = True
+) -> List[str]:
+    """
+    The measurements over their thresholds; peak sizes depend on the
+    interpreter's version and build, so they can be left unchecked.
+    """
+    failures = []
+
+    for name, stats in results:
+        max_peak, max_retained = THRESHOLDS[name]
+
+        if peaks and max_peak is not None and stats.peak > max_peak:
+            failures.append(f"{name}: peak {stats.peak} bytes > {max_peak}")
+
+        if stats.retained > max_retained:
+            failures.append(f"{name}: retained {stats.retained} bytes > {max_retained}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    if not hasattr(tracemalloc, "reset_peak"):
+        sys.exit("benchmarks.allocations requires Python 3.9 or later")
+
+    setup_django()
+    results = run_suite()
+
+    print(f"{'stage':40} {'peak bytes/call':>16} {'retained bytes/call':>20}")
+
+    for name, stats in results:
+        print(f"{name:40} {stats.peak:16,} {stats.retained:20,}")
+
+    failures = check_thresholds(results)
+
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
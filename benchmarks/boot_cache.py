@@ -0,0 +1,126 @@
+"""
+Compare the time a new worker spends precompiling policies from scratch
+against restoring them from the on-disk compiled cache.
+
+    python -m benchmarks.boot_cache [--policies 200] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.utils import setup_django
+
+CONDITIONS = ["is_owner", "is_admin", "is_banned", "is_frozen", "user_must_be:editor"]
+
+
+def make_policies(count: int):
+    from rest_access_policy import AccessPolicy
+
+    class BasePolicy(AccessPolicy):
+        codegen = True
+
+        def is_owner(self, request, view, action):
+            return True
+
+        def is_admin(self, request, view, action):
+            return False
+
+        def is_banned(self, request, view, action):
+            return False
+
+        def is_frozen(self, request, view, action):
+            return False
+
+        def user_must_be(self, request, view, action, field):
+            return field == "editor"
+
+    policies = []
+
+    for i in range(count):
+        statements = []
+
+        for j in range(8):
+            a, b, c = (CONDITIONS[(i + j + k) % len(CONDITIONS)] for k in range(3))
+            # The argument makes every expression unique to its policy
+            statements.append(
+                {
+                    "principal": ["authenticated", f"group:team{i}"],
+                    "action": [f"action{j}", "<safe_methods>"],
+                    "effect": "deny" if j == 7 else "allow",
+                    "condition_expression": (
+                        f"({a} or {b}) and not ({c} and is_frozen) "
+                        f"or user_must_be:team{i}_{j} and not is_banned"
+                    ),
+                }
+            )
+
+        policies.append(
+            type(
+                f"Policy{i}",
+                (BasePolicy,),
+                {
+                    "statements": statements,
+                    "field_permissions": {
+                        "read_only": [{"principal": f"group:team{i}", "fields": ["status"]}]
+                    },
+                },
+            )
+        )
+
+    return policies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_access_policy.compiled_cache import CompiledCache
+    from rest_access_policy.compiler import clear_caches
+    from rest_access_policy.field_access_mixin import _read_only_fields_indexes
+    from rest_access_policy.precompile import precompile_policy
+
+    policies = make_policies(args.policies)
+
+    def reset():
+        clear_caches()
+        _read_only_fields_indexes.clear()
+
+    def boot(path=None):
+        reset()
+        started = time.perf_counter()
+        cache = CompiledCache.load(path) if path else None
+
+        for policy_cls in policies:
+            if cache is not None:
+                cache.restore(policy_cls)
+
+            precompile_policy(policy_cls)
+
+            if cache is not None:
+                cache.update(policy_cls)
+
+        if cache is not None:
+            cache.save()
+
+        return time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "policies.cache")
+        write = boot(path)
+        cold = min(boot() for _ in range(args.repeat))
+        cached = min(boot(path) for _ in range(args.repeat))
+        size = os.path.getsize(path)
+
+    print(f"{len(policies)} policies, cache file {size / 1024:,.0f} KiB")
+    print(f"{'recompile':24} {cold * 1000:8.1f} ms")
+    print(f"{'write cache':24} {write * 1000:8.1f} ms")
+    print(f"{'restore from cache':24} {cached * 1000:8.1f} ms  ({cold / cached:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
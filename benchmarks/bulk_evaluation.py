@@ -0,0 +1,90 @@
+"""
+Compare deciding a users x actions matrix with evaluate_bulk against
+calling _evaluate_statements for every cell (the latter measured on a
+sample of users and extrapolated). Requires numpy.
+
+    python -m benchmarks.bulk_evaluation [--users 20000] [--actions 300] [--statements 60]
+"""
+import argparse
+import random
+import time
+
+from benchmarks.utils import setup_django
+
+
+class FakeUser(object):
+    def __init__(self, pk, groups, is_staff=False):
+        self.pk = pk
+        self.is_anonymous = False
+        self.is_staff = is_staff
+        self.is_superuser = False
+        self.group_names = groups
+
+
+class FakeRequest(object):
+    def __init__(self, user, method="GET"):
+        self.user = user
+        self.method = method
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--actions", type=int, default=300)
+    parser.add_argument("--statements", type=int, default=60)
+    parser.add_argument("--sample", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_access_policy import AccessPolicy
+    from rest_access_policy.bulk import evaluate_bulk
+
+    rng = random.Random(0)
+    actions = [f"action{i}" for i in range(args.actions)]
+    statements = [
+        {
+            "principal": [f"group:team{rng.randrange(50)}", f"id:{rng.randrange(args.users)}"],
+            "action": rng.sample(actions, 20),
+            "effect": "deny" if i % 9 == 0 else "allow",
+            "condition": ["is_owner"] if i % 5 == 0 else [],
+        }
+        for i in range(args.statements)
+    ] + [{"principal": "staff", "action": "*", "effect": "allow"}]
+
+    class BenchmarkPolicy(AccessPolicy):
+        def get_user_group_values(self, user):
+            return user.group_names
+
+        def is_owner(self, request, view, action):
+            return request.user.pk % 2 == 0
+
+    users = [
+        FakeUser(pk, [f"team{rng.randrange(50)}" for _ in range(2)], is_staff=pk % 100 == 0)
+        for pk in range(args.users)
+    ]
+    policy = BenchmarkPolicy()
+    policy.statements = statements
+
+    started = time.perf_counter()
+    evaluate_bulk(policy, users, actions)
+    bulk = time.perf_counter() - started
+
+    sample = users[: args.sample]
+    started = time.perf_counter()
+
+    for user in sample:
+        request = FakeRequest(user)
+
+        for action in actions:
+            policy._evaluate_statements(statements, request, None, action)
+
+    looped = (time.perf_counter() - started) * len(users) / len(sample)
+
+    print(f"{len(users)} users x {len(actions)} actions, {len(statements)} statements")
+    print(f"{'per-cell evaluation':22} {looped:8.2f} s (extrapolated)")
+    print(f"{'evaluate_bulk':22} {bulk:8.2f} s  ({looped / bulk:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Separate costs of parsing, compiling and evaluating condition_expression
+strings, and evaluation of the compiled function against walking the
+parse tree with _check_condition.
+
+    python -m benchmarks.condition_expressions [--seconds 1.0]
+"""
+import argparse
+
+from benchmarks.utils import measure, setup_django
+
+EXPRESSIONS = [
+    "is_owner",
+    "is_owner or is_admin",
+    "is_owner and not is_banned",
+    "(is_owner or user_must_be:account_advisor) and not is_frozen",
+    "is_frozen or not (is_owner and is_admin) or user_must_be:editor and is_owner",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_access_policy import AccessPolicy
+    from rest_access_policy.compiler import CompiledPolicy, compile_expression
+    from rest_access_policy.parsing import _Parser, parse_expression
+
+    class BenchmarkPolicy(AccessPolicy):
+        def is_owner(self, request, view, action):
+            return True
+
+        def is_admin(self, request, view, action):
+            return False
+
+        def is_banned(self, request, view, action):
+            return False
+
+        def is_frozen(self, request, view, action):
+            return False
+
+        def user_must_be(self, request, view, action, field):
+            return field == "editor"
+
+    policy = BenchmarkPolicy()
+    compiled_policy = CompiledPolicy(BenchmarkPolicy)
+    trees = [parse_expression(e) for e in EXPRESSIONS]
+    functions = [compiled_policy.get_expression(e) for e in EXPRESSIONS]
+    check = lambda condition: policy._check_condition(condition, None, None, "update")
+    batch = len(EXPRESSIONS)
+
+    def parse_all():
+        for expression in EXPRESSIONS:
+            _Parser(expression).parse()
+
+    def compile_all():
+        fresh = CompiledPolicy(BenchmarkPolicy)
+        fresh.conditions = compiled_policy.conditions
+        for expression in EXPRESSIONS:
+            compile_expression(fresh, expression)
+
+    def evaluate_tree():
+        for tree in trees:
+            tree.evaluate(check)
+
+    def evaluate_compiled():
+        for function in functions:
+            function(policy, None, None, "update")
+
+    rates = [
+        ("parse", measure(parse_all, args.seconds, batch)),
+        ("compile (from cached parse)", measure(compile_all, args.seconds, batch)),
+        ("evaluate parse tree", measure(evaluate_tree, args.seconds, batch)),
+        ("evaluate compiled function", measure(evaluate_compiled, args.seconds, batch)),
+    ]
+
+    for name, rate in rates:
+        print(f"{name:30} {rate:12,.0f} expressions/sec  {1e6 / rate:8.2f} us each")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Parse throughput of condition_expression strings with the built-in parser,
+compared to the pyparsing grammar it replaced (if pyparsing is installed).
+
+    python -m benchmarks.parse_throughput [--seconds 1.0]
+"""
+import argparse
+import subprocess
+import sys
+import warnings
+
+from benchmarks.utils import measure
+from rest_access_policy.parsing import BoolOperand, _Parser
+
+EXPRESSIONS = [
+    "is_owner",
+    "is_owner or is_admin",
+    "is_owner and not is_banned",
+    "(is_owner or user_must_be:account_advisor) and not is_frozen",
+    "is_false or not (is_true and is_cloudy) or has_role:editor and is_business_hours",
+]
+
+
+def parse_builtin(expression: str):
+    # Bypass the lru_cache in parse_expression to measure parsing itself
+    return _Parser(expression).parse()
+
+
+def make_pyparsing_parser():
+    try:
+        from pyparsing import infixNotation, opAssoc
+    except ImportError:
+        return None
+
+    operand = BoolOperand()
+    expr = infixNotation(
+        operand,
+        [
+            ("not", 1, opAssoc.RIGHT, lambda t: t),
+            ("and", 2, opAssoc.LEFT, lambda t: t),
+            ("or", 2, opAssoc.LEFT, lambda t: t),
+        ],
+    )
+    return expr.parseString
+
+
+def measure_parse(parse, seconds: float) -> float:
+    def parse_all():
+        for expression in EXPRESSIONS:
+            parse(expression)
+
+    return measure(parse_all, seconds, batch=len(EXPRESSIONS))
+
+
+def import_time(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return float(output.stdout) if output.returncode == 0 else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    builtin = measure_parse(parse_builtin, args.seconds)
+    print(f"built-in parser:  {builtin:12,.0f} parses/sec")
+
+    pyparsing_parse = make_pyparsing_parser()
+
+    if pyparsing_parse is None:
+        print("pyparsing:        not installed")
+        return
+
+    legacy = measure_parse(pyparsing_parse, args.seconds)
+    print(f"pyparsing:        {legacy:12,.0f} parses/sec ({builtin / legacy:.1f}x slower)")
+    print(f"pyparsing import: {import_time('pyparsing') * 1000:12.1f} ms (no longer paid at startup)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Drive test_project's views through the full Django/DRF request cycle with
+the access policies attached and with AllowAny in their place (or, for
+requests the policies deny, a permission class denying everything, so that
+neither side runs the view), reporting requests/sec, the per-request cost
+of the policy layer and the number of queries per request. Runs offline
+against an in-memory SQLite database.
+
+    python -m benchmarks.request_throughput [--users 200] [--groups 20]
+        [--statements 0] [--seconds 0.5] [--rounds 3]
+"""
+import argparse
+import copy
+import logging
+import random
+import time
+import warnings
+
+from benchmarks.utils import setup_django
+
+SCENARIOS = [
+    # name, user role, method, url name, url kwargs, body, allowed by the policy
+    ("list accounts (denied)", "dev", "get", "account-list", {}, None, False),
+    ("update account", "dev", "patch", "account-detail", {"pk": None}, {"last_name": "B"}, True),
+    ("set password", "regular_users", "post", "account-set-password", {"pk": None}, {}, True),
+    ("get logs", "dev", "get", "get-logs", {}, None, True),
+    ("delete logs (denied)", "dev", "delete", "delete-logs", {}, None, False),
+    ("landing page", "any", "get", "get-landing-page", {}, None, True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=20, help="groups besides the roles")
+    parser.add_argument(
+        "--statements", type=int, default=0, help="extra non-matching statements per policy"
+    )
+    parser.add_argument("--seconds", type=float, default=0.5, help="per round")
+    parser.add_argument("--rounds", type=int, default=3, help="the best round is reported")
+    args = parser.parse_args()
+
+    setup_django()
+    # Denied requests are logged as warnings
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore", message="Limit for query logging exceeded")
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+
+    settings.ALLOWED_HOSTS = ["testserver"]
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    from django.contrib.auth.models import Group, User
+    from rest_framework.permissions import AllowAny, BasePermission
+    from rest_framework.reverse import reverse
+    from rest_framework.test import APIClient
+
+    from test_project.testapp import views
+    from test_project.testapp.access_policies import (
+        LandingPageAccessPolicy,
+        LogsAccessPolicy,
+        UserAccountAccessPolicy,
+    )
+    from test_project.testapp.models import UserAccount
+
+    rng = random.Random(0)
+    roles = {name: Group.objects.create(name=name) for name in ["admin", "dev", "regular_users"]}
+    extra_groups = [Group.objects.create(name=f"team{i}") for i in range(args.groups)]
+    users_by_role = {role: [] for role in roles}
+
+    for i in range(args.users):
+        role = list(roles)[i % len(roles)]
+        user = User.objects.create(username=f"user{i}")
+        user.groups.add(roles[role], *rng.sample(extra_groups, min(2, len(extra_groups))))
+        users_by_role[role].append(user)
+
+    users_by_role["any"] = [u for users in list(users_by_role.values()) for u in users]
+    account = UserAccount.objects.create(username="account", first_name="A", last_name="A")
+
+    for policy in (UserAccountAccessPolicy, LogsAccessPolicy, LandingPageAccessPolicy):
+        policy.statements = policy.statements + [
+            {
+                "principal": f"group:team{i % max(args.groups, 1)}",
+                "action": f"other{i}",
+                "effect": "allow",
+            }
+            for i in range(args.statements)
+        ]
+
+    policy_views = [
+        (views.UserAccountViewSet, "permission_classes"),
+        (views.get_logs.cls, "permission_classes"),
+        (views.delete_logs.cls, "permission_classes"),
+        (views.get_landing_page.cls, "permission_classes"),
+    ]
+    policies = {view: getattr(view, attr) for view, attr in policy_views}
+    client = APIClient()
+
+    class DenyAll(BasePermission):
+        def has_permission(self, request, view):
+            return False
+
+    def run(scenario):
+        name, role, method, url_name, kwargs, body, allowed = scenario
+        url = reverse(url_name, kwargs={k: account.pk for k in kwargs})
+        users = users_by_role[role]
+        count = 0
+        queries = 0
+        started = time.perf_counter()
+
+        while time.perf_counter() - started < args.seconds:
+            # A fresh user object per request, as loaded by authentication
+            user = copy.copy(users[count % len(users)])
+            user.__dict__.pop("_prefetched_objects_cache", None)
+            client.force_authenticate(user=user)
+
+            with CaptureQueriesContext(connection) as captured:
+                getattr(client, method)(url, body, format="json")
+
+            queries += len(captured)
+            count += 1
+
+        return count / (time.perf_counter() - started), queries / count
+
+    print(
+        f"{args.users} users, {args.groups} extra groups, "
+        f"{args.statements} extra statements per policy"
+    )
+    print(
+        f"{'scenario':24} {'with policy':>14} {'without':>14} {'overhead':>12} "
+        f"{'queries':>8} {'without':>8}"
+    )
+
+    def set_permissions(attached: bool, allowed: bool = True):
+        for view, attr in policy_views:
+            without = (AllowAny,) if allowed else (DenyAll,)
+            setattr(view, attr, policies[view] if attached else without)
+
+    for scenario in SCENARIOS:
+        results = {True: [], False: []}
+
+        # Alternate so that both sides see the same machine noise
+        for _ in range(args.rounds):
+            for attached in (True, False):
+                set_permissions(attached, scenario[-1])
+
+                try:
+                    results[attached].append(run(scenario))
+                finally:
+                    set_permissions(True)
+
+        with_rate, with_queries = max(results[True])
+        without_rate, without_queries = max(results[False])
+        overhead = (1 / with_rate - 1 / without_rate) * 1e6
+        print(
+            f"{scenario[0]:24} {with_rate:10,.0f} r/s {without_rate:10,.0f} r/s "
+            f"{overhead:9.1f} us {with_queries:8.1f} {without_queries:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compare deciding requests through the interpreted stage methods, the
+statement index (the default) and generated decision functions.
+
+    python -m benchmarks.statement_matching [--statements 50] [--seconds 1.0]
+"""
+import argparse
+
+from benchmarks.utils import measure, setup_django
+
+
+class FakeUser(object):
+    def __init__(self, pk, groups=()):
+        self.pk = pk
+        self.is_anonymous = False
+        self.is_staff = False
+        self.is_superuser = False
+        self.group_names = list(groups)
+
+
+class FakeRequest(object):
+    def __init__(self, user, method="GET"):
+        self.user = user
+        self.method = method
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--statements", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from rest_access_policy import AccessPolicy
+
+    statements = [
+        {
+            "principal": [f"group:team{i}", f"id:{i}"],
+            "action": [f"action{i % 10}", "<method:delete>"],
+            "effect": "deny" if i % 7 == 0 else "allow",
+            "condition": ["is_owner"] if i % 3 == 0 else [],
+        }
+        for i in range(args.statements)
+    ] + [{"principal": "authenticated", "action": ["list", "retrieve"], "effect": "allow"}]
+
+    class BasePolicy(AccessPolicy):
+        def get_user_group_values(self, user):
+            return user.group_names
+
+        def is_owner(self, request, view, action):
+            return True
+
+    class StagedPolicy(BasePolicy):
+        def _normalize_statements(self, statements):
+            return super()._normalize_statements(statements)
+
+    class GeneratedPolicy(BasePolicy):
+        codegen = True
+
+    requests = [
+        (FakeRequest(FakeUser(1, ["team4"])), "action4"),
+        (FakeRequest(FakeUser(3, ["team9"]), "POST"), "action3"),
+        (FakeRequest(FakeUser(500)), "list"),
+        (FakeRequest(FakeUser(501, ["nobody"])), "destroy"),
+    ]
+
+    print(f"{len(statements)} statements")
+
+    for name, policy_cls in [
+        ("interpreted stages", StagedPolicy),
+        ("statement index", BasePolicy),
+        ("generated function", GeneratedPolicy),
+    ]:
+        policy = policy_cls()
+
+        def decide_all():
+            for request, action in requests:
+                policy._evaluate_statements(statements, request, None, action)
+
+        rate = measure(decide_all, args.seconds, len(requests))
+        print(f"{name:20} {rate:12,.0f} decisions/sec  {1e6 / rate:8.2f} us each")
+
+
+if __name__ == "__main__":
+    main()
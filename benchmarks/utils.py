@@ -0,0 +1,26 @@
+import os
+import time
+from typing import Callable
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_project.settings")
+
+    import django
+
+    django.setup()
+
+
+def measure(fn: Callable[[], object], seconds: float, batch: int = 1) -> float:
+    """
+    Call fn repeatedly for about the given number of seconds and return the
+    number of calls per second; fn is assumed to do `batch` operations.
+    """
+    count = 0
+    started = time.perf_counter()
+
+    while time.perf_counter() - started < seconds:
+        fn()
+        count += batch
+
+    return count / (time.perf_counter() - started)
@@ -0,0 +1,121 @@
+"""
+Measure the memory of forked workers that evaluate every policy once,
+with the policies compiled by warmup() in the parent before forking and
+without (each worker compiling on first use). Linux only, as it reads
+/proc/self/smaps_rollup.
+
+    python -m benchmarks.warmup_memory [--policies 500] [--workers 4]
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+
+from benchmarks.utils import setup_django
+
+
+class FakeUser(object):
+    pk = 1
+    is_anonymous = False
+    is_staff = False
+    is_superuser = False
+
+
+class FakeRequest(object):
+    user = FakeUser()
+    method = "GET"
+
+
+def read_memory() -> dict:
+    """Rss and private (unshared) memory of this process in KiB."""
+    memory = {}
+
+    with open("/proc/self/smaps_rollup") as infile:
+        for line in infile:
+            name, _, value = line.partition(":")
+
+            if name in ("Rss", "Private_Clean", "Private_Dirty"):
+                memory[name] = int(value.split()[0])
+
+    return {"rss": memory["Rss"], "private": memory["Private_Clean"] + memory["Private_Dirty"]}
+
+
+def serve(policies):
+    request = FakeRequest()
+
+    for policy_cls in policies:
+        policy = policy_cls()
+        policy._evaluate_statements(policy.statements, request, None, "action0")
+
+    gc.collect()
+
+
+def run(policy_count: int, worker_count: int, warm: bool):
+    setup_django()
+
+    from benchmarks.boot_cache import make_policies
+    from rest_access_policy import warmup
+
+    policies = make_policies(policy_count)
+
+    if warm:
+        warmup(policies=policies)
+
+    results = []
+
+    for _ in range(worker_count):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            os.close(read_fd)
+            serve(policies)
+            memory = read_memory()
+            os.write(write_fd, f"{memory['rss']} {memory['private']}".encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as infile:
+            results.append([int(value) for value in infile.read().split()])
+        os.waitpid(pid, 0)
+
+    rss = sum(r[0] for r in results) / len(results)
+    private = sum(r[1] for r in results) / len(results)
+    label = "warmup() before fork" if warm else "compile in each worker"
+    print(f"{label:24} rss {rss / 1024:8.1f} MiB   private {private / 1024:8.1f} MiB per worker")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", choices=["warm", "cold"])
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.policies, args.workers, args.mode == "warm")
+        return
+
+    # Each mode runs in its own interpreter, since warmup() freezes the gc
+    print(f"{args.policies} policies, {args.workers} workers")
+
+    for mode in ("cold", "warm"):
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.warmup_memory",
+                "--policies",
+                str(args.policies),
+                "--workers",
+                str(args.workers),
+                "--mode",
+                mode,
+            ],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
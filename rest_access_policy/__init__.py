@@ -1,5 +1,16 @@
-from .exceptions import AccessPolicyException
-from .access_policy import AccessPolicy, Statement
+import django
+
+__version__ = "1.5.0"
+
+from .exceptions import AccessPolicyException, ConditionExpressionSyntaxError
+from .access_policy import AccessPolicy, Statement, object_hints
 from .access_view_set_mixin import AccessViewSetMixin
+from .arguments import condition_argument
+from .conditions import condition
 from .field_access_mixin import FieldAccessMixin
 from .fields import PermittedPkRelatedField, PermittedSlugRelatedField
+from .principals import PrincipalResolver
+from .precompile import warmup
+
+if django.VERSION < (3, 2):
+    default_app_config = "rest_access_policy.apps.RestAccessPolicyConfig"
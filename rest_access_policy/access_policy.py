@@ -1,15 +1,18 @@
-import importlib
+import inspect
+import time
 from dataclasses import asdict, dataclass, field
-from typing import List, Union
+from typing import Callable, List, Set, Tuple, Type, Union
 
-from django.conf import settings
 from django.db.models import prefetch_related_objects
-from pyparsing import infixNotation, opAssoc
 from rest_framework import permissions
 
 from rest_access_policy import AccessPolicyException
 
-from .parsing import BoolAnd, BoolNot, BoolOperand, BoolOr, ConditionOperand
+from . import conditions, metrics, tracing
+from .action_patterns import matches_action_pattern
+from .compiler import get_compiled_policy, overrides
+from .principals import get_principal_resolvers, resolve_principals
+from .view_actions import get_view_actions
 
 
 class AnonymousUser(object):
@@ -52,24 +55,142 @@ class Statement:
             raise Exception(f"effect must be one of {permitted}")
 
 
+def object_hints(
+    select_related: Union[List[str], str] = (), prefetch_related: Union[List[str], str] = ()
+) -> Callable:
+    """
+    Declare the relations a condition reads from the object returned by
+    AccessPolicy.get_object, so it is fetched with them in the same queries.
+    """
+    if isinstance(select_related, str):
+        select_related = [select_related]
+
+    if isinstance(prefetch_related, str):
+        prefetch_related = [prefetch_related]
+
+    def decorator(function):
+        getattr(function, "__func__", function)._object_hints = (
+            tuple(select_related),
+            tuple(prefetch_related),
+        )
+        return function
+
+    return decorator
+
+
 class AccessPolicy(permissions.BasePermission):
     statements: List[Union[dict, Statement]] = []
     field_permissions: dict = {}
     id = None
     group_prefix = "group:"
     id_prefix = "id:"
+    # Principal prefix -> PrincipalResolver (or function(policy, user)) of its values
+    principal_resolvers: dict = {}
+    # Opt-in: decide requests with a function generated for the statements
+    codegen = False
+    # Opt-in: instances keep no per-request state, so one can be shared
+    stateless = False
+
+    @classmethod
+    def get_instance(cls) -> "AccessPolicy":
+        """
+        Return the shared instance of a stateless policy, creating it on
+        first use, or a new instance otherwise.
+        """
+        if not cls.stateless:
+            return cls()
+
+        instance = cls.__dict__.get("_shared_instance")
+
+        if instance is None:
+            instance = cls()
+            cls._shared_instance = instance
+
+        return instance
+
+    @staticmethod
+    def compose(*policies: Type["AccessPolicy"]) -> Type["ComposedAccessPolicy"]:
+        """
+        Return a permission class that allows a request only if every one
+        of the policies does, evaluating them in order with the user's
+        groups and the results of shared conditions resolved once.
+        """
+        flattened = []
+
+        for policy in policies:
+            if inspect.isclass(policy) and issubclass(policy, ComposedAccessPolicy):
+                flattened.extend(policy.policies)
+            elif inspect.isclass(policy) and issubclass(policy, AccessPolicy):
+                flattened.append(policy)
+            else:
+                raise AccessPolicyException(f"Cannot compose {policy!r}: not an AccessPolicy")
+
+        name = "".join(policy.__name__ for policy in flattened) + "Composed"
+        return type(name, (ComposedAccessPolicy,), {"policies": tuple(flattened)})
 
     def has_permission(self, request, view) -> bool:
         action = self._get_invoked_action(view)
+
+        if not (metrics.enabled or tracing.enabled):
+            return self._has_permission(request, view, action)
+
+        started = time.perf_counter()
+
+        with tracing.start_span(
+            "access_policy.has_permission", policy=type(self).__name__, action=action
+        ) as span:
+            allowed = self._has_permission(request, view, action)
+            span.set_attribute("allowed", allowed)
+
+        if metrics.enabled:
+            metrics.record_decision(type(self), action, allowed, time.perf_counter() - started)
+
+        return allowed
+
+    def _has_permission(self, request, view, action: str) -> bool:
         statements = self.get_policy_statements(request, view)
 
         if len(statements) == 0:
             return False
 
+        compiled_policy = get_compiled_policy(type(self))
+
+        if compiled_policy.uses_statement_index and view is not None:
+            statements = compiled_policy.get_view_statements(
+                self, statements, type(view), action
+            )
+
         allowed = self._evaluate_statements(statements, request, view, action)
         request.access_enforcement = AccessEnforcement(action=action, allowed=allowed)
         return allowed
 
+    def get_object(self, view):
+        """
+        Return the object of the view's request, e.g. for conditions, from
+        view.get_object(). It is only fetched once per request: the view's
+        own later calls of get_object() return it too. The view's queryset
+        gets the relations declared with object_hints by the conditions of
+        the statements that can match the action.
+        """
+        obj = view.__dict__.get("_access_policy_object", _MISSING)
+
+        if obj is not _MISSING:
+            return obj
+
+        select_related, prefetch_related = get_compiled_policy(type(self)).get_object_hints(
+            self, self.get_policy_statements(view.request, view), self._get_invoked_action(view)
+        )
+
+        if (select_related or prefetch_related) and hasattr(view, "get_queryset"):
+            obj = _get_object_with_hints(view, select_related, prefetch_related)
+        else:
+            obj = view.get_object()
+
+        view._access_policy_object = obj
+        # Shadows the view's method for the rest of the request
+        view.get_object = lambda: obj
+        return obj
+
     def get_policy_statements(self, request, view) -> List[Union[dict, Statement]]:
         return self.statements
 
@@ -95,7 +216,9 @@ class AccessPolicy(permissions.BasePermission):
         """
         if hasattr(view, "action"):
             if hasattr(view, "action_map"):
-                return view.action or list(view.action_map.values())[0]
+                return view.action or get_view_actions(type(view)).get_default_action(
+                    view.action_map
+                )
             return view.action
 
         elif hasattr(view, "__class__"):
@@ -106,9 +229,32 @@ class AccessPolicy(permissions.BasePermission):
     def _evaluate_statements(
         self, statements: List[Union[dict, Statement]], request, view, action: str
     ) -> bool:
+        compiled_policy = get_compiled_policy(type(self))
+
+        if self.codegen:
+            decide = compiled_policy.get_decision_function(self, statements)
+
+            if tracing.enabled:
+                # Matching and conditions are interleaved in the generated function
+                with tracing.start_span(
+                    "access_policy.match_statements", policy=type(self).__name__, action=action
+                ):
+                    return decide(self, request, view, action)
+
+            return decide(self, request, view, action)
+
+        if compiled_policy.uses_statement_index:
+            index = compiled_policy.get_statement_index(self, statements)
+            return index.evaluate(compiled_policy, self, request, view, action)
+
         statements = self._normalize_statements(statements)
-        matched = self._get_statements_matching_principal(request, statements)
-        matched = self._get_statements_matching_action(request, action, matched)
+
+        with tracing.start_span(
+            "access_policy.match_statements", policy=type(self).__name__, action=action
+        ) as span:
+            matched = self._get_statements_matching_principal(request, statements)
+            matched = self._get_statements_matching_action(request, action, matched)
+            span.set_attribute("matched", len(matched))
 
         matched = self._get_statements_matching_conditions(
             request, view, action=action, statements=matched, is_expression=False
@@ -154,12 +300,50 @@ class AccessPolicy(permissions.BasePermission):
 
         return normalized
 
+    @classmethod
+    def _get_principals(cls, request, include_groups: bool = True) -> Set[str]:
+        """
+        Return the principal values that apply to the request's user, e.g.
+        "*", "authenticated", "id:5", "group:dev" and the values of the
+        principal resolvers, e.g. "role:editor". Group and resolved values
+        are only fetched if include_groups is True.
+        """
+        user = request.user or AnonymousUser()
+        principals = {"*", cls.id_prefix + str(user.pk)}
+
+        if user.is_superuser:
+            principals.add("admin")
+
+        if user.is_staff:
+            principals.add("staff")
+
+        if user.is_anonymous:
+            principals.add("anonymous")
+        else:
+            principals.add("authenticated")
+
+        if include_groups:
+            if metrics.enabled or tracing.enabled:
+                user_roles = tracing.get_user_group_values(cls.get_instance(), user)
+            else:
+                user_roles = cls.get_instance().get_user_group_values(user)
+
+            for user_role in user_roles:
+                principals.add(cls.group_prefix + user_role)
+
+            for prefix, resolver in get_principal_resolvers(cls).items():
+                for value in resolve_principals(cls.get_instance(), request, user, resolver):
+                    principals.add(prefix + value)
+
+        return principals
+
     @classmethod
     def _get_statements_matching_principal(
         cls, request, statements: List[dict]
     ) -> List[dict]:
         user = request.user or AnonymousUser()
         user_roles = None
+        resolvers = get_principal_resolvers(cls)
         matched = []
 
         for statement in statements:
@@ -180,13 +364,25 @@ class AccessPolicy(permissions.BasePermission):
                 found = True
             else:
                 if not user_roles:
-                    user_roles = cls().get_user_group_values(user)
+                    if metrics.enabled or tracing.enabled:
+                        user_roles = tracing.get_user_group_values(cls.get_instance(), user)
+                    else:
+                        user_roles = cls.get_instance().get_user_group_values(user)
 
                 for user_role in user_roles:
                     if cls.group_prefix + user_role in principals:
                         found = True
                         break
 
+            if not found and resolvers:
+                found = any(
+                    principal.startswith(prefix)
+                    and principal[len(prefix) :]
+                    in resolve_principals(cls.get_instance(), request, user, resolver)
+                    for principal in principals
+                    for prefix, resolver in resolvers.items()
+                )
+
             if found:
                 matched.append(statement)
 
@@ -213,6 +409,8 @@ class AccessPolicy(permissions.BasePermission):
                 and request.method in SAFE_METHODS
             ):
                 matched.append(statement)
+            elif matches_action_pattern(statement["action"], action):
+                matched.append(statement)
 
         return matched
 
@@ -226,6 +424,7 @@ class AccessPolicy(permissions.BasePermission):
         """
         matched = []
         element_key = "condition_expression" if is_expression else "condition"
+        compiled_policy = get_compiled_policy(type(self))
 
         for statement in statements:
             conditions = statement[element_key]
@@ -236,30 +435,13 @@ class AccessPolicy(permissions.BasePermission):
 
             fails = 0
 
-            boolOperand = BoolOperand()
-
             for condition in conditions:
                 if is_expression:
-                    check_cond_fn = lambda cond: self._check_condition(
-                        cond, request, view, action
-                    )
-
-                    boolOperand.setParseAction(
-                        lambda token: ConditionOperand(token, check_cond_fn)
-                    )
-
-                    boolExpr = infixNotation(
-                        boolOperand,
-                        [
-                            ("not", 1, opAssoc.RIGHT, BoolNot),
-                            ("and", 2, opAssoc.LEFT, BoolAnd),
-                            ("or", 2, opAssoc.LEFT, BoolOr),
-                        ],
-                    )
-
-                    passed = bool(boolExpr.parseString(condition)[0])
+                    evaluate = compiled_policy.get_expression(condition)
                 else:
-                    passed = self._check_condition(condition, request, view, action)
+                    evaluate = compiled_policy.get_condition(condition)
+
+                passed = evaluate(self, request, view, action)
 
                 if not passed:
                     fails += 1
@@ -275,49 +457,107 @@ class AccessPolicy(permissions.BasePermission):
         Evaluate a custom context condition; if method does not exist on
         the access policy class, then return False.
         Condition value can contain a value that is passed to method, if
-        formatted as `<method_name>:<arg_value>`.
+        formatted as `<method_name>:<arg_value>`. The call is timed if the
+        slow condition detector is enabled.
+
+        Conditions are compiled rather than evaluated with this method,
+        unless a subclass overrides it (or _get_condition_method).
         """
-        parts = condition.split(":", 1)
-        method_name = parts[0]
-        arg = parts[1] if len(parts) == 2 else None
-        method = self._get_condition_method(method_name)
+        compiled_policy = get_compiled_policy(type(self))
 
-        if arg is not None:
-            result = method(request, view, action, arg)
+        if overrides(type(self), "_check_condition"):
+            # Called by the override, which compiled conditions call
+            compiled = compiled_policy.get_resolved_condition(condition)
         else:
-            result = method(request, view, action)
+            compiled = compiled_policy.get_condition(condition)
 
-        if type(result) is not bool:
-            raise AccessPolicyException(
-                f"condition '{condition}' must return true/false, not {type(result)}"
-            )
-
-        return result
+        return compiled(self, request, view, action)
 
     def _get_condition_method(self, method_name: str):
         if hasattr(self, method_name):
             return getattr(self, method_name)
 
-        if hasattr(settings, "DRF_ACCESS_POLICY"):
-            module_paths = settings.DRF_ACCESS_POLICY.get("reusable_conditions")
+        return self._get_reusable_condition(method_name)
 
-            if module_paths:
-                if not isinstance(module_paths, (str, list, tuple)):
-                    raise ValueError(
-                        "Define 'resusable_conditions' as list, tuple or str"
-                    )
+    @classmethod
+    def _get_reusable_condition(cls, method_name: str):
+        function = conditions.registry.get(method_name)
 
-                module_paths = (
-                    [module_paths] if isinstance(module_paths, str) else module_paths
-                )
+        if function is None:
+            raise AccessPolicyException(
+                f"condition '{method_name}' must be a method on the access policy "
+                f"or be defined in the 'reusable_conditions' module"
+            )
 
-                for module_path in module_paths:
-                    module = importlib.import_module(module_path)
+        return function
 
-                    if hasattr(module, method_name):
-                        return getattr(module, method_name)
 
-        raise AccessPolicyException(
-            f"condition '{method_name}' must be a method on the access policy "
-            f"or be defined in the 'reusable_conditions' module"
-        )
+_MISSING = object()
+
+
+def _get_object_with_hints(
+    view, select_related: Tuple[str, ...], prefetch_related: Tuple[str, ...]
+):
+    get_queryset = view.get_queryset
+    shadowed = view.__dict__.get("get_queryset", _MISSING)
+
+    def get_hinted_queryset():
+        queryset = get_queryset()
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
+
+    view.get_queryset = get_hinted_queryset
+
+    try:
+        return view.get_object()
+    finally:
+        if shadowed is _MISSING:
+            del view.get_queryset
+        else:
+            view.get_queryset = shadowed
+
+
+class ComposedAccessPolicy(permissions.BasePermission):
+    """
+    Evaluates several access policies as one permission, see
+    AccessPolicy.compose. While it runs, the request carries memos of the
+    user's groups and of the results of conditions (per condition function,
+    argument and action), so policies that share them don't resolve them
+    again. Methods, including overrides of get_user_group_values, may read
+    self, so only their results within one policy class are shared; the
+    default get_user_group_values and reusable conditions are shared by all.
+    """
+
+    policies: Tuple[Type[AccessPolicy], ...] = ()
+
+    def has_permission(self, request, view) -> bool:
+        if not self.policies:
+            return False
+
+        if hasattr(request, "_access_policy_groups"):
+            # Nested in another composed policy, which owns the memos
+            return self._evaluate(request, view)
+
+        request._access_policy_groups = {}
+        request._access_policy_condition_memo = {}
+
+        try:
+            return self._evaluate(request, view)
+        finally:
+            del request._access_policy_groups
+            del request._access_policy_condition_memo
+
+    def _evaluate(self, request, view) -> bool:
+        for policy in self.policies:
+            instance = policy.get_instance() if issubclass(policy, AccessPolicy) else policy()
+
+            if not instance.has_permission(request, view):
+                return False
+
+        return True
@@ -1,5 +1,5 @@
 import inspect
-from typing import Type
+from typing import Callable, Type
 
 from rest_access_policy import AccessPolicy
 from rest_framework.response import Response
@@ -8,21 +8,75 @@ from rest_framework.response import Response
 class AccessViewSetMixin(object):
     access_policy: Type[AccessPolicy]
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        # Combine the permission classes once per view class rather than on
+        # every request; a missing access policy is raised on instantiation
+        if _is_access_policy(getattr(cls, "access_policy", None)):
+            cls._get_access_permissions()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        access_policy = getattr(self, "access_policy", None)
+        if "access_policy" in self.__dict__ or "permission_classes" in self.__dict__:
+            # Overridden for this instance, e.g. through as_view()
+            _check_access_policy(self.access_policy)
+            self.permission_classes = [self.access_policy] + list(self.permission_classes)
+        else:
+            # A copy, so that changing it doesn't affect other instances
+            self.permission_classes = list(self._get_access_permissions()[0])
+
+    @classmethod
+    def _get_access_permissions(cls):
+        """
+        The view's access policy followed by its other permission classes,
+        and a factory for an instance of each; computed once per view class
+        and again only if either class attribute is reassigned.
+        """
+        access_policy = getattr(cls, "access_policy", None)
+        permission_classes = cls.permission_classes
+        cached = cls.__dict__.get("_access_permissions")
+
+        if cached is not None and cached[0] is access_policy and cached[1] is permission_classes:
+            return cached[2]
 
-        if not inspect.isclass(access_policy) or not issubclass(access_policy, AccessPolicy):
-            raise Exception(
-                """
-                    When mixing AccessViewSetMixin into your view set, you must assign an AccessPolicy 
-                    to the access_policy class attribute.
-                """
-            )
+        _check_access_policy(access_policy)
+        combined = [access_policy] + list(permission_classes)
+        permissions = (combined, [_get_factory(p) for p in combined])
+        cls._access_permissions = (access_policy, permission_classes, permissions)
+        return permissions
 
-        self.permission_classes = [self.access_policy] + self.permission_classes
+    def get_permissions(self):
+        combined, factories = self._get_access_permissions()
+
+        if self.permission_classes != combined:
+            factories = [_get_factory(p) for p in self.permission_classes]
+
+        return [factory() for factory in factories]
 
     def finalize_response(self, request, response, *args, **kwargs) -> Response:
         response = super().finalize_response(request, response, *args, **kwargs)
         return response
+
+
+def _is_access_policy(value) -> bool:
+    return inspect.isclass(value) and issubclass(value, AccessPolicy)
+
+
+def _check_access_policy(access_policy):
+    if not _is_access_policy(access_policy):
+        raise Exception(
+            """
+                When mixing AccessViewSetMixin into your view set, you must assign an AccessPolicy 
+                to the access_policy class attribute.
+            """
+        )
+
+
+def _get_factory(permission) -> Callable:
+    # Stateless policies share one instance across requests
+    if _is_access_policy(permission):
+        return permission.get_instance
+
+    return permission
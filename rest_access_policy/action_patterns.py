@@ -0,0 +1,67 @@
+import re
+from fnmatch import translate
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+def is_action_pattern(token: str) -> bool:
+    """Whether an action element is a glob pattern, e.g. "export_*" or "*_logs"."""
+    return token != "*" and not token.startswith("<") and any(c in token for c in "*?[")
+
+
+@lru_cache(maxsize=1024)
+def compile_action_pattern(pattern: str) -> Callable:
+    """The match function of the (case-sensitive) regex of a glob pattern."""
+    return re.compile(translate(pattern)).match
+
+
+def matches_action_pattern(tokens: Iterable[str], action: str) -> bool:
+    return any(
+        is_action_pattern(token) and compile_action_pattern(token)(action) for token in tokens
+    )
+
+
+class ActionPatterns(object):
+    """
+    The glob action patterns of a list of statements, each with a mask of
+    the statements naming it. The patterns are combined into one regex, so
+    an action that matches none is rejected with one match, and the mask of
+    the statements whose patterns match an action is computed once per
+    action and memoized.
+    """
+
+    __slots__ = ("pattern_masks", "matchers", "combined", "masks")
+
+    # How many actions to memoize masks for
+    max_actions = 4096
+
+    def __init__(self, pattern_masks: Dict[str, int]):
+        self.pattern_masks = pattern_masks
+        self.matchers: List[Tuple[Callable, int]] = [
+            (compile_action_pattern(pattern), mask) for pattern, mask in pattern_masks.items()
+        ]
+        self.combined = re.compile(
+            "|".join(f"(?:{translate(pattern)})" for pattern in pattern_masks)
+        ).match
+        self.masks: Dict[str, int] = {}
+
+    def __bool__(self):
+        return bool(self.pattern_masks)
+
+    def get_mask(self, action: str) -> int:
+        mask = self.masks.get(action)
+
+        if mask is not None:
+            return mask
+
+        mask = 0
+
+        if self.combined(action):
+            for match, pattern_mask in self.matchers:
+                if match(action):
+                    mask |= pattern_mask
+
+        if len(self.masks) < self.max_actions:
+            self.masks[action] = mask
+
+        return mask
@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+
+class RestAccessPolicyConfig(AppConfig):
+    name = "rest_access_policy"
+    verbose_name = "Django REST - Access Policy"
+
+    def ready(self):
+        from . import conditions, metrics, slow_conditions, tracing
+
+        metrics.configure(settings)
+        tracing.configure(settings)
+        slow_conditions.configure(settings)
+        # Imports the reusable conditions modules, raising on name collisions
+        conditions.registry.load()
+
+        if getattr(settings, "DRF_ACCESS_POLICY", {}).get("precompile", True):
+            from .precompile import precompile_on_first_request
+
+            # Not now: importing the URLconf while apps are still loading would
+            # e.g. build the admin's URLs before its autodiscovery has run
+            request_started.connect(precompile_on_first_request)
@@ -0,0 +1,120 @@
+import inspect
+import typing
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+from .exceptions import AccessPolicyException
+
+# Parses the raw string argument of a `<method_name>:<arg_value>` condition
+ArgumentParser = Callable[[str], Any]
+
+# Parsed arguments are shared by every call, so they are immutable
+_CONTAINERS = {
+    list: tuple,
+    tuple: tuple,
+    set: frozenset,
+    frozenset: frozenset,
+    typing.List: tuple,
+    typing.Tuple: tuple,
+    typing.Set: frozenset,
+    typing.FrozenSet: frozenset,
+}
+
+
+def condition_argument(parser: ArgumentParser) -> Callable:
+    """
+    Declare how a condition's argument is parsed, overriding its annotation;
+    parser is called with the raw string once, when the condition is compiled.
+    """
+
+    def decorator(function):
+        getattr(function, "__func__", function)._argument_parser = parser
+        return function
+
+    return decorator
+
+
+def parse_argument(condition: str, function, offset: int, arg: Optional[str]):
+    """
+    Parse a condition's argument for the function it is passed to, as the
+    parameter at position offset: with the parser declared by
+    condition_argument, or else according to the parameter's annotation.
+    Arguments of unannotated or str parameters are passed as they are.
+    """
+    if arg is None:
+        return None
+
+    parser = get_argument_parser(function, offset)
+
+    if parser is None:
+        return arg
+
+    try:
+        return parser(arg)
+    except (TypeError, ValueError, ArithmeticError) as e:
+        raise AccessPolicyException(f"condition '{condition}' has an invalid argument: {e}")
+
+
+def get_argument_parser(function, offset: int) -> Optional[ArgumentParser]:
+    function = getattr(function, "__func__", function)
+    parser = getattr(function, "_argument_parser", None)
+
+    if parser is not None:
+        return parser
+
+    try:
+        parameters = list(inspect.signature(function).parameters.values())
+    except (TypeError, ValueError):
+        return None
+
+    if len(parameters) <= offset:
+        return None
+
+    try:
+        hints = typing.get_type_hints(function)
+    except Exception:
+        hints = getattr(function, "__annotations__", {})
+
+    return _get_annotation_parser(hints.get(parameters[offset].name))
+
+
+def _get_annotation_parser(annotation) -> Optional[ArgumentParser]:
+    if annotation in (int, float, Decimal):
+        return annotation
+
+    if annotation is bool:
+        return _parse_bool
+
+    origin = getattr(annotation, "__origin__", None)
+    args = [a for a in getattr(annotation, "__args__", None) or () if a is not Ellipsis]
+
+    if origin is typing.Union:
+        options = [a for a in args if a is not type(None)]
+        return _get_annotation_parser(options[0]) if len(options) == 1 else None
+
+    container = _CONTAINERS.get(annotation) or _CONTAINERS.get(origin)
+
+    if container is None:
+        return None
+
+    item_parser = (_get_annotation_parser(args[0]) if args else None) or str
+
+    def parse(raw: str):
+        if not raw:
+            return container()
+
+        return container(item_parser(item.strip()) for item in raw.split(","))
+
+    return parse
+
+
+def _parse_bool(raw: str) -> bool:
+    value = raw.lower()
+
+    if value in ("true", "yes", "1"):
+        return True
+
+    if value in ("false", "no", "0"):
+        return False
+
+    raise ValueError(f"invalid boolean {raw!r}")
@@ -0,0 +1,177 @@
+from typing import Callable, List, Optional, Sequence
+
+from .compiler import get_compiled_policy
+from .exceptions import AccessPolicyException
+
+
+class BulkRequest(object):
+    """The stand-in request passed to conditions by evaluate_bulk."""
+
+    def __init__(self, user, method: str):
+        self.user = user
+        self.method = method
+
+
+def evaluate_bulk(
+    policy,
+    users: Sequence,
+    actions: Sequence[str],
+    method: str = "GET",
+    statements: Optional[list] = None,
+    view=None,
+    request_factory: Optional[Callable] = None,
+    chunk_size: int = 10000,
+):
+    """
+    Decide every (user, action) pair for a policy at once, returning a
+    NumPy boolean array of shape (len(users), len(actions)). Requires numpy.
+
+    Which statements match each pair is computed with matrix products of a
+    user x principal incidence matrix and a statement x action matrix, so
+    only statements with conditions are evaluated cell by cell, with a
+    request built by request_factory(user, method) (a BulkRequest by
+    default). Statements default to the policy's statements attribute, and
+    each user's groups come from get_user_group_values, so prefetch them;
+    principal resolvers resolve each chunk of users with one resolve_many.
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("evaluate_bulk requires numpy: pip install drf-access-policy[bulk]")
+
+    policy_cls = type(policy)
+    compiled_policy = get_compiled_policy(policy_cls)
+
+    if not compiled_policy.uses_statement_index:
+        raise AccessPolicyException(
+            f"{policy_cls.__name__} overrides how statements are evaluated, "
+            f"so it cannot be evaluated in bulk"
+        )
+
+    if statements is None:
+        statements = policy.statements
+
+    index = compiled_policy.get_statement_index(policy, statements)
+    request_factory = request_factory or BulkRequest
+    statement_count = len(index.statements)
+
+    # Statement x action: whether each statement names each action
+    action_masks = []
+
+    for action in actions:
+        action_masks.append(index.get_action_mask(action, method))
+
+    statement_actions = _bits_matrix(numpy, action_masks, statement_count).T
+
+    # Principal token x statement: whether each statement names each token
+    token_masks = dict(index.principal_masks)
+    token_masks.update((("id", key), mask) for key, mask in index.id_masks.items())
+    token_masks.update((("group", key), mask) for key, mask in index.group_masks.items())
+
+    for resolver, masks, _ in index.resolved_masks:
+        token_masks.update(((resolver, key), mask) for key, mask in masks.items())
+
+    token_columns = {token: column for column, token in enumerate(token_masks)}
+    token_statements = _bits_matrix(numpy, list(token_masks.values()), statement_count)
+    any_principal = _bits_matrix(numpy, [index.any_principal_mask], statement_count)[0]
+
+    deny = _bits_matrix(numpy, [index.deny_mask], statement_count)[0]
+    conditional = _bits_matrix(numpy, [index.conditional_mask], statement_count)[0]
+    unconditional_deny = (deny & ~conditional).astype(numpy.float32)
+    unconditional_allow = (~deny & ~conditional).astype(numpy.float32)
+    conditional_statements = [i for i in range(statement_count) if conditional[i]]
+    # Deny statements go first, so a passing deny spares the allows' conditions
+    conditional_statements.sort(key=lambda i: not deny[i])
+
+    result = numpy.zeros((len(users), len(actions)), dtype=bool)
+    actions_matrix = statement_actions.astype(numpy.float32)
+
+    for start in range(0, len(users), chunk_size):
+        chunk = users[start : start + chunk_size]
+        incidence = numpy.zeros((len(chunk), len(token_columns)), dtype=numpy.float32)
+
+        for row, user in enumerate(chunk):
+            for token in _user_tokens(policy, user, index):
+                column = token_columns.get(token)
+
+                if column is not None:
+                    incidence[row, column] = 1
+
+        for resolver, _, _ in index.resolved_masks:
+            resolved = resolver.resolve_many(policy, [_get_user(user) for user in chunk])
+
+            for row, values in enumerate(resolved):
+                for value in values:
+                    column = token_columns.get((resolver, value))
+
+                    if column is not None:
+                        incidence[row, column] = 1
+
+        # User x statement: whether each statement names one of the user's principals
+        user_statements = (incidence @ token_statements.astype(numpy.float32)) > 0
+        user_statements |= any_principal
+        matched = user_statements.astype(numpy.float32)
+
+        denied = (matched * unconditional_deny) @ actions_matrix > 0
+        allowed = (matched * unconditional_allow) @ actions_matrix > 0
+
+        for i in conditional_statements:
+            cells = numpy.outer(user_statements[:, i], statement_actions[i]) & ~denied
+
+            if not deny[i]:
+                cells &= ~allowed
+
+            for row, column in zip(*numpy.nonzero(cells)):
+                request = request_factory(chunk[row], method)
+
+                if index._conditions_pass(
+                    i, compiled_policy, policy, request, view, actions[column]
+                ):
+                    if deny[i]:
+                        denied[row, column] = True
+                    else:
+                        allowed[row, column] = True
+
+        result[start : start + len(chunk)] = allowed & ~denied
+
+    return result
+
+
+def _user_tokens(policy, user, index) -> List:
+    user = _get_user(user)
+    tokens = [("id", str(user.pk))]
+
+    if user.is_superuser:
+        tokens.append("admin")
+
+    if user.is_staff:
+        tokens.append("staff")
+
+    tokens.append("anonymous" if user.is_anonymous else "authenticated")
+
+    if index.group_masks:
+        tokens.extend(("group", group) for group in policy.get_user_group_values(user))
+
+    return tokens
+
+
+def _get_user(user):
+    if user is None:
+        from .access_policy import AnonymousUser
+
+        return AnonymousUser()
+
+    return user
+
+
+def _bits_matrix(numpy, masks: List[int], width: int):
+    """Bool matrix whose row r has column i set if bit i of masks[r] is."""
+    matrix = numpy.zeros((len(masks), width), dtype=bool)
+
+    for row, mask in enumerate(masks):
+        while mask:
+            low = mask & -mask
+            matrix[row, low.bit_length() - 1] = True
+            mask ^= low
+
+    return matrix
@@ -0,0 +1,234 @@
+import logging
+from typing import Callable, List
+
+from django.conf import settings
+
+from . import metrics, tracing
+from .action_patterns import ActionPatterns, is_action_pattern
+from .principals import get_principal_resolvers, resolve_principals
+
+logger = logging.getLogger("rest_access_policy")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# A generated decision function: called with (policy, request, view, action)
+DecisionFunction = Callable[..., bool]
+
+
+def generate_decision_function(compiled_policy, statements: List[dict]) -> DecisionFunction:
+    """
+    Generate one Python function that decides a request for the given
+    normalized statements, with the action checks, principal checks and
+    condition calls of each statement inlined. Deny statements are checked
+    first so the function returns as soon as the outcome is known. The
+    generated source is kept on the function as __source__.
+    """
+    policy_cls = compiled_policy.policy_cls
+    generator = _Generator(compiled_policy, policy_cls.id_prefix, policy_cls.group_prefix)
+
+    ordered = [s for s in statements if s["effect"] != "allow"] + [
+        s for s in statements if s["effect"] == "allow"
+    ]
+
+    for statement in ordered:
+        generator.add_statement(statement)
+
+    source = generator.render(policy_cls.__name__)
+    namespace = generator.namespace
+    exec(
+        compiled_policy.compile_source(source, f"<{policy_cls.__name__} decision function>"),
+        namespace,
+    )
+
+    function = namespace["_decide"]
+    function.__source__ = source
+
+    if getattr(settings, "DRF_ACCESS_POLICY", {}).get("dump_generated_code"):
+        logger.info("Generated decision function for %s:\n%s", policy_cls.__name__, source)
+
+    return function
+
+
+class _Generator(object):
+    def __init__(self, compiled_policy, id_prefix: str, group_prefix: str):
+        from .access_policy import AnonymousUser
+
+        self.compiled_policy = compiled_policy
+        self.id_prefix = id_prefix
+        self.group_prefix = group_prefix
+        self.resolvers = get_principal_resolvers(compiled_policy.policy_cls)
+        self.lines: List[str] = []
+        self.uses_user_id = False
+        self.uses_method = False
+        self.namespace = {
+            "AnonymousUser": AnonymousUser,
+            "SAFE_METHODS": SAFE_METHODS,
+        }
+
+    def constant(self, prefix: str, value) -> str:
+        name = f"{prefix}{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def add_statement(self, statement: dict):
+        action_check = self._action_check(statement["action"])
+        principal_lines = self._principal_lines(statement["principal"])
+
+        if principal_lines is None:
+            return
+
+        checks = [
+            f"{self.constant('_c', self.compiled_policy.get_condition(c))}(policy, request, view, action)"
+            for c in statement["condition"]
+        ] + [
+            f"{self.constant('_e', self.compiled_policy.get_expression(e))}(policy, request, view, action)"
+            for e in statement["condition_expression"]
+        ]
+
+        outcome = "True" if statement["effect"] == "allow" else "False"
+        body = [f"return {outcome}"]
+
+        if checks:
+            body = [f"if {' and '.join(checks)}:", *self._indent(body)]
+
+        if principal_lines:
+            body = principal_lines + ["if found:", *self._indent(body)]
+
+        if action_check is not None:
+            body = [f"if {action_check}:", *self._indent(body)]
+
+        self.lines.append("")
+        self.lines.append(f"# {statement!r}")
+        self.lines.extend(body)
+
+    def render(self, policy_name: str) -> str:
+        prelude = ["user = request.user or AnonymousUser()", "groups = None"]
+
+        if self.uses_user_id:
+            prelude.append("user_id = str(user.pk)")
+
+        if self.uses_method:
+            prelude.append("method = request.method")
+
+        lines = [
+            f"# Decision function generated for {policy_name}",
+            "def _decide(policy, request, view, action):",
+            *self._indent(prelude + self.lines + ["", "return False"]),
+        ]
+        return "\n".join(lines) + "\n"
+
+    def _action_check(self, actions: List[str]):
+        if "*" in actions:
+            return None
+
+        parts = [f"action in {self.constant('_actions', frozenset(actions))}"]
+        methods = frozenset(
+            a[len("<method:") : -1] for a in actions if a.startswith("<method:")
+        )
+
+        if methods or "<safe_methods>" in actions:
+            self.uses_method = True
+
+        if methods:
+            parts.append(f"method.lower() in {self.constant('_methods', methods)}")
+
+        if "<safe_methods>" in actions:
+            parts.append("method in SAFE_METHODS")
+
+        patterns = [a for a in actions if is_action_pattern(a)]
+
+        if patterns:
+            matcher = ActionPatterns(dict.fromkeys(patterns, 1))
+            parts.append(f"{self.constant('_patterns', matcher)}.get_mask(action)")
+
+        return " or ".join(parts)
+
+    def _principal_lines(self, principals: List[str]):
+        """
+        Lines that set `found` to whether the user matches one of the
+        principals; groups, then resolved principals, are only fetched if
+        no other principal matched.
+        Returns no lines if any user matches, and None if none can.
+        """
+        if "*" in principals:
+            return []
+
+        parts = []
+
+        if "admin" in principals:
+            parts.append("user.is_superuser")
+
+        if "staff" in principals:
+            parts.append("user.is_staff")
+
+        if "authenticated" in principals:
+            parts.append("not user.is_anonymous")
+
+        if "anonymous" in principals:
+            parts.append("user.is_anonymous")
+
+        user_ids = frozenset(
+            p[len(self.id_prefix) :] for p in principals if p.startswith(self.id_prefix)
+        )
+
+        if user_ids:
+            self.uses_user_id = True
+            parts.append(f"user_id in {self.constant('_ids', user_ids)}")
+
+        groups = frozenset(
+            p[len(self.group_prefix) :] for p in principals if p.startswith(self.group_prefix)
+        )
+
+        # Lines run in turn while no principal matched yet
+        fetches = []
+
+        if groups:
+            if metrics.enabled or tracing.enabled:
+                self.namespace["_get_user_group_values"] = tracing.get_user_group_values
+                get_groups = "_get_user_group_values(policy, user)"
+            else:
+                get_groups = "policy.get_user_group_values(user)"
+
+            fetches.append(
+                [
+                    "if groups is None:",
+                    f"    groups = set({get_groups})",
+                    f"found = not groups.isdisjoint({self.constant('_groups', groups)})",
+                ]
+            )
+
+        for resolver, values in self._resolved_values(principals).items():
+            self.namespace["_resolve_principals"] = resolve_principals
+            resolver = self.constant("_resolver", resolver)
+            values = self.constant("_values", values)
+            fetches.append(
+                [
+                    f"found = not _resolve_principals(policy, request, user, {resolver})"
+                    f".isdisjoint({values})"
+                ]
+            )
+
+        if not parts and not fetches:
+            return None
+
+        lines = [f"found = {' or '.join(parts)}"] if parts else []
+
+        for fetch in fetches:
+            lines.extend(["if not found:", *self._indent(fetch)] if lines else fetch)
+
+        return lines
+
+    def _resolved_values(self, principals: List[str]) -> dict:
+        """The values of the principals with a resolver's prefix, by resolver."""
+        values = {}
+
+        for prefix, resolver in self.resolvers.items():
+            for principal in principals:
+                if principal.startswith(prefix):
+                    values.setdefault(resolver, set()).add(principal[len(prefix) :])
+
+        return {resolver: frozenset(v) for resolver, v in values.items()}
+
+    @staticmethod
+    def _indent(lines: List[str]) -> List[str]:
+        return ["    " + line if line else line for line in lines]
@@ -0,0 +1,273 @@
+import base64
+import hashlib
+import importlib.util
+import json
+import logging
+import marshal
+import os
+import tempfile
+from typing import Dict, Optional, Type
+
+from . import __version__
+from .compiler import get_compiled_policy
+from .field_access_mixin import ReadOnlyFieldsIndex, _read_only_fields_indexes
+from .parsing import BoolAnd, BoolConstant, BoolNot, BoolOr, ConditionOperand
+
+logger = logging.getLogger("rest_access_policy")
+
+# Bumped whenever the layout of the cache file changes
+CACHE_FORMAT = 2
+
+
+class CompiledCache(object):
+    """
+    A file of compiled policy artifacts - parse trees of condition
+    expressions, code objects of generated functions and field permission
+    indexes - so that new workers restore them instead of recompiling.
+
+    Each policy's entry is keyed by a hash of its statements, field
+    permissions and the library version; a stale entry is ignored and
+    replaced, and an unreadable file is treated as empty.
+
+    The file is JSON, with the code objects marshalled. Code objects are
+    run, so a file that isn't owned by the current user, or that others
+    can write to, is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.changed = False
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledCache":
+        cache = cls(path)
+
+        try:
+            with open(path, "rb") as infile:
+                problem = _check_trusted(os.fstat(infile.fileno()))
+
+                if problem is not None:
+                    logger.warning("Ignoring compiled cache %s: %s", path, problem)
+                    return cache
+
+                data = json.loads(infile.read().decode("utf-8"))
+        except FileNotFoundError:
+            return cache
+        except Exception as e:
+            logger.warning("Ignoring unreadable compiled cache %s: %s", path, e)
+            return cache
+
+        if not isinstance(data, dict) or data.get("header") != _header():
+            logger.info("Ignoring stale compiled cache %s", path)
+            return cache
+
+        try:
+            cache.entries = {
+                label: _decode_entry(entry) for label, entry in data["policies"].items()
+            }
+        except Exception as e:
+            logger.warning("Ignoring unreadable compiled cache %s: %s", path, e)
+
+        return cache
+
+    def save(self):
+        """Atomically replace the file if any entry was added or replaced."""
+        if not self.changed:
+            return
+
+        data = {
+            "header": _header(),
+            "policies": {label: _encode_entry(entry) for label, entry in self.entries.items()},
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+
+        temp_path = None
+
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+            with os.fdopen(fd, "wb") as outfile:
+                outfile.write(json.dumps(data).encode("utf-8"))
+
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning("Could not write compiled cache %s: %s", self.path, e)
+
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            return
+
+        self.changed = False
+
+    def restore(self, policy_cls) -> bool:
+        """Seed the policy's compiled artifacts from a matching entry."""
+        entry = self.entries.get(_label(policy_cls))
+
+        if entry is None or entry["hash"] != policy_hash(policy_cls):
+            return False
+
+        compiled = get_compiled_policy(policy_cls)
+        compiled.trees.update(entry["trees"])
+        compiled.code.update(
+            (source, marshal.loads(code)) for source, code in entry["code"].items()
+        )
+
+        read_only = _get_read_only_statements(policy_cls)
+
+        if read_only is not None and entry["read_only_fields"] is not None:
+            _read_only_fields_indexes[policy_cls] = (read_only, entry["read_only_fields"])
+
+        return True
+
+    def update(self, policy_cls):
+        """Record the policy's compiled artifacts if its entry is missing or stale."""
+        label = _label(policy_cls)
+        digest = policy_hash(policy_cls)
+        entry = self.entries.get(label)
+
+        if entry is not None and entry["hash"] == digest:
+            return
+
+        compiled = get_compiled_policy(policy_cls)
+        read_only = _get_read_only_statements(policy_cls)
+        cached_index = _read_only_fields_indexes.get(policy_cls)
+
+        self.entries[label] = {
+            "hash": digest,
+            "trees": dict(compiled.trees),
+            "code": {source: marshal.dumps(code) for source, code in compiled.code.items()},
+            "read_only_fields": (
+                cached_index[1]
+                if read_only is not None and cached_index and cached_index[0] is read_only
+                else None
+            ),
+        }
+        self.changed = True
+
+
+def policy_hash(policy_cls) -> str:
+    """Hash of everything a policy's compiled artifacts are derived from."""
+    state = {
+        "version": __version__,
+        "statements": policy_cls()._normalize_statements(policy_cls.statements),
+        "field_permissions": getattr(policy_cls, "field_permissions", None),
+        "id_prefix": policy_cls.id_prefix,
+        "group_prefix": policy_cls.group_prefix,
+        "principal_prefixes": sorted(getattr(policy_cls, "principal_resolvers", None) or {}),
+        "codegen": policy_cls.codegen,
+    }
+    encoded = json.dumps(state, sort_keys=True, default=repr).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _header() -> dict:
+    # Code objects are only valid for the interpreter that marshalled them
+    return {
+        "format": CACHE_FORMAT,
+        "version": __version__,
+        "magic": importlib.util.MAGIC_NUMBER.hex(),
+    }
+
+
+def _check_trusted(stat: os.stat_result) -> Optional[str]:
+    """Why the file could have been written by another user, if it could."""
+    if not hasattr(os, "geteuid"):
+        return None
+
+    if stat.st_uid != os.geteuid():
+        return "not owned by the current user"
+
+    if stat.st_mode & 0o022:
+        return "writable by other users"
+
+    return None
+
+
+def _encode_entry(entry: dict) -> dict:
+    read_only = entry["read_only_fields"]
+
+    return {
+        "hash": entry["hash"],
+        "trees": {expression: _encode_tree(tree) for expression, tree in entry["trees"].items()},
+        "code": {
+            source: base64.b64encode(code).decode("ascii")
+            for source, code in entry["code"].items()
+        },
+        "read_only_fields": read_only
+        and {
+            "fields_by_principal": {
+                principal: sorted(fields)
+                for principal, fields in read_only.fields_by_principal.items()
+            },
+            "all_fields_principals": sorted(read_only.all_fields_principals),
+            "has_group_principals": read_only.has_group_principals,
+        },
+    }
+
+
+def _decode_entry(entry: dict) -> dict:
+    read_only = entry["read_only_fields"]
+
+    return {
+        "hash": entry["hash"],
+        "trees": {expression: _decode_tree(tree) for expression, tree in entry["trees"].items()},
+        "code": {source: base64.b64decode(code) for source, code in entry["code"].items()},
+        "read_only_fields": read_only
+        and ReadOnlyFieldsIndex(
+            fields_by_principal={
+                principal: frozenset(fields)
+                for principal, fields in read_only["fields_by_principal"].items()
+            },
+            all_fields_principals=frozenset(read_only["all_fields_principals"]),
+            has_group_principals=bool(read_only["has_group_principals"]),
+        ),
+    }
+
+
+def _encode_tree(node) -> list:
+    if isinstance(node, ConditionOperand):
+        return ["operand", node.label]
+
+    if isinstance(node, BoolConstant):
+        return ["constant", node.value]
+
+    if isinstance(node, BoolNot):
+        return ["not", _encode_tree(node.arg)]
+
+    if isinstance(node, (BoolAnd, BoolOr)):
+        return ["and" if isinstance(node, BoolAnd) else "or", [_encode_tree(a) for a in node.args]]
+
+    raise TypeError(f"Cannot encode expression node {node!r}")
+
+
+def _decode_tree(encoded: list):
+    kind, value = encoded
+
+    if kind == "operand":
+        return ConditionOperand(str(value))
+
+    if kind == "constant":
+        return BoolConstant(bool(value))
+
+    if kind == "not":
+        return BoolNot(_decode_tree(value))
+
+    if kind in ("and", "or"):
+        return (BoolAnd if kind == "and" else BoolOr)([_decode_tree(a) for a in value])
+
+    raise ValueError(f"Unknown expression node {kind!r}")
+
+
+def _label(policy_cls: Type) -> str:
+    return f"{policy_cls.__module__}.{policy_cls.__qualname__}"
+
+
+def _get_read_only_statements(policy_cls):
+    field_permissions = getattr(policy_cls, "field_permissions", None)
+
+    if isinstance(field_permissions, dict) and field_permissions.get("read_only"):
+        return field_permissions["read_only"]
+
+    return None
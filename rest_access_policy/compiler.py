@@ -0,0 +1,629 @@
+import inspect
+import operator
+import threading
+import weakref
+from types import CodeType
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import conditions, metrics, slow_conditions, tracing
+from .arguments import parse_argument
+from .exceptions import AccessPolicyException
+from .parsing import BoolAnd, BoolConstant, BoolNot, BoolOr, ConditionOperand, parse_expression
+from .statement_index import StatementIndex
+from .view_actions import get_view_actions, slice_statements
+
+# A compiled condition or expression: called with (policy, request, view, action)
+CompiledCheck = Callable[..., bool]
+
+_MISSING = object()
+
+
+class _ViewStatements(list):
+    """
+    The statements sliced for one view class, with the statement index
+    and decision function compiled from them; kept per view class, so
+    that any number of views don't evict each other's.
+    """
+
+    __slots__ = ("statement_index", "decision_function")
+
+    def __init__(self, statements: list):
+        super().__init__(statements)
+        self.statement_index = None
+        self.decision_function = None
+
+# Methods of AccessPolicy that make up the interpreted evaluation of statements
+_STAGE_METHODS = (
+    "_normalize_statements",
+    "_get_statements_matching_principal",
+    "_get_statements_matching_action",
+    "_get_statements_matching_conditions",
+)
+
+# Methods of AccessPolicy that resolve conditions; a policy overriding one
+# has its conditions resolved through it at call time
+_CONDITION_HOOKS = ("_check_condition", "_get_condition_method")
+
+
+class CompiledPolicy(object):
+    """
+    Holds the compiled conditions and condition expressions of one
+    AccessPolicy subclass. Conditions are resolved to their callables once,
+    and each expression is compiled into a single generated function that
+    calls them directly.
+    """
+
+    # How many statement lists (by identity) to keep decision functions and
+    # statement indexes for, besides those of view classes' statements
+    max_decision_functions = 8
+    max_statement_indexes = 8
+
+    def __init__(self, policy_cls):
+        self.policy_cls = policy_cls
+        self.conditions: Dict[str, CompiledCheck] = {}
+        self.resolved_conditions: Dict[str, CompiledCheck] = {}
+        self.expressions: Dict[str, CompiledCheck] = {}
+        self.decision_functions: Dict[int, Tuple[list, CompiledCheck]] = {}
+        self.statement_indexes: Dict[int, Tuple[list, tuple, StatementIndex]] = {}
+        self.uses_statement_index = _uses_default_stages(policy_cls)
+        self.view_statements = weakref.WeakKeyDictionary()
+        self.object_hints: Dict[str, Tuple[list, tuple, ObjectHints]] = {}
+        # Code objects of generated sources and parse trees of expressions;
+        # both can be restored from the on-disk compiled cache
+        self.code: Dict[str, CodeType] = {}
+        self.trees: Dict[str, object] = {}
+        # Guards the eviction from the bounded caches
+        self.lock = threading.Lock()
+
+    def get_condition(self, condition: str) -> CompiledCheck:
+        compiled = self.conditions.get(condition)
+
+        if compiled is None:
+            compiled = compile_condition(self.policy_cls, condition)
+
+            if slow_conditions.detector is not None:
+                compiled = slow_conditions.detector.wrap(compiled, condition)
+
+            if metrics.enabled:
+                compiled = metrics.count_condition_calls(compiled)
+
+            if tracing.enabled:
+                compiled = tracing.trace_check(compiled, "condition", condition)
+
+            self.conditions[condition] = compiled
+
+        return compiled
+
+    def get_resolved_condition(self, condition: str) -> CompiledCheck:
+        """
+        The condition resolved as if _check_condition were not overridden,
+        for the default _check_condition when an override calls it.
+        """
+        compiled = self.resolved_conditions.get(condition)
+
+        if compiled is None:
+            compiled = resolve_condition(self.policy_cls, condition)
+            self.resolved_conditions[condition] = compiled
+
+        return compiled
+
+    def get_expression(self, expression: str) -> CompiledCheck:
+        compiled = self.expressions.get(expression)
+
+        if compiled is None:
+            compiled = compile_expression(self, expression)
+
+            if tracing.enabled:
+                compiled = tracing.trace_check(compiled, "condition_expression", expression)
+
+            self.expressions[expression] = compiled
+
+        return compiled
+
+    def parse(self, expression: str):
+        tree = self.trees.get(expression)
+
+        if tree is None:
+            tree = parse_expression(expression)
+            self.trees[expression] = tree
+
+        return tree
+
+    def compile_source(self, source: str, filename: str) -> CodeType:
+        code = self.code.get(source)
+
+        if code is None:
+            code = compile(source, filename, "exec")
+            self.code[source] = code
+
+        return code
+
+    def get_decision_function(self, policy, statements: list) -> CompiledCheck:
+        """
+        Return the generated decision function for a list of statements,
+        cached by the identity of the list; the list is kept referenced so
+        its identity cannot be reused, and must not be mutated afterwards.
+        The function of a view class's statements is kept with them.
+        """
+        if isinstance(statements, _ViewStatements):
+            if statements.decision_function is None:
+                if metrics.enabled:
+                    metrics.record_cache(self.policy_cls, "decision_function", False)
+
+                statements.decision_function = self._generate_decision_function(
+                    policy, statements
+                )
+            elif metrics.enabled:
+                metrics.record_cache(self.policy_cls, "decision_function", True)
+
+            return statements.decision_function
+
+        cached = self.decision_functions.get(id(statements))
+
+        if cached is not None and cached[0] is statements:
+            if metrics.enabled:
+                metrics.record_cache(self.policy_cls, "decision_function", True)
+
+            return cached[1]
+
+        if metrics.enabled:
+            metrics.record_cache(self.policy_cls, "decision_function", False)
+
+        function = self._generate_decision_function(policy, statements)
+
+        self._store(
+            self.decision_functions,
+            id(statements),
+            (statements, function),
+            self.max_decision_functions,
+        )
+        return function
+
+    def get_statement_index(self, policy, statements: list) -> StatementIndex:
+        """
+        Return the StatementIndex of a list of statements, cached by the
+        identity of the list and of its items; replacing, adding or
+        removing statements rebuilds it, editing one in place does not.
+        The index of a view class's statements is kept with them.
+        """
+        if isinstance(statements, _ViewStatements):
+            if statements.statement_index is None:
+                if metrics.enabled:
+                    metrics.record_cache(self.policy_cls, "statement_index", False)
+
+                statements.statement_index = StatementIndex(
+                    self.policy_cls, policy._normalize_statements(statements)
+                )
+            elif metrics.enabled:
+                metrics.record_cache(self.policy_cls, "statement_index", True)
+
+            return statements.statement_index
+
+        cached = self.statement_indexes.get(id(statements))
+
+        if (
+            cached is not None
+            and cached[0] is statements
+            and len(cached[1]) == len(statements)
+            and all(map(operator.is_, cached[1], statements))
+        ):
+            if metrics.enabled:
+                metrics.record_cache(self.policy_cls, "statement_index", True)
+
+            return cached[2]
+
+        if metrics.enabled:
+            metrics.record_cache(self.policy_cls, "statement_index", False)
+
+        items = tuple(statements)
+        index = StatementIndex(self.policy_cls, policy._normalize_statements(statements))
+
+        self._store(
+            self.statement_indexes,
+            id(statements),
+            (statements, items, index),
+            self.max_statement_indexes,
+        )
+        return index
+
+    def get_view_statements(self, policy, statements: list, view_cls, action: str) -> list:
+        """
+        Return the statements that can match the actions of the view class,
+        computed once per view class (and list of statements), or all of
+        them if the action is not one the view class was known to have.
+        """
+        cached = self.view_statements.get(view_cls)
+
+        if (
+            cached is None
+            or cached[0] is not statements
+            or len(cached[1]) != len(statements)
+            or not all(map(operator.is_, cached[1], statements))
+        ):
+            if metrics.enabled:
+                metrics.record_cache(self.policy_cls, "view_statements", False)
+
+            view_actions = get_view_actions(view_cls)
+            normalized = policy._normalize_statements(statements)
+            sliced = _ViewStatements(slice_statements(normalized, view_actions.actions))
+            cached = (statements, tuple(statements), view_actions.actions, sliced)
+            self.view_statements[view_cls] = cached
+        elif metrics.enabled:
+            metrics.record_cache(self.policy_cls, "view_statements", True)
+
+        return cached[3] if action in cached[2] else statements
+
+    def get_object_hints(self, policy, statements: list, action: str) -> "ObjectHints":
+        """
+        Return the select_related and prefetch_related lookups declared with
+        object_hints by the conditions of the statements that can match the
+        action, gathered once per action (and list of statements).
+        """
+        cached = self.object_hints.get(action)
+
+        if (
+            cached is None
+            or cached[0] is not statements
+            or len(cached[1]) != len(statements)
+            or not all(map(operator.is_, cached[1], statements))
+        ):
+            normalized = policy._normalize_statements(statements)
+            hints = _gather_object_hints(self, slice_statements(normalized, frozenset([action])))
+            cached = (statements, tuple(statements), hints)
+            self.object_hints[action] = cached
+
+        return cached[2]
+
+    def _generate_decision_function(self, policy, statements: list) -> CompiledCheck:
+        from .codegen import generate_decision_function
+
+        return generate_decision_function(self, policy._normalize_statements(statements))
+
+    def _store(self, cache: dict, key, value, max_size: int):
+        """Store in a bounded cache, evicting its oldest entries if full."""
+        with self.lock:
+            if key not in cache:
+                while len(cache) >= max_size:
+                    del cache[next(iter(cache))]
+
+            cache[key] = value
+
+
+def _uses_default_stages(policy_cls) -> bool:
+    """
+    Whether the policy leaves the stages of the interpreted evaluation as
+    they are; if it overrides any, statement indexes are not used.
+    """
+    return not any(overrides(policy_cls, name) for name in _STAGE_METHODS)
+
+
+def overrides(policy_cls, name: str) -> bool:
+    """Whether the policy class overrides a method of AccessPolicy."""
+    from .access_policy import AccessPolicy
+
+    owner = next(c for c in policy_cls.__mro__ if name in c.__dict__)
+    return owner is not AccessPolicy
+
+
+# select_related and prefetch_related lookups
+ObjectHints = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+def _gather_object_hints(compiled_policy: CompiledPolicy, statements: List[dict]) -> ObjectHints:
+    select_related: Dict[str, None] = {}
+    prefetch_related: Dict[str, None] = {}
+
+    for statement in statements:
+        labels = list(statement["condition"])
+
+        for expression in statement["condition_expression"]:
+            labels.extend(_iter_operand_labels(compiled_policy.parse(expression)))
+
+        for label in labels:
+            condition = _find_condition(compiled_policy.policy_cls, label.split(":", 1)[0])
+            hints = getattr(getattr(condition, "__func__", condition), "_object_hints", None)
+
+            if hints is not None:
+                select_related.update(dict.fromkeys(hints[0]))
+                prefetch_related.update(dict.fromkeys(hints[1]))
+
+    return tuple(select_related), tuple(prefetch_related)
+
+
+def _iter_operand_labels(node) -> Iterator[str]:
+    if isinstance(node, ConditionOperand):
+        yield node.label
+    elif isinstance(node, BoolNot):
+        yield from _iter_operand_labels(node.arg)
+    elif isinstance(node, (BoolAnd, BoolOr)):
+        for arg in node.args:
+            yield from _iter_operand_labels(arg)
+
+
+def get_compiled_policy(policy_cls) -> CompiledPolicy:
+    """
+    Return the CompiledPolicy of a policy class, creating it on first use.
+    It is stored on the class itself, so subclasses get their own.
+    """
+    compiled = policy_cls.__dict__.get("_compiled_policy")
+
+    if compiled is None:
+        compiled = CompiledPolicy(policy_cls)
+        policy_cls._compiled_policy = compiled
+
+    return compiled
+
+
+def clear_caches():
+    """
+    Discard all compiled policies and parsed expressions, e.g. after the
+    reusable conditions setting changes.
+    """
+    from .access_policy import AccessPolicy
+
+    pending = [AccessPolicy]
+
+    while pending:
+        policy_cls = pending.pop()
+        pending.extend(policy_cls.__subclasses__())
+
+        if "_compiled_policy" in policy_cls.__dict__:
+            delattr(policy_cls, "_compiled_policy")
+
+    parse_expression.cache_clear()
+
+
+@receiver(setting_changed)
+def _clear_caches_on_setting_changed(setting, **kwargs):
+    if setting == "DRF_ACCESS_POLICY":
+        clear_caches()
+
+
+def compile_condition(policy_cls, condition: str) -> CompiledCheck:
+    """
+    Compile a `<method_name>[:<arg_value>]` condition to a function of
+    (policy, request, view, action). If the policy overrides
+    _check_condition, the function calls it; see resolve_condition
+    otherwise.
+    """
+    if overrides(policy_cls, "_check_condition"):
+        return _make_hook_caller(condition)
+
+    return resolve_condition(policy_cls, condition)
+
+
+def resolve_condition(policy_cls, condition: str) -> CompiledCheck:
+    """
+    Resolve a condition to a function of (policy, request, view, action).
+    Plain methods of the policy class are called directly (or whatever has
+    replaced them on the class since, e.g. a mock); other attributes
+    (static/class methods, callables) are looked up on the policy instance
+    at call time; otherwise the condition is looked up in the reusable
+    conditions. Conditions of policies that override
+    _get_condition_method, and conditions found nowhere else of policies
+    that can give instances attributes of their own (in __init__ or
+    __getattr__), are looked up with _get_condition_method at call time.
+    Arguments of conditions known here are parsed here, once, according to
+    the condition's signature.
+    """
+    parts = condition.split(":", 1)
+    method_name = parts[0]
+    arg = parts[1] if len(parts) == 2 else None
+
+    if overrides(policy_cls, "_get_condition_method"):
+        return _make_lookup_caller(condition, method_name, arg)
+
+    attr = _find_policy_attribute(policy_cls, method_name)
+
+    if attr is _MISSING:
+        try:
+            function = policy_cls._get_reusable_condition(method_name)
+        except AccessPolicyException:
+            if not _has_instance_attributes(policy_cls):
+                raise
+
+            return _make_lookup_caller(condition, method_name, arg)
+
+        value = parse_argument(condition, function, 3, arg)
+        module = conditions.registry.get_module(method_name)
+
+        if module is not None and getattr(module, method_name, None) is function:
+            return _make_module_caller(condition, module, method_name, function, arg, value)
+
+        return _make_function_caller(condition, function, arg, value)
+
+    if inspect.isfunction(attr):
+        value = parse_argument(condition, attr, 4, arg)
+        return _make_method_caller(condition, policy_cls, method_name, attr, arg, value)
+
+    # Static methods take no self, class methods take cls
+    value = parse_argument(condition, attr, 3 if isinstance(attr, staticmethod) else 4, arg)
+    return _make_attribute_caller(condition, method_name, arg, value)
+
+
+def _find_policy_attribute(policy_cls, name: str):
+    for klass in policy_cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+
+    return _MISSING
+
+
+def _has_instance_attributes(policy_cls) -> bool:
+    """Whether the policy class defines where instances get attributes from."""
+    from .access_policy import AccessPolicy
+
+    return any(
+        name in klass.__dict__
+        for klass in policy_cls.__mro__
+        if klass not in AccessPolicy.__mro__
+        for name in ("__init__", "__getattr__", "__getattribute__")
+    )
+
+
+def _find_condition(policy_cls, method_name: str):
+    """
+    The policy's attribute of that name, or else the reusable condition, or
+    None if it is only known at call time.
+    """
+    attr = _find_policy_attribute(policy_cls, method_name)
+
+    if attr is not _MISSING:
+        return attr
+
+    try:
+        return policy_cls._get_reusable_condition(method_name)
+    except AccessPolicyException:
+        return None
+
+
+def _check_result(condition: str, result) -> bool:
+    if type(result) is not bool:
+        raise AccessPolicyException(
+            f"condition '{condition}' must return true/false, not {type(result)}"
+        )
+
+    return result
+
+
+# Each compiled condition has a memo_key: the function it calls and its raw
+# argument, plus the policy class for methods since they may read self, or
+# None if the function is only known at call time. Composed policies share
+# the result of conditions with equal keys within a request, so only
+# reusable functions are shared between policy classes. The callers pass
+# the parsed argument, value.
+
+
+def _make_method_caller(
+    condition: str, policy_cls, method_name: str, method, arg, value
+) -> CompiledCheck:
+    # The method is looked up again on every call, so that replacing it on
+    # the class afterwards, e.g. with mock.patch.object, takes effect
+    if arg is None:
+
+        def call(policy, request, view, action):
+            if getattr(type(policy), method_name, None) is method:
+                return _check_result(condition, method(policy, request, view, action))
+
+            replaced = getattr(policy, method_name)
+            return _check_result(condition, replaced(request, view, action))
+
+    else:
+
+        def call(policy, request, view, action):
+            if getattr(type(policy), method_name, None) is method:
+                return _check_result(condition, method(policy, request, view, action, value))
+
+            replaced = getattr(policy, method_name)
+            return _check_result(condition, replaced(request, view, action, value))
+
+    call.memo_key = (policy_cls, method, arg)
+    return call
+
+
+def _make_function_caller(condition: str, function, arg, value) -> CompiledCheck:
+    if arg is None:
+
+        def call(policy, request, view, action):
+            return _check_result(condition, function(request, view, action))
+
+    else:
+
+        def call(policy, request, view, action):
+            return _check_result(condition, function(request, view, action, value))
+
+    call.memo_key = (function, arg)
+    return call
+
+
+def _make_module_caller(
+    condition: str, module, function_name: str, function, arg, value
+) -> CompiledCheck:
+    # Got from the module on every call, so that patching it takes effect
+    if arg is None:
+
+        def call(policy, request, view, action):
+            return _check_result(condition, getattr(module, function_name)(request, view, action))
+
+    else:
+
+        def call(policy, request, view, action):
+            current = getattr(module, function_name)
+            return _check_result(condition, current(request, view, action, value))
+
+    call.memo_key = (function, arg)
+    return call
+
+
+def _make_attribute_caller(condition: str, method_name: str, arg, value) -> CompiledCheck:
+    args = () if arg is None else (value,)
+
+    def call(policy, request, view, action):
+        method = getattr(policy, method_name)
+        return _check_result(condition, method(request, view, action, *args))
+
+    call.memo_key = None
+    return call
+
+
+def _make_lookup_caller(condition: str, method_name: str, arg) -> CompiledCheck:
+    def call(policy, request, view, action):
+        method = policy._get_condition_method(method_name)
+
+        if arg is None:
+            return _check_result(condition, method(request, view, action))
+
+        # Bound methods' parameters include self
+        value = parse_argument(condition, method, 4 if inspect.ismethod(method) else 3, arg)
+        return _check_result(condition, method(request, view, action, value))
+
+    call.memo_key = None
+    return call
+
+
+def _make_hook_caller(condition: str) -> CompiledCheck:
+    def call(policy, request, view, action):
+        return policy._check_condition(condition, request, view, action)
+
+    call.memo_key = None
+    return call
+
+
+def compile_expression(compiled_policy: CompiledPolicy, expression: str) -> CompiledCheck:
+    """
+    Compile a condition_expression into one generated Python function that
+    calls the compiled conditions directly, using Python's own short-circuit
+    `and`/`or`. The generated source is kept on the function as __source__.
+    """
+    namespace = {}
+    labels = {}
+
+    def emit(node) -> str:
+        if isinstance(node, ConditionOperand):
+            if node.label not in labels:
+                labels[node.label] = f"_c{len(labels)}"
+                namespace[labels[node.label]] = compiled_policy.get_condition(node.label)
+            return f"{labels[node.label]}(policy, request, view, action)"
+
+        if isinstance(node, BoolConstant):
+            return repr(node.value)
+
+        if isinstance(node, BoolNot):
+            return f"(not {emit(node.arg)})"
+
+        if isinstance(node, (BoolAnd, BoolOr)):
+            separator = " and " if isinstance(node, BoolAnd) else " or "
+            return "(" + separator.join(emit(arg) for arg in node.args) + ")"
+
+        raise AccessPolicyException(f"Cannot compile expression node {node!r}")
+
+    body = emit(compiled_policy.parse(expression))
+    source = f"def _expression(policy, request, view, action):\n    return {body}\n"
+    exec(compiled_policy.compile_source(source, f"<condition_expression {expression!r}>"), namespace)
+
+    function = namespace["_expression"]
+    function.__source__ = source
+    return function
@@ -0,0 +1,154 @@
+import importlib
+import threading
+from types import ModuleType
+from typing import Callable, Dict, List, Optional
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .exceptions import AccessPolicyException
+
+
+class ConditionRegistry(object):
+    """
+    The reusable conditions, by name. Functions decorated with @condition
+    are registered when their module is imported; the modules listed in the
+    "reusable_conditions" setting are imported the first time a condition
+    is looked up, and their other public callables are registered too,
+    under their attribute names, the first listed module taking precedence.
+    Those are got from their module on each lookup, so that replacing them
+    there, e.g. with mock.patch, takes effect.
+    """
+
+    def __init__(self):
+        self.registered: Dict[str, Callable] = {}
+        # Name -> the module whose attribute it is
+        self.module_conditions: Dict[str, ModuleType] = {}
+        self.loaded = False
+        self.lock = threading.RLock()
+
+    def register(self, function: Callable, name: str):
+        with self.lock:
+            existing = self.registered.get(name)
+
+            if existing is not None and _qualified_name(existing) != _qualified_name(function):
+                raise AccessPolicyException(
+                    f"Condition '{name}' is registered by both {_qualified_name(existing)} "
+                    f"and {_qualified_name(function)}"
+                )
+
+            self.registered[name] = function
+
+    def get(self, name: str) -> Optional[Callable]:
+        if not self.loaded:
+            self.load()
+
+        function = self.registered.get(name)
+
+        if function is None:
+            module = self.module_conditions.get(name)
+
+            if module is not None:
+                function = getattr(module, name, None)
+
+        return function
+
+    def get_module(self, name: str) -> Optional[ModuleType]:
+        """The module of a condition that isn't registered with @condition."""
+        if not self.loaded:
+            self.load()
+
+        if name in self.registered:
+            return None
+
+        return self.module_conditions.get(name)
+
+    def load(self):
+        """Import the modules of the "reusable_conditions" setting."""
+        with self.lock:
+            if self.loaded:
+                return
+
+            module_conditions: Dict[str, ModuleType] = {}
+
+            for module_path in _get_module_paths():
+                module = importlib.import_module(module_path)
+
+                for attr_name, attr in vars(module).items():
+                    if (
+                        attr_name.startswith("_")
+                        or not callable(attr)
+                        or hasattr(attr, "_condition_name")
+                    ):
+                        continue
+
+                    module_conditions.setdefault(attr_name, module)
+
+            self.module_conditions = module_conditions
+            self.loaded = True
+
+    def reset(self):
+        """Forget the modules' conditions, to import them again on next use."""
+        with self.lock:
+            self.module_conditions = {}
+            self.loaded = False
+
+
+registry = ConditionRegistry()
+
+
+def condition(
+    function: Optional[Callable] = None, *, name: Optional[str] = None, namespace: str = ""
+):
+    """
+    Register a function as a reusable condition, under its name or the one
+    given, prefixed with "<namespace>." if one is given:
+
+        @condition(namespace="tenant")
+        def is_member(request, view, action) -> bool:
+            ...
+
+    makes "tenant.is_member" usable in the statements of every policy.
+    Registering two functions under one name raises AccessPolicyException.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        full_name = name or function.__name__
+
+        if namespace:
+            full_name = f"{namespace}.{full_name}"
+
+        registry.register(function, full_name)
+        function._condition_name = full_name
+        return function
+
+    if function is not None:
+        return decorator(function)
+
+    return decorator
+
+
+def _get_module_paths() -> List[str]:
+    from django.conf import settings
+
+    module_paths = getattr(settings, "DRF_ACCESS_POLICY", {}).get("reusable_conditions")
+
+    if not module_paths:
+        return []
+
+    if not isinstance(module_paths, (str, list, tuple)):
+        raise ValueError("Define 'resusable_conditions' as list, tuple or str")
+
+    return [module_paths] if isinstance(module_paths, str) else list(module_paths)
+
+
+def _qualified_name(function: Callable) -> str:
+    module = getattr(function, "__module__", None)
+    name = getattr(function, "__qualname__", None) or repr(function)
+    return f"{module}.{name}" if module else name
+
+
+@receiver(setting_changed)
+def _reset_on_setting_changed(setting, **kwargs):
+    if setting == "DRF_ACCESS_POLICY":
+        registry.reset()
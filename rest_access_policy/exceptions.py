@@ -1,2 +1,15 @@
 class AccessPolicyException(Exception):
     pass
+
+
+class ConditionExpressionSyntaxError(AccessPolicyException):
+    def __init__(self, message: str, expression: str, position: int):
+        self.message = message
+        self.expression = expression
+        self.position = position
+
+        super().__init__(
+            f"Invalid condition_expression at position {position}: {message}\n"
+            f"    {expression}\n"
+            f"    {' ' * position}^"
+        )
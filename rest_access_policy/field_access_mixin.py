@@ -1,8 +1,28 @@
-from typing import List
+import weakref
+from typing import Dict, FrozenSet, List, NamedTuple
 
 from rest_framework.request import Request
 
+from . import tracing
 from .access_policy import AccessPolicy
+from .principals import get_principal_resolvers
+
+
+class ReadOnlyFieldsIndex(NamedTuple):
+    """
+    The "read_only" statements of a policy's field_permissions, compiled into
+    a lookup from principal value to the names of the fields it makes
+    read-only. Principals listed in all_fields_principals make every field
+    read-only ("*" in the statement's fields).
+    """
+
+    fields_by_principal: Dict[str, FrozenSet[str]]
+    all_fields_principals: FrozenSet[str]
+    has_group_principals: bool
+
+
+# Maps each policy class to its compiled index and the statements it was built from
+_read_only_fields_indexes = weakref.WeakKeyDictionary()
 
 
 class FieldAccessMixin(object):
@@ -42,9 +62,19 @@ class FieldAccessMixin(object):
         if self.read_only is True:
             return
 
-        fields = self.access_policy.scope_fields(
-            self.request, self.fields, instance=self.instance
-        )
+        if tracing.enabled:
+            with tracing.start_span(
+                "access_policy.scope_fields",
+                policy=self.access_policy.__name__,
+                serializer=type(self).__name__,
+            ):
+                fields = self.access_policy.scope_fields(
+                    self.request, self.fields, instance=self.instance
+                )
+        else:
+            fields = self.access_policy.scope_fields(
+                self.request, self.fields, instance=self.instance
+            )
 
         if fields is None:
             raise Exception("scope_fields method must return fields variable")
@@ -80,44 +110,95 @@ class FieldAccessMixin(object):
         return field_permissions
 
     def _set_read_only_fields(self):
-        read_only_statements = self._validate_and_clean_statements(
-            self.field_permissions["read_only"]
+        index = self._get_read_only_fields_index()
+
+        principals = self.access_policy._get_principals(
+            self.request, include_groups=index.has_group_principals
         )
 
-        statements_matching_principal = (
-            self.access_policy._get_statements_matching_principal(
-                request=self.request, statements=read_only_statements
-            )
+        if not index.all_fields_principals.isdisjoint(principals):
+            for field in self.fields.values():
+                field.read_only = True
+            return
+
+        read_only_fields = frozenset().union(
+            *[index.fields_by_principal.get(p, ()) for p in principals]
+        )
+
+        for field in read_only_fields:
+            if self.fields.get(field, None) is not None:
+                self.fields[field].read_only = True
+
+    def _get_read_only_fields_index(self) -> ReadOnlyFieldsIndex:
+        return get_read_only_fields_index(
+            self.access_policy, self.field_permissions["read_only"]
         )
 
-        for statement in statements_matching_principal:
+    def _validate_and_clean_statements(self, statements: List[dict]) -> List[dict]:
+        return _validate_and_clean_statements(statements)
+
+
+def get_read_only_fields_index(access_policy, statements: List[dict]) -> ReadOnlyFieldsIndex:
+    """
+    Compile the policy's "read_only" statements once per policy class;
+    the index is rebuilt only if the statements are reassigned.
+    """
+    cached = _read_only_fields_indexes.get(access_policy)
+
+    if cached is not None and cached[0] is statements:
+        return cached[1]
+
+    index = _compile_read_only_statements(
+        access_policy, _validate_and_clean_statements(statements)
+    )
+    _read_only_fields_indexes[access_policy] = (statements, index)
+    return index
+
+
+def _compile_read_only_statements(access_policy, statements: List[dict]) -> ReadOnlyFieldsIndex:
+    fields_by_principal = {}
+    all_fields_principals = set()
+
+    for statement in statements:
+        for principal in statement["principal"]:
             if "*" in statement["fields"]:
-                for field in self.fields.values():
-                    field.read_only = True
-                break
+                all_fields_principals.add(principal)
             else:
-                for field in statement["fields"]:
-                    if self.fields.get(field, None) is not None:
-                        self.fields[field].read_only = True
+                fields_by_principal.setdefault(principal, set()).update(statement["fields"])
 
-    def _validate_and_clean_statements(self, statements: List[dict]) -> List[dict]:
-        for statement in statements:
-            if not isinstance(statement, dict):
-                raise Exception("Must pass a dict as statement")
+    # Principals whose values are fetched: groups and resolved principals
+    fetched_prefixes = (access_policy.group_prefix, *get_principal_resolvers(access_policy))
+
+    return ReadOnlyFieldsIndex(
+        fields_by_principal={
+            principal: frozenset(fields) for principal, fields in fields_by_principal.items()
+        },
+        all_fields_principals=frozenset(all_fields_principals),
+        has_group_principals=any(
+            principal.startswith(fetched_prefixes)
+            for principal in list(fields_by_principal) + list(all_fields_principals)
+        ),
+    )
+
+
+def _validate_and_clean_statements(statements: List[dict]) -> List[dict]:
+    for statement in statements:
+        if not isinstance(statement, dict):
+            raise Exception("Must pass a dict as statement")
 
-            if len(statement) == 0:
-                raise Exception("Cannot pass empty dict as statement")
+        if len(statement) == 0:
+            raise Exception("Cannot pass empty dict as statement")
 
-            if statement.get("principal", None) is None:
-                raise Exception("Must pass principal in statement")
+        if statement.get("principal", None) is None:
+            raise Exception("Must pass principal in statement")
 
-            if statement.get("fields", None) is None:
-                raise Exception("Must pass fields in statement")
+        if statement.get("fields", None) is None:
+            raise Exception("Must pass fields in statement")
 
-            if isinstance(statement["principal"], str):
-                statement["principal"] = [statement["principal"]]
+        if isinstance(statement["principal"], str):
+            statement["principal"] = [statement["principal"]]
 
-            if isinstance(statement["fields"], str):
-                statement["fields"] = [statement["fields"]]
+        if isinstance(statement["fields"], str):
+            statement["fields"] = [statement["fields"]]
 
-        return statements
+    return statements
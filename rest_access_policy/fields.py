@@ -1,13 +1,86 @@
 import inspect
-from typing import Type
+from collections import OrderedDict
+from typing import Optional, Type
+
+from django.core.exceptions import EmptyResultSet
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from . import tracing
 from .access_policy import AccessPolicy
 
 
-class PermittedPkRelatedField(serializers.PrimaryKeyRelatedField):
-    def __init__(self, access_policy: Type[AccessPolicy], **kwargs):
+class PermittedManyPkRelatedField(serializers.ManyRelatedField):
+    """
+    Used in place of DRF's ManyRelatedField when a PermittedPkRelatedField
+    is declared with many=True: all submitted primary keys are validated
+    against the scoped queryset with a single query. If the child field
+    overrides to_internal_value, e.g. to coerce or look up primary keys its
+    own way, each item is validated by it instead, as DRF does.
+    """
+
+    default_error_messages = {
+        "does_not_exist": _('Invalid pks "{pk_values}" - objects do not exist.'),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, "__iter__"):
+            self.fail("not_a_list", input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail("empty")
+
+        child = self.child_relation
+
+        if type(child).to_internal_value is not PermittedPkRelatedField.to_internal_value:
+            return super().to_internal_value(data)
+
+        queryset = child.get_queryset()
+        model_pk = queryset.model._meta.pk
+        pks = []
+
+        for item in data:
+            if child.pk_field is not None:
+                item = child.pk_field.to_internal_value(item)
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(model_pk.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail("incorrect_type", data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(pks) if pks else {}
+        missing = [str(pk) for pk in dict.fromkeys(pks) if pk not in objects]
+
+        if missing:
+            self.fail("does_not_exist", pk_values=", ".join(missing))
+
+        return [objects[pk] for pk in pks]
+
+
+class PermittedRelatedFieldMixin(object):
+    """
+    Scopes a related field's queryset with the access policy's
+    scope_queryset. The scoped queryset is memoized on the request, keyed by
+    policy, model and base query, so the many fields (and list items) of one
+    payload resolve scoping once.
+    """
+
+    choices_page_size = 50
+
+    def __init__(
+        self,
+        access_policy: Type[AccessPolicy],
+        lazy_choices: bool = False,
+        choices_cutoff: Optional[int] = None,
+        choices_display_field: Optional[str] = None,
+        **kwargs,
+    ):
         self.access_policy = access_policy
+        self.lazy_choices = lazy_choices
+        self.choices_cutoff = choices_cutoff
+        self.choices_display_field = choices_display_field
 
         assert inspect.isclass(access_policy) and issubclass(
             access_policy, AccessPolicy
@@ -20,32 +93,149 @@ class PermittedPkRelatedField(serializers.PrimaryKeyRelatedField):
 
         if not request:
             raise Exception(
-                "When using PermittedPkRelatedField, "
+                f"When using {self.__class__.__name__}, "
                 "the request must be passed in the serializer's context."
             )
 
-        queryset = self.access_policy.scope_queryset(request, super().get_queryset())
-        return queryset
+        queryset = super().get_queryset()
+        cache_key = self._get_scope_cache_key(queryset)
 
+        if cache_key is None:
+            return self._scope_queryset(request, queryset)
 
-class PermittedSlugRelatedField(serializers.SlugRelatedField):
-    def __init__(self, access_policy: Type[AccessPolicy], **kwargs):
-        self.access_policy = access_policy
+        scoped_querysets = getattr(request, "_access_policy_scoped_querysets", None)
 
-        assert inspect.isclass(access_policy) and issubclass(
-            access_policy, AccessPolicy
-        ), "access_policy must be a subclass of AccessPolicy"
+        if scoped_querysets is None:
+            scoped_querysets = {}
+            request._access_policy_scoped_querysets = scoped_querysets
 
-        super().__init__(**kwargs)
+        if cache_key not in scoped_querysets:
+            scoped_querysets[cache_key] = self._scope_queryset(request, queryset)
 
-    def get_queryset(self):
-        request = self.context.get("request")
+        return scoped_querysets[cache_key].all()
 
-        if not request:
-            raise Exception(
-                "When using PermittedSlugRelatedField, "
-                "the request must be passed in the serializer's context."
+    def _scope_queryset(self, request, queryset):
+        if not tracing.enabled:
+            return self.access_policy.scope_queryset(request, queryset)
+
+        with tracing.start_span(
+            "access_policy.scope_queryset",
+            policy=self.access_policy.__name__,
+            field=getattr(self, "field_name", None) or type(self).__name__,
+        ):
+            return self.access_policy.scope_queryset(request, queryset)
+
+    def _get_scope_cache_key(self, queryset):
+        """
+        The base query's SQL is part of the key so that fields declared with
+        differently filtered querysets never share a cache entry. It is
+        computed once per field instance when the field has a queryset.
+        """
+        if queryset is None or not hasattr(queryset, "query"):
+            return None
+
+        cached = getattr(self, "_scope_cache_key", None)
+
+        if cached is not None and self.queryset is not None and cached[0] is self.queryset:
+            return cached[1]
+
+        try:
+            cache_key = (self.access_policy, queryset.model, str(queryset.query))
+        except EmptyResultSet:
+            cache_key = None
+
+        self._scope_cache_key = (self.queryset, cache_key)
+        return cache_key
+
+    def get_choices(self, cutoff=None):
+        """
+        In lazy mode, choices (as rendered by the browsable API or metadata)
+        are capped at choices_cutoff and streamed with .iterator(), projecting
+        only the value and display columns if choices_display_field is set.
+        """
+        if not self.lazy_choices:
+            return super().get_choices(cutoff)
+
+        queryset = self.get_queryset()
+
+        if queryset is None:
+            return {}
+
+        if self.choices_cutoff is not None:
+            cutoff = (
+                self.choices_cutoff if cutoff is None else min(cutoff, self.choices_cutoff)
             )
 
-        queryset = self.access_policy.scope_queryset(request, super().get_queryset())
-        return queryset
+        if cutoff is not None:
+            queryset = queryset[:cutoff]
+
+        return OrderedDict(self._iter_choices(queryset))
+
+    def get_choices_page(self, page: int = 1, page_size: Optional[int] = None) -> dict:
+        """
+        Return one page of choices from the scoped queryset, for serving
+        choices through a paginated lookup endpoint instead of inline.
+        """
+        page_size = page_size or self.choices_page_size
+        queryset = self.get_queryset()
+
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+
+        offset = (max(page, 1) - 1) * page_size
+        choices = list(self._iter_choices(queryset[offset : offset + page_size + 1]))
+
+        return {
+            "page": max(page, 1),
+            "has_next": len(choices) > page_size,
+            "results": [
+                {"value": value, "display_name": display_name}
+                for value, display_name in choices[:page_size]
+            ],
+        }
+
+    def _iter_choices(self, queryset):
+        if self.choices_display_field is None:
+            for item in queryset.iterator():
+                yield self.to_representation(item), self.display_value(item)
+            return
+
+        values = queryset.values_list(
+            self._get_choice_value_field(), self.choices_display_field
+        )
+
+        for value, display_name in values.iterator():
+            yield self._get_choice_value(value), str(display_name)
+
+    def _get_choice_value_field(self) -> str:
+        raise NotImplementedError()
+
+    def _get_choice_value(self, value):
+        return value
+
+
+class PermittedPkRelatedField(
+    PermittedRelatedFieldMixin, serializers.PrimaryKeyRelatedField
+):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return PermittedManyPkRelatedField(**list_kwargs)
+
+    def _get_choice_value_field(self) -> str:
+        return "pk"
+
+    def _get_choice_value(self, value):
+        if self.pk_field is not None:
+            return self.pk_field.to_representation(value)
+        return value
+
+
+class PermittedSlugRelatedField(PermittedRelatedFieldMixin, serializers.SlugRelatedField):
+    def _get_choice_value_field(self) -> str:
+        return self.slug_field
@@ -0,0 +1,274 @@
+import threading
+import weakref
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+# Checked before recording anything, so that collection costs an attribute
+# lookup when it is off. Set it with enable() and disable(), or the
+# "metrics" setting.
+enabled = False
+
+# Upper bounds, in seconds, of the buckets of the decision latency histogram
+BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+# name: (type, help, label names)
+METRICS = {
+    "decisions": ("counter", "Requests decided by an access policy.", ("policy", "action")),
+    "allows": ("counter", "Requests allowed by an access policy.", ("policy", "action")),
+    "denies": ("counter", "Requests denied by an access policy.", ("policy", "action")),
+    "condition_calls": (
+        "counter",
+        "Calls of condition methods and functions.",
+        ("policy", "action"),
+    ),
+    "group_queries": ("counter", "Calls of get_user_group_values.", ("policy",)),
+    "cache_hits": ("counter", "Lookups that found a compiled artifact.", ("policy", "cache")),
+    "cache_misses": ("counter", "Lookups that had to compile one.", ("policy", "cache")),
+    "decision_seconds": (
+        "histogram",
+        "Time to decide a request in has_permission.",
+        ("policy", "action"),
+    ),
+}
+
+PREFIX = "drf_access_policy_"
+
+
+class _Shard(object):
+    """The metrics recorded by one thread; only that thread writes to it."""
+
+    __slots__ = ("counters", "histograms", "__weakref__")
+
+    def __init__(self):
+        self.counters: Dict[Tuple[str, tuple], int] = {}
+        # (policy, action): counts per bucket, the last one being +Inf, then the sum
+        self.histograms: Dict[tuple, list] = {}
+
+
+_local = threading.local()
+# The shards of live threads; a thread's shard is only referenced by its
+# thread-local storage, so it goes away with the thread
+_shards = weakref.WeakSet()
+_shards_lock = threading.Lock()
+# The metrics of finished threads: their shards' counters and histograms
+# are queued when the threads end and merged into one shard on next read
+_finished: List[Tuple[dict, dict]] = []
+_retired = _Shard()
+
+
+def _get_shard() -> _Shard:
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = _local.shard = _Shard()
+        # Appending to a list needs no lock, wherever the finalizer runs
+        weakref.finalize(shard, _finished.append, (shard.counters, shard.histograms))
+
+        with _shards_lock:
+            _shards.add(shard)
+
+        return shard
+
+
+def _merge(target: _Shard, counters: dict, histograms: dict):
+    for key, value in list(counters.items()):
+        target.counters[key] = target.counters.get(key, 0) + value
+
+    for labels, histogram in list(histograms.items()):
+        merged = target.histograms.setdefault(labels, [0] * (len(BUCKETS) + 2))
+
+        for i, value in enumerate(list(histogram)):
+            merged[i] += value
+
+
+def _retire_finished():
+    """Merge the queued metrics of finished threads; call with _shards_lock held."""
+    while _finished:
+        _merge(_retired, *_finished.pop())
+
+
+def enable():
+    """Start collecting; conditions compiled before are recompiled to be counted."""
+    global enabled
+
+    if not enabled:
+        from .compiler import clear_caches
+
+        enabled = True
+        clear_caches()
+
+
+def disable():
+    global enabled
+
+    if enabled:
+        from .compiler import clear_caches
+
+        enabled = False
+        clear_caches()
+
+
+def reset():
+    """Discard everything collected so far."""
+    with _shards_lock:
+        del _finished[:]
+
+        for shard in [_retired, *_shards]:
+            shard.counters.clear()
+            shard.histograms.clear()
+
+
+def increment(name: str, labels: tuple, value: int = 1):
+    counters = _get_shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def record_decision(policy_cls, action: str, allowed: bool, seconds: float):
+    labels = (policy_cls.__name__, action)
+    shard = _get_shard()
+    counters = shard.counters
+
+    for name in ("decisions", "allows" if allowed else "denies"):
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + 1
+
+    histogram = shard.histograms.get(labels)
+
+    if histogram is None:
+        histogram = shard.histograms[labels] = [0] * (len(BUCKETS) + 2)
+
+    histogram[bisect_left(BUCKETS, seconds)] += 1
+    histogram[-1] += seconds
+
+
+def record_group_query(policy_cls):
+    increment("group_queries", (policy_cls.__name__,))
+
+
+def record_cache(policy_cls, cache: str, hit: bool):
+    increment("cache_hits" if hit else "cache_misses", (policy_cls.__name__, cache))
+
+
+def count_condition_calls(check):
+    """Wrap a compiled condition so that its calls are counted."""
+
+    def call(policy, request, view, action):
+        increment("condition_calls", (type(policy).__name__, action))
+        return check(policy, request, view, action)
+
+    call.memo_key = check.memo_key
+    return call
+
+
+def snapshot() -> dict:
+    """
+    The metrics of all threads merged: {"counters": {(name, labels): value},
+    "histograms": {(policy, action): (cumulative bucket counts, sum, count)}}.
+    """
+    merged = _Shard()
+
+    with _shards_lock:
+        _retire_finished()
+        _merge(merged, _retired.counters, _retired.histograms)
+        shards = list(_shards)
+
+    for shard in shards:
+        _merge(merged, shard.counters, shard.histograms)
+
+    cumulative = {}
+
+    for labels, histogram in merged.histograms.items():
+        counts = []
+        total = 0
+
+        for count in histogram[:-1]:
+            total += count
+            counts.append(total)
+
+        cumulative[labels] = (counts, histogram[-1], total)
+
+    return {"counters": merged.counters, "histograms": cumulative}
+
+
+def render_prometheus() -> str:
+    """The merged metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+
+    for name, (kind, help_text, label_names) in METRICS.items():
+        metric = PREFIX + name + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+
+        if kind == "counter":
+            for (counter, labels), value in sorted(data["counters"].items()):
+                if counter == name:
+                    lines.append(f"{metric}{{{_format_labels(label_names, labels)}}} {value}")
+
+            continue
+
+        for labels, (counts, total_seconds, count) in sorted(data["histograms"].items()):
+            label_text = _format_labels(label_names, labels)
+            bounds = [repr(bound) for bound in BUCKETS] + ["+Inf"]
+
+            for bound, bucket_count in zip(bounds, counts):
+                lines.append(f'{metric}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+
+            lines.append(f"{metric}_sum{{{label_text}}} {total_seconds!r}")
+            lines.append(f"{metric}_count{{{label_text}}} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    A Django view serving render_prometheus(). It is not routed by default,
+    and isn't protected by anything: add it to your URLconf behind whatever
+    restricts access to your other internal endpoints.
+    """
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def configure(settings):
+    """Apply the "metrics" setting of DRF_ACCESS_POLICY."""
+    if getattr(settings, "DRF_ACCESS_POLICY", {}).get("metrics", False):
+        enable()
+    else:
+        disable()
+
+
+@receiver(setting_changed)
+def _configure_on_setting_changed(setting, **kwargs):
+    if setting == "DRF_ACCESS_POLICY":
+        from django.conf import settings
+
+        configure(settings)
@@ -1,69 +1,244 @@
-from pyparsing import Keyword, Word, alphanums
+import re
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Sequence
 
+from .exceptions import ConditionExpressionSyntaxError
 
-class ConditionOperand(object):
 
-    def __init__(self, t, check_cond_fn):
-        self.label = t[0]
-        self.check_condition_fn = check_cond_fn
+class ConditionOperand(object):
+    __slots__ = ("label",)
 
-        assert self.check_condition_fn is not None, 'The check_condition_fn should should be set'
-        assert callable(self.check_condition_fn), 'The check_condition_fn should should be callable'
+    def __init__(self, label: str):
+        self.label = label
 
-    def __bool__(self):
-        return self.check_condition_fn(self.label)
+    def evaluate(self, check_condition_fn: Callable[[str], bool]) -> bool:
+        return check_condition_fn(self.label)
 
     def __str__(self):
         return self.label
 
     __repr__ = __str__
-    __nonzero__ = __bool__
+
+
+class BoolConstant(object):
+    __slots__ = ("value",)
+
+    def __init__(self, value: bool):
+        self.value = value
+
+    def evaluate(self, check_condition_fn: Callable[[str], bool]) -> bool:
+        return self.value
+
+    def __str__(self):
+        return str(self.value)
+
+    __repr__ = __str__
 
 
 class BoolBinOp(object):
-    def __init__(self, t):
-        self.args = t[0][0::2]
+    __slots__ = ("args",)
+
+    def __init__(self, args: Sequence):
+        self.args = tuple(args)
 
     def __str__(self):
         sep = " %s " % self.reprsymbol
         return "(" + sep.join(map(str, self.args)) + ")"
 
-    def __bool__(self):
-        return self.evalop(bool(a) for a in self.args)
+    def evaluate(self, check_condition_fn: Callable[[str], bool]) -> bool:
+        return self.evalop(a.evaluate(check_condition_fn) for a in self.args)
 
-    __nonzero__ = __bool__
     __repr__ = __str__
 
 
 class BoolAnd(BoolBinOp):
-    reprsymbol = '&'
+    __slots__ = ()
+    reprsymbol = "&"
     evalop = all
 
 
 class BoolOr(BoolBinOp):
-    reprsymbol = '|'
+    __slots__ = ()
+    reprsymbol = "|"
     evalop = any
 
 
 class BoolNot(object):
-    def __init__(self, t):
-        self.arg = t[0][1]
+    __slots__ = ("arg",)
 
-    def __bool__(self):
-        v = bool(self.arg)
-        return not v
+    def __init__(self, arg):
+        self.arg = arg
+
+    def evaluate(self, check_condition_fn: Callable[[str], bool]) -> bool:
+        return not self.arg.evaluate(check_condition_fn)
 
     def __str__(self):
         return "~" + str(self.arg)
 
     __repr__ = __str__
-    __nonzero__ = __bool__
 
 
-TRUE = Keyword("True")
-FALSE = Keyword("False")
+class Token(NamedTuple):
+    kind: str  # "word", "op", "lparen", "rparen", "true", "false", "end"
+    value: str
+    position: int
+
+
+MAX_WORD_LENGTH = 256
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<lparen>\()|(?P<rparen>\))|(?P<word>[A-Za-z0-9_:.*]+)|(?P<invalid>\S))"
+)
+
+_KEYWORDS = {
+    "and": "op",
+    "or": "op",
+    "not": "op",
+    "True": "true",
+    "False": "false",
+}
+
+# Binding powers: "not" binds tighter than "and", which binds tighter than "or"
+_INFIX_BINDING_POWERS = {"or": 1, "and": 2}
+_INFIX_NODES = {"or": BoolOr, "and": BoolAnd}
+_PREFIX_BINDING_POWER = 3
+
+
+def tokenize(expression: str) -> List[Token]:
+    tokens = []
+
+    for match in _TOKEN_RE.finditer(expression):
+        kind = match.lastgroup
+        value = match.group(kind)
+        position = match.start(kind)
+
+        if kind == "invalid":
+            raise ConditionExpressionSyntaxError(
+                f"unexpected character '{value}'", expression, position
+            )
+
+        if kind == "word":
+            if len(value) > MAX_WORD_LENGTH:
+                raise ConditionExpressionSyntaxError(
+                    f"condition longer than {MAX_WORD_LENGTH} characters",
+                    expression,
+                    position,
+                )
+            kind = _KEYWORDS.get(value, "word")
+
+        tokens.append(Token(kind, value, position))
+
+    tokens.append(Token("end", "", len(expression.rstrip())))
+    return tokens
+
+
+class _Parser(object):
+    """
+    Pratt (top-down operator precedence) parser for the condition_expression
+    grammar: conditions (optionally with ":<arg>"), True/False, "not", "and",
+    "or" and parentheses. Chains of the same operator are flattened into a
+    single BoolAnd/BoolOr node.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.index = 0
+
+    def parse(self):
+        node = self._parse(0)
+        token = self.tokens[self.index]
+
+        if token.kind != "end":
+            self._fail(f"unexpected '{token.value}'", token)
+
+        return node
+
+    def _advance(self) -> Token:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def _peek_infix(self) -> str:
+        token = self.tokens[self.index]
+
+        if token.kind == "op" and token.value in _INFIX_BINDING_POWERS:
+            return token.value
+
+        return ""
+
+    def _parse(self, min_binding_power: int):
+        left = self._nud(self._advance())
+
+        while True:
+            operator = self._peek_infix()
+
+            if not operator:
+                return left
+
+            binding_power = _INFIX_BINDING_POWERS[operator]
+
+            if binding_power <= min_binding_power:
+                return left
+
+            operands = [left]
+
+            while self._peek_infix() == operator:
+                self._advance()
+                operands.append(self._parse(binding_power))
+
+            left = _INFIX_NODES[operator](operands)
+
+    def _nud(self, token: Token):
+        if token.kind == "word":
+            return ConditionOperand(token.value)
+
+        if token.kind in ("true", "false"):
+            return BoolConstant(token.kind == "true")
+
+        if token.kind == "op" and token.value == "not":
+            return BoolNot(self._parse(_PREFIX_BINDING_POWER))
+
+        if token.kind == "lparen":
+            node = self._parse(0)
+            closing = self._advance()
+
+            if closing.kind != "rparen":
+                self._fail("expected ')'", closing)
+
+            return node
+
+        if token.kind == "end":
+            self._fail("expected a condition but reached the end", token)
+
+        self._fail(f"expected a condition but found '{token.value}'", token)
+
+    def _fail(self, message: str, token: Token):
+        raise ConditionExpressionSyntaxError(message, self.expression, token.position)
+
+
+@lru_cache(maxsize=1024)
+def parse_expression(expression: str):
+    """
+    Parse a condition_expression into a tree of BoolAnd/BoolOr/BoolNot/
+    BoolConstant/ConditionOperand nodes. Trees do not depend on the request,
+    so they are cached by expression.
+    """
+    return _Parser(expression).parse()
 
 
 class BoolOperand(object):
+    """
+    The operand element of the pyparsing grammar used before the built-in
+    parser. Kept for backwards compatibility; requires pyparsing.
+    """
+
     def __new__(cls):
-        return TRUE | FALSE | Word(alphanums + '_:.*', max=256)
+        try:
+            from pyparsing import Keyword, Word, alphanums
+        except ImportError:
+            raise ImportError(
+                "BoolOperand requires pyparsing: pip install drf-access-policy[pyparsing]"
+            )
+
+        return Keyword("True") | Keyword("False") | Word(alphanums + "_:.*", max=256)
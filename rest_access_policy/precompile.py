@@ -0,0 +1,273 @@
+import gc
+import inspect
+import logging
+import time
+from typing import Dict, Iterable, List, NamedTuple, Set, Type
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.urls import URLResolver, get_resolver
+
+from .access_policy import AccessPolicy, ComposedAccessPolicy
+from .compiled_cache import CompiledCache
+from .compiler import _find_condition, _iter_operand_labels, get_compiled_policy, overrides
+from .exceptions import AccessPolicyException
+from .field_access_mixin import get_read_only_fields_index
+from .view_actions import get_view_actions
+
+logger = logging.getLogger("rest_access_policy")
+
+
+class PrecompileResult(NamedTuple):
+    policies: List[Type[AccessPolicy]]
+    errors: List[str]
+    duration: float  # seconds
+
+
+def warmup(
+    urlconf=None, policies: Iterable[Type[AccessPolicy]] = (), freeze: bool = True
+) -> PrecompileResult:
+    """
+    Compile every policy in the current process - the master process of a
+    preforking server, before it forks its workers - so that the workers
+    share the compiled policies copy-on-write rather than each compiling
+    its own copy on first use. Policies not reachable from the URLconf can
+    be passed explicitly.
+
+    With freeze, all objects tracked by the garbage collector are moved to
+    its permanent generation (gc.freeze), so collections in the workers
+    don't write to, and thereby copy, the pages they live on. gc.freeze
+    requires Python 3.7; on earlier versions freeze has no effect.
+
+    The policies are then not precompiled again on the first request.
+    """
+    request_started.disconnect(precompile_on_first_request)
+    result = precompile_policies(urlconf, policies)
+
+    if freeze and hasattr(gc, "freeze"):
+        gc.collect()
+        gc.freeze()
+
+    return result
+
+
+def precompile_on_first_request(**kwargs):
+    """
+    Precompile the policies when the first request starts; connected to
+    request_started by AppConfig.ready(), which runs too early to import
+    the URLconf.
+    """
+    request_started.disconnect(precompile_on_first_request)
+    precompile_policies()
+
+
+def precompile_policies(
+    urlconf=None, policies: Iterable[Type[AccessPolicy]] = ()
+) -> PrecompileResult:
+    """
+    Compile the statements, condition expressions, conditions and field
+    permissions of every AccessPolicy subclass used by the URLconf's views
+    and of the given policies, so that neither the first request nor an
+    unknown condition name waits until request time. Problems are logged
+    rather than raised. Each view's slice of its policies' statements is
+    computed too.
+
+    If the "compiled_cache" setting names a file, compiled artifacts are
+    restored from it and it is rewritten when any policy has changed.
+    """
+    started = time.perf_counter()
+    errors = []
+    view_policies = {}
+
+    # Without a URLconf, e.g. in scripts that only configure some settings
+    if urlconf is not None or getattr(settings, "ROOT_URLCONF", None):
+        try:
+            view_policies = discover_view_policies(urlconf)
+        except Exception as e:
+            errors.append(f"Could not discover the views' policies: {type(e).__name__}: {e}")
+
+    policies = sorted(
+        set(policies).union(*view_policies.values()),
+        key=lambda p: (p.__module__, p.__qualname__),
+    )
+    cache_path = getattr(settings, "DRF_ACCESS_POLICY", {}).get("compiled_cache")
+    cache = CompiledCache.load(cache_path) if cache_path else None
+
+    for policy_cls in policies:
+        if cache is not None:
+            cache.restore(policy_cls)
+
+        policy_errors = precompile_policy(policy_cls)
+        errors.extend(policy_errors)
+
+        # Before updating the cache, so that it includes the code of the slices
+        for view_cls, view_policy_classes in view_policies.items():
+            if policy_cls in view_policy_classes:
+                precompile_view_statements(policy_cls, view_cls)
+
+        if cache is not None and not policy_errors:
+            cache.update(policy_cls)
+
+    if cache is not None:
+        cache.save()
+
+    duration = time.perf_counter() - started
+
+    for error in errors:
+        logger.error(error)
+
+    logger.info(
+        "Precompiled %d access policies in %.1f ms (%d errors)",
+        len(policies),
+        duration * 1000,
+        len(errors),
+    )
+
+    return PrecompileResult(policies, errors, duration)
+
+
+def precompile_policy(policy_cls: Type[AccessPolicy]) -> List[str]:
+    """
+    Compile one policy class; returns a description of each problem found.
+    Statements are only compiled if they are declared on the class, i.e.
+    get_policy_statements is not overridden to load them per request.
+    """
+    errors = []
+    label = f"{policy_cls.__module__}.{policy_cls.__qualname__}"
+
+    try:
+        policy = policy_cls()
+        compiled = get_compiled_policy(policy_cls)
+
+        if policy_cls.get_policy_statements is AccessPolicy.get_policy_statements:
+            for statement in policy._normalize_statements(policy_cls.statements):
+                for condition in statement["condition"]:
+                    try:
+                        compiled.get_condition(condition)
+                        _check_condition_exists(policy, condition)
+                    except AccessPolicyException as e:
+                        errors.append(f"{label}: {e}")
+
+                for expression in statement["condition_expression"]:
+                    try:
+                        compiled.get_expression(expression)
+
+                        for operand in _iter_operand_labels(compiled.parse(expression)):
+                            _check_condition_exists(policy, operand)
+                    except AccessPolicyException as e:
+                        errors.append(f"{label}: {e}")
+
+            if policy_cls.codegen and not errors:
+                compiled.get_decision_function(policy, policy_cls.statements)
+
+        field_permissions = getattr(policy_cls, "field_permissions", None)
+
+        if isinstance(field_permissions, dict) and field_permissions.get("read_only"):
+            get_read_only_fields_index(policy_cls, field_permissions["read_only"])
+    except Exception as e:
+        errors.append(f"{label}: {type(e).__name__}: {e}")
+
+    return errors
+
+
+def _check_condition_exists(policy: AccessPolicy, condition: str):
+    """
+    Look up a condition that is only resolved at call time on the policy
+    instance, raising AccessPolicyException if it is unknown. Conditions of
+    policies overriding _check_condition are left to it.
+    """
+    policy_cls = type(policy)
+    method_name = condition.split(":", 1)[0]
+
+    if overrides(policy_cls, "_check_condition"):
+        return
+
+    if overrides(policy_cls, "_get_condition_method") or (
+        _find_condition(policy_cls, method_name) is None
+    ):
+        policy._get_condition_method(method_name)
+
+
+def precompile_view_statements(policy_cls: Type[AccessPolicy], view_cls):
+    """
+    Compute the slice of a policy's statements for a view class and its
+    statement index, or its decision function if the policy uses codegen,
+    if the statements are declared on the policy class.
+    """
+    compiled = get_compiled_policy(policy_cls)
+
+    if (
+        not compiled.uses_statement_index
+        or policy_cls.get_policy_statements is not AccessPolicy.get_policy_statements
+    ):
+        return
+
+    try:
+        policy = policy_cls()
+        actions = get_view_actions(view_cls).actions
+        sliced = compiled.get_view_statements(
+            policy, policy_cls.statements, view_cls, next(iter(actions))
+        )
+
+        if policy_cls.codegen:
+            compiled.get_decision_function(policy, sliced)
+        else:
+            compiled.get_statement_index(policy, sliced)
+    except Exception:
+        # Already reported by precompile_policy
+        pass
+
+
+def discover_policies(urlconf=None) -> Set[Type[AccessPolicy]]:
+    """
+    Find the AccessPolicy subclasses reachable from the URLconf's views:
+    their permission_classes, access_policy attribute and the access_policy
+    of their serializer_class's Meta.
+    """
+    return set().union(*discover_view_policies(urlconf).values())
+
+
+def discover_view_policies(urlconf=None) -> Dict[type, Set[Type[AccessPolicy]]]:
+    """The AccessPolicy subclasses reachable from each of the URLconf's view classes."""
+    view_policies = {}
+
+    for callback in _iter_callbacks(get_resolver(urlconf).url_patterns):
+        view_cls = getattr(callback, "cls", None) or getattr(callback, "view_class", None)
+
+        if view_cls is None:
+            continue
+
+        candidates = list(getattr(view_cls, "permission_classes", None) or [])
+        candidates.append(getattr(view_cls, "access_policy", None))
+
+        serializer_class = getattr(view_cls, "serializer_class", None)
+        meta = getattr(serializer_class, "Meta", None)
+        candidates.append(getattr(meta, "access_policy", None))
+
+        policies = set(_iter_policies(candidates))
+
+        if policies:
+            view_policies.setdefault(view_cls, set()).update(policies)
+
+    return view_policies
+
+
+def _iter_callbacks(patterns) -> Iterable:
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _iter_callbacks(pattern.url_patterns)
+        else:
+            yield pattern.callback
+
+
+def _iter_policies(candidates) -> Iterable[Type[AccessPolicy]]:
+    for candidate in candidates:
+        if inspect.isclass(candidate) and issubclass(candidate, AccessPolicy):
+            yield candidate
+        elif inspect.isclass(candidate) and issubclass(candidate, ComposedAccessPolicy):
+            yield from _iter_policies(candidate.policies)
+        elif hasattr(candidate, "op1_class"):
+            # Permissions combined with &, | or ~ in permission_classes
+            yield from _iter_policies(
+                [candidate.op1_class, getattr(candidate, "op2_class", None)]
+            )
@@ -0,0 +1,109 @@
+import weakref
+from typing import Callable, Dict, FrozenSet, Iterable, List, Sequence, Union
+
+from . import tracing
+from .exceptions import AccessPolicyException
+
+
+class PrincipalResolver(object):
+    """
+    Resolves a user's values for the principals with one prefix, e.g. the
+    names of the roles matched by "role:<name>" principals. Subclasses
+    implement resolve, and may implement resolve_many to load the values of
+    many users at once (as evaluate_bulk does).
+    """
+
+    def resolve(self, policy, user) -> Iterable[str]:
+        raise NotImplementedError
+
+    def resolve_many(self, policy, users: Sequence) -> List[Iterable[str]]:
+        return [self.resolve(policy, user) for user in users]
+
+
+class FunctionResolver(PrincipalResolver):
+    """A resolver calling function(policy, user)."""
+
+    def __init__(self, function: Callable):
+        self.function = function
+
+    def resolve(self, policy, user) -> Iterable[str]:
+        return self.function(policy, user)
+
+
+# Policy class -> (its principal_resolvers attribute, normalized resolvers)
+_resolvers = weakref.WeakKeyDictionary()
+
+
+def get_principal_resolvers(policy_cls) -> Dict[str, PrincipalResolver]:
+    """
+    The resolvers of the policy's principal_resolvers attribute, by prefix;
+    plain functions are wrapped in a FunctionResolver.
+    """
+    declared = getattr(policy_cls, "principal_resolvers", None) or {}
+    cached = _resolvers.get(policy_cls)
+
+    if cached is not None and cached[0] is declared:
+        return cached[1]
+
+    resolvers = {}
+
+    for prefix, resolver in declared.items():
+        resolvers[prefix] = _normalize_resolver(policy_cls, prefix, resolver)
+
+    _resolvers[policy_cls] = (declared, resolvers)
+    return resolvers
+
+
+def resolve_principals(policy, request, user, resolver: PrincipalResolver) -> FrozenSet[str]:
+    """
+    The user's values for a resolver, resolved once per request: they are
+    kept on the request for the policies and checks that follow.
+    """
+    memo = getattr(request, "_access_policy_principals", None)
+
+    if memo is None:
+        memo = {}
+
+        try:
+            request._access_policy_principals = memo
+        except AttributeError:
+            pass
+
+    cached = memo.get(resolver)
+
+    if cached is not None and cached[0] is user:
+        return cached[1]
+
+    if tracing.enabled:
+        with tracing.start_span(
+            "access_policy.resolve_principals",
+            policy=type(policy).__name__,
+            resolver=type(resolver).__name__,
+        ) as span:
+            values = frozenset(resolver.resolve(policy, user))
+            span.set_attribute("principals", len(values))
+    else:
+        values = frozenset(resolver.resolve(policy, user))
+
+    memo[resolver] = (user, values)
+    return values
+
+
+def _normalize_resolver(
+    policy_cls, prefix: str, resolver: Union[PrincipalResolver, Callable]
+) -> PrincipalResolver:
+    if not isinstance(prefix, str) or not prefix:
+        raise AccessPolicyException(
+            f"{policy_cls.__name__}.principal_resolvers: invalid prefix {prefix!r}"
+        )
+
+    if isinstance(resolver, PrincipalResolver):
+        return resolver
+
+    if callable(resolver):
+        return FunctionResolver(resolver)
+
+    raise AccessPolicyException(
+        f"{policy_cls.__name__}.principal_resolvers: the resolver of '{prefix}' "
+        f"is neither a PrincipalResolver nor callable"
+    )
@@ -0,0 +1,198 @@
+import logging
+import random
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.core.signals import setting_changed
+from django.dispatch import Signal, receiver
+
+logger = logging.getLogger("rest_access_policy")
+
+# Sent (at most once per log_interval per condition) when a condition call
+# takes longer than the threshold, with policy, condition, argument, action,
+# duration and suppressed (the slow calls not reported since the last one)
+slow_condition = Signal()
+
+
+class SlowCondition(NamedTuple):
+    policy: str
+    condition: str
+    argument: Optional[str]
+    count: int  # slow calls seen in the window
+    max_duration: float
+    last_duration: float
+    last_action: str
+    last_seen: float  # time.monotonic() of the last slow call
+
+
+class SlowConditionDetector(object):
+    """
+    Times condition calls - a sample_rate fraction of them - and reports
+    those slower than threshold seconds: a warning on the
+    "rest_access_policy" logger and the slow_condition signal, both at most
+    once per log_interval seconds for each policy and condition. Keeps the
+    slow conditions seen in the last window seconds for top().
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.01,
+        sample_rate: float = 1.0,
+        log_interval: float = 60.0,
+        top: int = 20,
+        window: float = 3600.0,
+    ):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.log_interval = log_interval
+        self.top_size = top
+        self.window = window
+        self.lock = threading.Lock()
+        self.entries: Dict[Tuple[str, str], SlowCondition] = {}
+        # (policy, condition): (last reported, slow calls since)
+        self.reports: Dict[Tuple[str, str], Tuple[float, int]] = {}
+
+    def wrap(self, check, condition: str):
+        """Wrap a compiled condition so that its calls are sampled and timed."""
+        threshold = self.threshold
+        sample_rate = self.sample_rate
+        perf_counter = time.perf_counter
+
+        def call(policy, request, view, action):
+            if sample_rate < 1.0 and random.random() >= sample_rate:
+                return check(policy, request, view, action)
+
+            started = perf_counter()
+            result = check(policy, request, view, action)
+            duration = perf_counter() - started
+
+            if duration > threshold:
+                self.observe(type(policy), condition, action, duration)
+
+            return result
+
+        call.memo_key = check.memo_key
+        return call
+
+    def observe(self, policy_cls, condition: str, action: str, duration: float):
+        now = time.monotonic()
+        key = (policy_cls.__name__, condition)
+        parts = condition.split(":", 1)
+        argument = parts[1] if len(parts) == 2 else None
+
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None or now - entry.last_seen > self.window:
+                count, max_duration = 1, duration
+            else:
+                count, max_duration = entry.count + 1, max(entry.max_duration, duration)
+
+            self.entries[key] = SlowCondition(
+                key[0], parts[0], argument, count, max_duration, duration, action, now
+            )
+
+            if len(self.entries) > self.top_size * 10:
+                self._evict(now)
+
+            last_reported, suppressed = self.reports.get(key, (None, 0))
+
+            if last_reported is not None and now - last_reported < self.log_interval:
+                self.reports[key] = (last_reported, suppressed + 1)
+                return
+
+            self.reports[key] = (now, 0)
+
+        logger.warning(
+            "Slow condition %s of %s took %.1f ms (action %s, %d more since last report)",
+            condition,
+            key[0],
+            duration * 1000,
+            action,
+            suppressed,
+            extra={
+                "access_policy": key[0],
+                "condition": parts[0],
+                "condition_argument": argument,
+                "action": action,
+                "duration": duration,
+            },
+        )
+        slow_condition.send(
+            sender=policy_cls,
+            policy=key[0],
+            condition=parts[0],
+            argument=argument,
+            action=action,
+            duration=duration,
+            suppressed=suppressed,
+        )
+
+    def top(self, n: Optional[int] = None) -> List[SlowCondition]:
+        """The slowest conditions seen in the window, by their slowest call."""
+        now = time.monotonic()
+
+        with self.lock:
+            entries = [e for e in self.entries.values() if now - e.last_seen <= self.window]
+
+        entries.sort(key=lambda entry: entry.max_duration, reverse=True)
+        return entries[: n or self.top_size]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.reports.clear()
+
+    def _evict(self, now: float):
+        """Drop expired entries and, if still too many, all but the slowest."""
+        items = sorted(
+            (item for item in self.entries.items() if now - item[1].last_seen <= self.window),
+            key=lambda item: item[1].max_duration,
+            reverse=True,
+        )
+        self.entries = dict(items[: self.top_size * 5])
+
+
+# Set by enable(); compiled conditions are only timed while it is set
+detector: Optional[SlowConditionDetector] = None
+
+
+def enable(**options) -> SlowConditionDetector:
+    """
+    Start timing condition calls with a SlowConditionDetector created with
+    the options; conditions compiled before are recompiled to be timed.
+    """
+    global detector
+    from .compiler import clear_caches
+
+    detector = SlowConditionDetector(**options)
+    clear_caches()
+    return detector
+
+
+def disable():
+    global detector
+    from .compiler import clear_caches
+
+    if detector is not None:
+        detector = None
+        clear_caches()
+
+
+def configure(settings):
+    """Apply the "slow_conditions" setting of DRF_ACCESS_POLICY: detector options."""
+    options = getattr(settings, "DRF_ACCESS_POLICY", {}).get("slow_conditions")
+
+    if options:
+        enable(**(options if isinstance(options, dict) else {}))
+    else:
+        disable()
+
+
+@receiver(setting_changed)
+def _configure_on_setting_changed(setting, **kwargs):
+    if setting == "DRF_ACCESS_POLICY":
+        from django.conf import settings
+
+        configure(settings)
@@ -0,0 +1,292 @@
+from typing import Dict, Iterator, List, Tuple
+
+from . import metrics, tracing
+from .action_patterns import ActionPatterns, is_action_pattern
+from .principals import get_principal_resolvers, resolve_principals
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class StatementIndex(object):
+    """
+    The normalized statements of a policy as bitmasks, where bit i stands
+    for statement i: one mask per principal value (including the values of
+    the policy's principal resolvers) and per action (glob action patterns
+    are matched by an ActionPatterns), plus masks of the deny statements
+    and of the statements with conditions.
+    Matching a request's principals and action against the statements is
+    then a few bitwise operations, and conditions are only run for the
+    statements whose outcome can still change the decision.
+    """
+
+    __slots__ = (
+        "statements",
+        "any_principal_mask",
+        "principal_masks",
+        "id_masks",
+        "group_masks",
+        "group_principals_mask",
+        "resolved_masks",
+        "resolved_principals_mask",
+        "any_action_mask",
+        "action_masks",
+        "action_patterns",
+        "method_masks",
+        "safe_methods_mask",
+        "deny_mask",
+        "conditional_mask",
+        "conditions",
+    )
+
+    def __init__(self, policy_cls, statements: List[dict]):
+        self.statements = tuple(statements)
+        self.any_principal_mask = 0
+        self.principal_masks: Dict[str, int] = {}
+        self.id_masks: Dict[str, int] = {}
+        self.group_masks: Dict[str, int] = {}
+        self.group_principals_mask = 0
+        self.resolved_principals_mask = 0
+        self.any_action_mask = 0
+        self.action_masks: Dict[str, int] = {}
+        self.method_masks: Dict[str, int] = {}
+        self.safe_methods_mask = 0
+        self.deny_mask = 0
+        self.conditional_mask = 0
+        pattern_masks: Dict[str, int] = {}
+        conditions: List[Tuple[Tuple[str, ...], Tuple[str, ...]]] = []
+
+        id_prefix = policy_cls.id_prefix
+        group_prefix = policy_cls.group_prefix
+        resolvers = get_principal_resolvers(policy_cls)
+        # Resolver -> (value -> mask, mask of the statements naming a value)
+        resolved_masks: Dict[object, Tuple[Dict[str, int], int]] = {}
+
+        for i, statement in enumerate(statements):
+            bit = 1 << i
+
+            for principal in statement["principal"]:
+                if principal == "*":
+                    self.any_principal_mask |= bit
+                elif principal in ("admin", "staff", "authenticated", "anonymous"):
+                    _add(self.principal_masks, principal, bit)
+
+                if principal.startswith(id_prefix):
+                    _add(self.id_masks, principal[len(id_prefix) :], bit)
+
+                if principal.startswith(group_prefix):
+                    _add(self.group_masks, principal[len(group_prefix) :], bit)
+                    self.group_principals_mask |= bit
+
+                for prefix, resolver in resolvers.items():
+                    if principal.startswith(prefix):
+                        masks, mask = resolved_masks.get(resolver, ({}, 0))
+                        _add(masks, principal[len(prefix) :], bit)
+                        resolved_masks[resolver] = (masks, mask | bit)
+                        self.resolved_principals_mask |= bit
+
+            for action in statement["action"]:
+                if action == "*":
+                    self.any_action_mask |= bit
+                elif action == "<safe_methods>":
+                    self.safe_methods_mask |= bit
+                elif action.startswith("<method:") and action.endswith(">"):
+                    _add(self.method_masks, action[len("<method:") : -1], bit)
+                elif is_action_pattern(action):
+                    _add(pattern_masks, action, bit)
+
+                _add(self.action_masks, action, bit)
+
+            if statement["effect"] != "allow":
+                self.deny_mask |= bit
+
+            if statement["condition"] or statement["condition_expression"]:
+                self.conditional_mask |= bit
+
+            conditions.append(
+                (tuple(statement["condition"]), tuple(statement["condition_expression"]))
+            )
+
+        self.resolved_masks = tuple(
+            (resolver, masks, mask) for resolver, (masks, mask) in resolved_masks.items()
+        )
+        self.action_patterns = ActionPatterns(pattern_masks) if pattern_masks else None
+        self.conditions = tuple(conditions)
+
+    def match(self, policy, request, action: str) -> int:
+        """
+        Mask of the statements whose principals include the request's user
+        and whose actions include the action; the user's groups and resolved
+        principals are only fetched if a statement can only be matched
+        through them.
+        """
+        # Inlined get_action_mask
+        candidates = self.any_action_mask | self.action_masks.get(action, 0)
+
+        if self.action_patterns is not None:
+            candidates |= self.action_patterns.get_mask(action)
+
+        if self.method_masks:
+            candidates |= self.method_masks.get(request.method.lower(), 0)
+
+        if self.safe_methods_mask and request.method in SAFE_METHODS:
+            candidates |= self.safe_methods_mask
+
+        if not candidates:
+            return 0
+
+        user = request.user
+
+        if not user:
+            from .access_policy import AnonymousUser
+
+            user = AnonymousUser()
+
+        principals = self.any_principal_mask
+        masks = self.principal_masks
+
+        if masks:
+            if user.is_superuser:
+                principals |= masks.get("admin", 0)
+
+            if user.is_staff:
+                principals |= masks.get("staff", 0)
+
+            if user.is_anonymous:
+                principals |= masks.get("anonymous", 0)
+            else:
+                principals |= masks.get("authenticated", 0)
+
+        if self.id_masks:
+            principals |= self.id_masks.get(str(user.pk), 0)
+
+        if candidates & self.group_principals_mask & ~principals:
+            for group in _get_user_groups(policy, request, user):
+                principals |= self.group_masks.get(group, 0)
+
+        if candidates & self.resolved_principals_mask & ~principals:
+            for resolver, masks, mask in self.resolved_masks:
+                if candidates & mask & ~principals:
+                    for value in resolve_principals(policy, request, user, resolver):
+                        principals |= masks.get(value, 0)
+
+        return candidates & principals
+
+    def get_action_mask(self, action: str, method: str) -> int:
+        """Mask of the statements whose actions include the action or method."""
+        mask = self.any_action_mask | self.action_masks.get(action, 0)
+
+        if self.action_patterns is not None:
+            mask |= self.action_patterns.get_mask(action)
+
+        if self.method_masks:
+            mask |= self.method_masks.get(method.lower(), 0)
+
+        if self.safe_methods_mask and method in SAFE_METHODS:
+            mask |= self.safe_methods_mask
+
+        return mask
+
+    def evaluate(self, compiled_policy, policy, request, view, action: str) -> bool:
+        """
+        Decide the request: denied if a matching deny statement's conditions
+        pass, otherwise allowed if a matching allow statement's do.
+        """
+        if tracing.enabled:
+            with tracing.start_span(
+                "access_policy.match_statements", policy=type(policy).__name__, action=action
+            ) as span:
+                matched = self.match(policy, request, action)
+                span.set_attribute("matched", bin(matched).count("1"))
+        else:
+            matched = self.match(policy, request, action)
+
+        if not matched:
+            return False
+
+        denied = matched & self.deny_mask
+
+        if denied & ~self.conditional_mask:
+            return False
+
+        for i in _iter_bits(denied):
+            if self._conditions_pass(i, compiled_policy, policy, request, view, action):
+                return False
+
+        allowed = matched & ~self.deny_mask
+
+        if allowed & ~self.conditional_mask:
+            return True
+
+        for i in _iter_bits(allowed):
+            if self._conditions_pass(i, compiled_policy, policy, request, view, action):
+                return True
+
+        return False
+
+    def _conditions_pass(self, i: int, compiled_policy, policy, request, view, action) -> bool:
+        conditions, expressions = self.conditions[i]
+        memo = getattr(request, "_access_policy_condition_memo", None)
+
+        for condition in conditions:
+            check = compiled_policy.get_condition(condition)
+
+            if memo is None or check.memo_key is None:
+                passed = check(policy, request, view, action)
+            else:
+                key = (check.memo_key, action)
+                passed = memo.get(key)
+
+                if metrics.enabled:
+                    metrics.record_cache(type(policy), "condition_memo", passed is not None)
+
+                if passed is None:
+                    passed = memo[key] = check(policy, request, view, action)
+
+            if not passed:
+                return False
+
+        for expression in expressions:
+            if not compiled_policy.get_expression(expression)(policy, request, view, action):
+                return False
+
+        return True
+
+
+def _get_user_groups(policy, request, user) -> List[str]:
+    # Shared between the policies of a composed policy: the default
+    # implementation's by all of them, overrides (which may read self) per class
+    memo = getattr(request, "_access_policy_groups", None)
+
+    if memo is None:
+        if metrics.enabled or tracing.enabled:
+            return tracing.get_user_group_values(policy, user)
+
+        return policy.get_user_group_values(user)
+
+    from .access_policy import AccessPolicy
+
+    key = type(policy).get_user_group_values
+
+    if key is not AccessPolicy.get_user_group_values:
+        key = (type(policy), key)
+
+    groups = memo.get(key)
+
+    if groups is None:
+        if metrics.enabled or tracing.enabled:
+            groups = memo[key] = tracing.get_user_group_values(policy, user)
+        else:
+            groups = memo[key] = policy.get_user_group_values(user)
+
+    return groups
+
+
+def _add(masks: Dict[str, int], key: str, bit: int):
+    masks[key] = masks.get(key, 0) | bit
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
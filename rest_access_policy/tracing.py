@@ -0,0 +1,206 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+# Checked before opening any span, so that tracing costs an attribute lookup
+# when no tracer is set. Set a tracer with set_tracer() or the "tracer" setting.
+enabled = False
+
+
+class Span(object):
+    """A span that records nothing; what Tracer.start_span returns."""
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+_NOOP_SPAN = Span()
+
+
+class Tracer(object):
+    """
+    Opens the spans of policy evaluation. This one opens spans that record
+    nothing; subclass it and override start_span to send them somewhere.
+    """
+
+    def start_span(self, name: str, attributes: Dict[str, object]):
+        """
+        Return a context manager that starts a span on entering it, yields
+        an object with set_attribute(key, value) and ends the span on exit.
+        """
+        return _NOOP_SPAN
+
+
+class RecordedSpan(object):
+    __slots__ = ("name", "attributes", "parent", "start_time", "end_time")
+
+    def __init__(self, name: str, attributes: Dict[str, object], parent: Optional["RecordedSpan"]):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.parent = parent
+        self.start_time = 0.0
+        self.end_time = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def __repr__(self):
+        return f"RecordedSpan({self.name!r}, {self.attributes!r})"
+
+
+class InMemoryTracer(Tracer):
+    """
+    Keeps the spans it opens in `spans`, in the order they ended, each with
+    its parent span; meant for tests.
+    """
+
+    def __init__(self):
+        self.spans: List[RecordedSpan] = []
+        self._local = threading.local()
+
+    def start_span(self, name: str, attributes: Dict[str, object]):
+        return _InMemorySpanContext(self, name, attributes)
+
+    def clear(self):
+        self.spans = []
+
+    def names(self) -> List[str]:
+        return [span.name for span in self.spans]
+
+
+class _InMemorySpanContext(object):
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer: InMemoryTracer, name: str, attributes: Dict[str, object]):
+        self.tracer = tracer
+        self.span = RecordedSpan(name, attributes, getattr(tracer._local, "current", None))
+
+    def __enter__(self) -> RecordedSpan:
+        self.tracer._local.current = self.span
+        self.span.start_time = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.span.end_time = time.perf_counter()
+        self.tracer._local.current = self.span.parent
+
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+
+        self.tracer.spans.append(self.span)
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Opens spans with an OpenTelemetry tracer, by default the global tracer
+    provider's tracer for "rest_access_policy". Requires opentelemetry-api.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise ImportError(
+                    "OpenTelemetryTracer requires opentelemetry: pip install opentelemetry-api"
+                )
+
+            tracer = trace.get_tracer("rest_access_policy")
+
+        self.tracer = tracer
+
+    def start_span(self, name: str, attributes: Dict[str, object]):
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+
+_tracer: Tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    """
+    Send the spans of policy evaluation to a tracer, or stop tracing if
+    None; conditions compiled before are recompiled to be traced.
+    """
+    global _tracer, enabled
+    from .compiler import clear_caches
+
+    _tracer = tracer or Tracer()
+    enabled = type(_tracer) is not Tracer
+    clear_caches()
+
+
+def start_span(name: str, **attributes):
+    return _tracer.start_span(name, attributes)
+
+
+def get_user_group_values(policy, user) -> List[str]:
+    """Call the policy's get_user_group_values, counted and traced."""
+    if metrics.enabled:
+        metrics.record_group_query(type(policy))
+
+    if not enabled:
+        return policy.get_user_group_values(user)
+
+    with _tracer.start_span(
+        "access_policy.resolve_groups", {"policy": type(policy).__name__}
+    ) as span:
+        groups = policy.get_user_group_values(user)
+        span.set_attribute("groups", len(groups))
+        return groups
+
+
+def trace_check(check, kind: str, label: str):
+    """
+    Wrap a compiled condition ("condition") or expression
+    ("condition_expression") so that each call is traced.
+    """
+    name = f"access_policy.{kind}"
+
+    def call(policy, request, view, action):
+        attributes = {"policy": type(policy).__name__, kind: label, "action": action}
+
+        with _tracer.start_span(name, attributes) as span:
+            result = check(policy, request, view, action)
+            span.set_attribute("result", result)
+            return result
+
+    call.memo_key = getattr(check, "memo_key", None)
+    return call
+
+
+def configure(settings):
+    """Apply the "tracer" setting of DRF_ACCESS_POLICY: a tracer class's dotted path."""
+    path = getattr(settings, "DRF_ACCESS_POLICY", {}).get("tracer")
+
+    if path:
+        set_tracer(import_string(path)())
+    elif enabled:
+        set_tracer(None)
+
+
+@receiver(setting_changed)
+def _configure_on_setting_changed(setting, **kwargs):
+    if setting == "DRF_ACCESS_POLICY":
+        from django.conf import settings
+
+        configure(settings)
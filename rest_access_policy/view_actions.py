@@ -0,0 +1,96 @@
+import weakref
+from typing import Dict, FrozenSet, List, Tuple
+
+from .action_patterns import compile_action_pattern, is_action_pattern
+
+_view_actions = weakref.WeakKeyDictionary()
+
+
+class ViewActions(object):
+    """
+    What a view class tells about the actions its requests can invoke:
+    for a ViewSet, those the default routers map its methods to (the
+    standard actions it defines, and the mappings of its extra actions);
+    otherwise just the class name. Actions mapped by custom routers are
+    not known, and use all statements. Also caches the default action of
+    each of the ViewSet's action maps.
+    """
+
+    __slots__ = ("actions", "default_actions", "__weakref__")
+
+    # Action maps are created once per route, but as_view() can be called at
+    # any time, so no more than this many are cached
+    max_action_maps = 256
+
+    def __init__(self, view_cls):
+        if hasattr(view_cls, "get_extra_actions"):
+            self.actions: FrozenSet[str] = _get_routed_actions(view_cls)
+        else:
+            self.actions = frozenset([view_cls.__name__])
+
+        self.default_actions: Dict[int, Tuple[dict, str]] = {}
+
+    def get_default_action(self, action_map: dict) -> str:
+        """The first action of the map; used when a request didn't set one."""
+        cached = self.default_actions.get(id(action_map))
+
+        if cached is not None and cached[0] is action_map:
+            return cached[1]
+
+        action = next(iter(action_map.values()))
+
+        if len(self.default_actions) < self.max_action_maps:
+            self.default_actions[id(action_map)] = (action_map, action)
+
+        return action
+
+
+def get_view_actions(view_cls) -> ViewActions:
+    view_actions = _view_actions.get(view_cls)
+
+    if view_actions is None:
+        view_actions = ViewActions(view_cls)
+        _view_actions[view_cls] = view_actions
+
+    return view_actions
+
+
+def _get_routed_actions(view_cls) -> FrozenSet[str]:
+    # Importing the routers needs configured settings, which importing this
+    # package doesn't
+    from rest_framework.routers import Route, SimpleRouter
+
+    actions = set()
+
+    for route in SimpleRouter.routes:
+        if isinstance(route, Route):
+            actions.update(a for a in route.mapping.values() if hasattr(view_cls, a))
+
+    for extra_action in view_cls.get_extra_actions():
+        actions.update(extra_action.mapping.values())
+
+    return frozenset(actions)
+
+
+def slice_statements(statements: List[dict], actions: FrozenSet[str]) -> List[dict]:
+    """
+    The normalized statements that can match one of the actions: those
+    naming one of them, "*", an HTTP method or <safe_methods>, or with a
+    glob pattern matching one of them.
+    """
+    return [
+        statement
+        for statement in statements
+        if any(_can_match(token, actions) for token in statement["action"])
+    ]
+
+
+def _can_match(token: str, actions: FrozenSet[str]) -> bool:
+    if token in actions or token == "*" or token.startswith("<"):
+        return True
+
+    if is_action_pattern(token):
+        match = compile_action_pattern(token)
+        return any(match(action) for action in actions)
+
+    return False
@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+import re
 from codecs import open
 
 from setuptools import setup
@@ -9,6 +10,11 @@ def readme():
         return infile.read()
 
 
+def version():
+    with open("rest_access_policy/__init__.py", "r") as infile:
+        return re.search(r'^__version__ = "(.+)"$', infile.read(), re.M).group(1)
+
+
 classifiers = [
     # Pick your license as you wish (should match "license" above)
     "License :: OSI Approved :: MIT License",
@@ -26,7 +32,7 @@ classifiers = [
 ]
 setup(
     name="drf-access-policy",
-    version="1.5.0",
+    version=version(),
     description="Declarative access policies/permissions modeled after AWS' IAM policies.",
     author="Robert Singer",
     author_email="robertgsinger@gmail.com",
@@ -38,5 +44,6 @@ setup(
     long_description=readme(),
     classifiers=classifiers,
     long_description_content_type="text/markdown",
-    install_requires=["pyparsing", "djangorestframework"],
+    install_requires=["djangorestframework"],
+    extras_require={"pyparsing": ["pyparsing"], "bulk": ["numpy"]},
 )
@@ -0,0 +1,15 @@
+from rest_access_policy import condition
+
+
+@condition(namespace="tenant")
+def is_member(request, view, action) -> bool:
+    return request.user.pk in (1, 2)
+
+
+@condition(name="is_weekday")
+def weekday_check(request, view, action) -> bool:
+    return True
+
+
+def is_a_cat(request, view, action, name: str) -> bool:
+    return name == "Tom"
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
+    "rest_access_policy",
     "test_project.testapp",
 ]
 
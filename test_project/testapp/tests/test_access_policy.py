@@ -456,9 +456,8 @@ class AccessPolicyTests(TestCase):
             ],
         )
 
-    @mock.patch("rest_access_policy.access_policy.BoolOperand")
-    def test_complex_condition_parser_not_called_for_simple_condition(self, opMock):
-        opMock.setParseAction = mock.MagicMock()
+    @mock.patch("rest_access_policy.compiler.parse_expression")
+    def test_complex_condition_parser_not_called_for_simple_condition(self, parseMock):
 
         class TestPolicy(AccessPolicy):
             def is_cloudy(self, request, view, action):
@@ -480,7 +479,7 @@ class AccessPolicyTests(TestCase):
         )
 
         self.assertEqual(result, statements)
-        opMock.setParseAction.assert_not_called()
+        parseMock.assert_not_called()
 
     def test_check_condition_throws_error_if_no_method(self):
         class TestPolicy(AccessPolicy):
@@ -0,0 +1,163 @@
+import itertools
+import random
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from rest_access_policy.action_patterns import (
+    ActionPatterns,
+    is_action_pattern,
+    matches_action_pattern,
+)
+from rest_access_policy.bulk import evaluate_bulk
+from rest_access_policy.view_actions import slice_statements
+from test_project.testapp.tests.test_codegen import (
+    METHODS,
+    PRINCIPALS,
+    USERS,
+    FakeRequest,
+    HarnessPolicy,
+    StagedPolicy,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PATTERNS = ["export_*", "*_logs", "list*", "de?troy", "[cd]*", "*report*"]
+ACTIONS = [
+    "list",
+    "list_all",
+    "create",
+    "destroy",
+    "export_csv",
+    "export_",
+    "audit_logs",
+    "logs",
+    "weekly_report_pdf",
+    "other",
+]
+
+
+def random_statement(rng: random.Random) -> dict:
+    return {
+        "principal": rng.sample(PRINCIPALS, rng.randint(1, 2)),
+        "action": rng.sample(PATTERNS + ["list", "create", "*", "<safe_methods>"], 2),
+        "effect": rng.choice(["allow", "allow", "deny"]),
+    }
+
+
+class ActionPatternsTestCase(SimpleTestCase):
+    def assert_decisions_match(self, statements):
+        interpreted = type("InterpretedPolicy", (StagedPolicy,), {"statements": statements})
+        indexed = type("IndexedPolicy", (HarnessPolicy,), {"statements": statements})
+        generated = type(
+            "GeneratedPolicy", (HarnessPolicy,), {"statements": statements, "codegen": True}
+        )
+
+        for user, method, action in itertools.product(USERS, METHODS, ACTIONS):
+            request = FakeRequest(user, method)
+            expected = interpreted()._evaluate_statements(statements, request, None, action)
+
+            for policy in (indexed, generated):
+                self.assertEqual(
+                    policy()._evaluate_statements(statements, request, None, action),
+                    expected,
+                    f"{policy.__name__}: method={method}, action={action}\n{statements}",
+                )
+
+    def test_is_action_pattern(self):
+        self.assertTrue(is_action_pattern("export_*"))
+        self.assertTrue(is_action_pattern("de?troy"))
+        self.assertTrue(is_action_pattern("[cd]reate"))
+        self.assertFalse(is_action_pattern("*"))
+        self.assertFalse(is_action_pattern("list"))
+        self.assertFalse(is_action_pattern("<method:post>"))
+
+    def test_matches_action_pattern(self):
+        self.assertTrue(matches_action_pattern(["list", "export_*"], "export_csv"))
+        self.assertTrue(matches_action_pattern(["*_logs"], "audit_logs"))
+        self.assertFalse(matches_action_pattern(["*_logs"], "audit_logs_extra"))
+        self.assertFalse(matches_action_pattern(["export_*"], "Export_csv"))
+        self.assertFalse(matches_action_pattern(["list"], "list"))
+
+    def test_statements_with_patterns(self):
+        self.assert_decisions_match(
+            [
+                {"principal": "*", "action": "export_*", "effect": "allow"},
+                {"principal": "authenticated", "action": ["*_logs", "list"], "effect": "allow"},
+                {"principal": "group:dev", "action": "export_pdf", "effect": "deny"},
+                {"principal": "anonymous", "action": "*report*", "effect": "deny"},
+            ]
+        )
+
+    def test_random_policies_with_patterns(self):
+        rng = random.Random(4321)
+
+        for _ in range(100):
+            self.assert_decisions_match(
+                [random_statement(rng) for _ in range(rng.randint(1, 5))]
+            )
+
+    def test_masks_memoized_per_action(self):
+        patterns = ActionPatterns({"export_*": 0b01, "*_csv": 0b10})
+
+        self.assertEqual(patterns.get_mask("export_csv"), 0b11)
+        self.assertEqual(patterns.get_mask("export_pdf"), 0b01)
+        self.assertEqual(patterns.get_mask("list"), 0)
+        self.assertEqual(patterns.masks, {"export_csv": 0b11, "export_pdf": 0b01, "list": 0})
+
+    def test_memo_bounded(self):
+        class SmallActionPatterns(ActionPatterns):
+            max_actions = 2
+
+        patterns = SmallActionPatterns({"export_*": 1})
+
+        for action in ("a", "b", "c", "export_c"):
+            patterns.get_mask(action)
+
+        self.assertEqual(len(patterns.masks), 2)
+        self.assertEqual(patterns.get_mask("export_c"), 1)
+
+    def test_many_patterns(self):
+        patterns = [f"tenant{i}_*" for i in range(500)]
+        statements = [
+            {"principal": "*", "action": pattern, "effect": "allow"} for pattern in patterns
+        ]
+        policy = type("ManyPatternsPolicy", (HarnessPolicy,), {"statements": statements})()
+        request = FakeRequest(USERS[0])
+
+        self.assertTrue(policy._evaluate_statements(statements, request, None, "tenant499_x"))
+        self.assertFalse(policy._evaluate_statements(statements, request, None, "tenant500_x"))
+
+    def test_slice_statements(self):
+        statements = [
+            {"principal": ["*"], "action": ["export_*"], "effect": "allow"},
+            {"principal": ["*"], "action": ["*_logs"], "effect": "allow"},
+            {"principal": ["*"], "action": ["list"], "effect": "allow"},
+        ]
+
+        self.assertEqual(
+            slice_statements(statements, frozenset(["export_csv", "retrieve"])),
+            statements[:1],
+        )
+
+    @skipUnless(numpy, "requires numpy")
+    def test_bulk(self):
+        statements = [
+            {"principal": "authenticated", "action": "export_*", "effect": "allow"},
+            {"principal": "*", "action": ["list*", "*_logs"], "effect": "allow"},
+            {"principal": "id:2", "action": "export_csv", "effect": "deny"},
+        ]
+        policy = type("BulkPolicy", (HarnessPolicy,), {"statements": statements})()
+        result = evaluate_bulk(policy, USERS, ACTIONS, "GET")
+
+        for row, user in enumerate(USERS):
+            for column, action in enumerate(ACTIONS):
+                self.assertEqual(
+                    bool(result[row, column]),
+                    policy._evaluate_statements(
+                        statements, FakeRequest(user, "GET"), None, action
+                    ),
+                )
@@ -0,0 +1,16 @@
+import sys
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from benchmarks.allocations import THRESHOLDS, check_thresholds, run_suite
+
+
+@skipIf(sys.version_info < (3, 9), "tracemalloc.reset_peak requires Python 3.9")
+class AllocationsTestCase(SimpleTestCase):
+    def test_retained_allocations_within_thresholds(self):
+        results = run_suite()
+
+        self.assertEqual([name for name, _ in results], list(THRESHOLDS))
+        # Peak sizes vary between interpreters; what a call retains doesn't
+        self.assertEqual(check_thresholds(results, peaks=False), [])
@@ -0,0 +1,136 @@
+from decimal import Decimal
+from typing import FrozenSet, List, Optional, Tuple
+
+from django.test import SimpleTestCase, override_settings
+
+from rest_access_policy import AccessPolicy, AccessPolicyException, condition_argument
+from rest_access_policy.compiler import compile_condition
+from rest_access_policy.precompile import precompile_policy
+
+
+class TypedPolicy(AccessPolicy):
+    received = []
+
+    def record(self, value) -> bool:
+        self.received.append(value)
+        return True
+
+    def untyped(self, request, view, action, arg):
+        return self.record(arg)
+
+    def as_str(self, request, view, action, arg: str):
+        return self.record(arg)
+
+    def as_int(self, request, view, action, arg: int):
+        return self.record(arg)
+
+    def as_float(self, request, view, action, arg: float):
+        return self.record(arg)
+
+    def as_decimal(self, request, view, action, arg: Decimal):
+        return self.record(arg)
+
+    def as_bool(self, request, view, action, arg: bool):
+        return self.record(arg)
+
+    def as_optional(self, request, view, action, arg: Optional[int] = None):
+        return self.record(arg)
+
+    def as_list(self, request, view, action, arg: List[int]):
+        return self.record(arg)
+
+    def as_tuple(self, request, view, action, arg: Tuple[float, ...]):
+        return self.record(arg)
+
+    def as_set(self, request, view, action, arg: FrozenSet[str]):
+        return self.record(arg)
+
+    def as_bare_list(self, request, view, action, arg: list):
+        return self.record(arg)
+
+    @condition_argument(lambda raw: raw.split("."))
+    def as_path(self, request, view, action, path):
+        return self.record(path)
+
+    @staticmethod
+    def static_int(request, view, action, arg: int):
+        TypedPolicy.received.append(arg)
+        return True
+
+    @classmethod
+    @condition_argument(str.upper)
+    def class_upper(cls, request, view, action, arg):
+        cls.received.append(arg)
+        return True
+
+
+class ArgumentsTestCase(SimpleTestCase):
+    def setUp(self):
+        TypedPolicy.received = []
+
+    def received(self, condition: str):
+        check = compile_condition(TypedPolicy, condition)
+        TypedPolicy.received = []
+        self.assertTrue(check(TypedPolicy(), None, None, "list"))
+        return TypedPolicy.received[0]
+
+    def test_parsed_by_annotation(self):
+        self.assertEqual(self.received("untyped:5"), "5")
+        self.assertEqual(self.received("as_str:5"), "5")
+        self.assertEqual(self.received("as_int:5"), 5)
+        self.assertEqual(self.received("as_float:2.5"), 2.5)
+        self.assertEqual(self.received("as_decimal:2.50"), Decimal("2.50"))
+        self.assertIs(self.received("as_bool:yes"), True)
+        self.assertIs(self.received("as_bool:False"), False)
+        self.assertEqual(self.received("as_optional:7"), 7)
+
+    def test_collections(self):
+        self.assertEqual(self.received("as_list:1, 2,3"), (1, 2, 3))
+        self.assertEqual(self.received("as_list:"), ())
+        self.assertEqual(self.received("as_tuple:1,2.5"), (1.0, 2.5))
+        self.assertEqual(self.received("as_set:a,b,a"), frozenset(["a", "b"]))
+        self.assertEqual(self.received("as_bare_list:a,b"), ("a", "b"))
+
+    def test_decorator(self):
+        self.assertEqual(self.received("as_path:owner.team.name"), ["owner", "team", "name"])
+        self.assertEqual(self.received("class_upper:abc"), "ABC")
+
+    def test_static_method(self):
+        self.assertEqual(self.received("static_int:12"), 12)
+
+    def test_parsed_once(self):
+        parsed = []
+
+        class CountingPolicy(AccessPolicy):
+            @condition_argument(lambda raw: parsed.append(raw) or int(raw))
+            def is_level(self, request, view, action, level):
+                return level == 3
+
+        check = compile_condition(CountingPolicy, "is_level:3")
+
+        for _ in range(3):
+            self.assertTrue(check(CountingPolicy(), None, None, "list"))
+
+        self.assertEqual(parsed, ["3"])
+
+    def test_invalid_argument_raises_when_compiled(self):
+        for condition in ("as_int:five", "as_bool:maybe", "as_list:1,x", "as_decimal:x"):
+            with self.assertRaisesRegex(AccessPolicyException, "invalid argument"):
+                compile_condition(TypedPolicy, condition)
+
+    def test_invalid_argument_reported_by_precompile(self):
+        class InvalidPolicy(TypedPolicy):
+            statements = [{"principal": "*", "action": "*", "condition": "as_int:five"}]
+
+        errors = precompile_policy(InvalidPolicy)
+
+        self.assertEqual(len(errors), 1)
+        self.assertIn("as_int:five", errors[0])
+
+    @override_settings(
+        DRF_ACCESS_POLICY={"reusable_conditions": "test_project.global_access_conditions"}
+    )
+    def test_reusable_condition(self):
+        check = compile_condition(AccessPolicy, "is_a_cat:Garfield")
+
+        self.assertTrue(check(AccessPolicy(), None, None, "list"))
@@ -0,0 +1,84 @@
+import random
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from rest_access_policy import AccessPolicyException
+from rest_access_policy.bulk import evaluate_bulk
+from test_project.testapp.tests.test_codegen import (
+    METHODS,
+    USERS,
+    FakeRequest,
+    HarnessPolicy,
+    StagedPolicy,
+    random_statement,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ACTIONS = ["list", "create", "destroy", "other"]
+
+
+@skipUnless(numpy, "requires numpy")
+class EvaluateBulkTestCase(SimpleTestCase):
+    def assert_matches_has_permission(self, statements, chunk_size=10000):
+        policy = type("BulkPolicy", (HarnessPolicy,), {"statements": statements})()
+
+        for method in METHODS:
+            result = evaluate_bulk(policy, USERS, ACTIONS, method, chunk_size=chunk_size)
+
+            self.assertEqual(result.shape, (len(USERS), len(ACTIONS)))
+
+            for row, user in enumerate(USERS):
+                for column, action in enumerate(ACTIONS):
+                    expected = policy._evaluate_statements(
+                        statements, FakeRequest(user, method), None, action
+                    )
+                    self.assertEqual(
+                        bool(result[row, column]),
+                        expected,
+                        f"{statements} user={row} method={method} action={action}",
+                    )
+
+    def test_random_policies_match_per_request_decisions(self):
+        rng = random.Random(4321)
+
+        for _ in range(200):
+            statements = [random_statement(rng) for _ in range(rng.randint(1, 6))]
+            self.assert_matches_has_permission(statements)
+
+    def test_chunks(self):
+        self.assert_matches_has_permission(
+            [
+                {"principal": "group:dev", "action": "*", "effect": "allow"},
+                {"principal": "id:2", "action": "destroy", "effect": "deny"},
+                {"principal": "*", "action": "list", "effect": "allow", "condition": "is_true"},
+            ],
+            chunk_size=4,
+        )
+
+    def test_conditions_only_run_for_undecided_cells(self):
+        calls = []
+
+        class TrackingPolicy(HarnessPolicy):
+            statements = [
+                {"principal": "admin", "action": "*", "effect": "deny"},
+                {"principal": "*", "action": "list", "effect": "allow", "condition": "tracked"},
+            ]
+
+            def tracked(self, request, view, action):
+                calls.append((request.user, action))
+                return True
+
+        result = evaluate_bulk(TrackingPolicy(), USERS, ACTIONS)
+
+        self.assertEqual(len(calls), len(USERS) - 1)
+        self.assertFalse(result[5].any())
+        self.assertTrue(result[0, 0])
+
+    def test_rejects_policies_with_custom_evaluation(self):
+        with self.assertRaises(AccessPolicyException):
+            evaluate_bulk(StagedPolicy(), USERS, ACTIONS)
@@ -0,0 +1,211 @@
+import itertools
+import random
+from typing import List
+
+from django.test import SimpleTestCase, override_settings
+
+from rest_access_policy import AccessPolicy, Statement
+from rest_access_policy.compiler import get_compiled_policy
+
+PRINCIPALS = [
+    "*",
+    "admin",
+    "staff",
+    "authenticated",
+    "anonymous",
+    "id:1",
+    "id:2",
+    "group:dev",
+    "group:ops",
+    "user:1",
+]
+ACTIONS = ["*", "list", "create", "destroy", "<method:post>", "<method:delete>", "<safe_methods>"]
+CONDITIONS = ["is_true", "is_false", "arg_is:yes", "arg_is:no"]
+EXPRESSIONS = [
+    "is_true and not is_false",
+    "is_false or arg_is:yes",
+    "not (is_true or arg_is:no)",
+    "True",
+    "is_false",
+]
+METHODS = ["GET", "POST", "DELETE", "OPTIONS"]
+
+
+class FakeUser(object):
+    def __init__(self, pk, is_anonymous=False, is_staff=False, is_superuser=False, groups=()):
+        self.pk = pk
+        self.is_anonymous = is_anonymous
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+        self.group_names = list(groups)
+
+
+class FakeRequest(object):
+    def __init__(self, user, method: str = "GET"):
+        self.user = user
+        self.method = method
+
+
+USERS = [
+    None,
+    FakeUser(None, is_anonymous=True),
+    FakeUser(1),
+    FakeUser(2, groups=["dev"]),
+    FakeUser(3, is_staff=True, groups=["ops", "dev"]),
+    FakeUser(4, is_staff=True, is_superuser=True),
+]
+
+
+class HarnessPolicy(AccessPolicy):
+    def get_user_group_values(self, user) -> List[str]:
+        return getattr(user, "group_names", [])
+
+    def is_true(self, request, view, action):
+        return True
+
+    def is_false(self, request, view, action):
+        return False
+
+    def arg_is(self, request, view, action, arg):
+        return arg == "yes"
+
+
+class StagedPolicy(HarnessPolicy):
+    # Overriding a stage of the interpreted evaluation opts out of the
+    # statement index, so decisions go through the stage methods
+    def _normalize_statements(self, statements):
+        return super()._normalize_statements(statements)
+
+
+def random_statement(rng: random.Random):
+    def pick(pool):
+        values = rng.sample(pool, rng.randint(1, 3))
+        return values[0] if len(values) == 1 and rng.random() < 0.5 else values
+
+    statement = {
+        "principal": pick(PRINCIPALS),
+        "action": pick(ACTIONS),
+        "effect": rng.choice(["allow", "allow", "deny"]),
+    }
+
+    if rng.random() < 0.4:
+        statement["condition"] = rng.sample(CONDITIONS, rng.randint(1, 2))
+
+    if rng.random() < 0.4:
+        statement["condition_expression"] = rng.choice(EXPRESSIONS)
+
+    if rng.random() < 0.2:
+        return Statement(**statement)
+
+    return statement
+
+
+def assert_decisions_match(test_case, statements):
+    """
+    Differential check: every (user, method, action) decision of the
+    statement index and of the generated decision function must equal the
+    interpreted pipeline's.
+    """
+    interpreted = type("InterpretedPolicy", (StagedPolicy,), {"statements": statements})
+    indexed = type("IndexedPolicy", (HarnessPolicy,), {"statements": statements})
+    generated = type(
+        "GeneratedPolicy", (HarnessPolicy,), {"statements": statements, "codegen": True}
+    )
+
+    for user, method, action in itertools.product(
+        USERS, METHODS, ["list", "create", "destroy", "other"]
+    ):
+        request = FakeRequest(user, method)
+        expected = interpreted()._evaluate_statements(statements, request, None, action)
+        actual = indexed()._evaluate_statements(statements, request, None, action)
+
+        if expected != actual:
+            test_case.fail(
+                f"Indexed decision {actual} != interpreted {expected} for "
+                f"user={vars(user) if user else None}, method={method}, "
+                f"action={action}\n{statements}"
+            )
+
+        actual = generated()._evaluate_statements(statements, request, None, action)
+
+        if expected != actual:
+            source = get_compiled_policy(generated).get_decision_function(
+                generated(), statements
+            ).__source__
+            test_case.fail(
+                f"Generated decision {actual} != interpreted {expected} for "
+                f"user={vars(user) if user else None}, method={method}, "
+                f"action={action}\n{source}"
+            )
+
+
+class CodegenTestCase(SimpleTestCase):
+    def test_random_policies_match_interpreted_path(self):
+        rng = random.Random(1234)
+
+        for _ in range(300):
+            statements = [random_statement(rng) for _ in range(rng.randint(1, 6))]
+            assert_decisions_match(self, statements)
+
+    def test_test_project_style_policies_match_interpreted_path(self):
+        assert_decisions_match(
+            self,
+            [
+                {"principal": "group:dev", "action": ["create", "update"], "effect": "allow"},
+                {"principal": "group:dev", "action": "destroy", "effect": "deny"},
+                {"principal": ["anonymous", "authenticated"], "action": "list", "effect": "allow"},
+                {"principal": "*", "action": "<safe_methods>", "effect": "allow"},
+            ],
+        )
+
+    def test_has_permission_uses_generated_function(self):
+        class TestPolicy(HarnessPolicy):
+            codegen = True
+            statements = [
+                {"principal": "group:dev", "action": "create", "effect": "allow"},
+                {"principal": "id:2", "action": "create", "effect": "deny", "condition": "is_false"},
+            ]
+
+        class FakeView(object):
+            action = "create"
+
+        self.assertTrue(TestPolicy().has_permission(FakeRequest(USERS[3]), FakeView()))
+        self.assertFalse(TestPolicy().has_permission(FakeRequest(USERS[2]), FakeView()))
+
+        compiled = get_compiled_policy(TestPolicy)
+        function = compiled.get_decision_function(TestPolicy(), TestPolicy.statements)
+
+        self.assertIs(
+            compiled.get_decision_function(TestPolicy(), TestPolicy.statements), function
+        )
+        self.assertIn("def _decide(policy, request, view, action):", function.__source__)
+
+    def test_groups_not_fetched_when_not_needed(self):
+        class TestPolicy(HarnessPolicy):
+            codegen = True
+            statements = [
+                {"principal": ["staff", "group:dev"], "action": "*", "effect": "allow"},
+            ]
+
+            def get_user_group_values(self, user):
+                raise AssertionError("groups should not be fetched")
+
+        self.assertTrue(
+            TestPolicy()._evaluate_statements(
+                TestPolicy.statements, FakeRequest(USERS[4]), None, "list"
+            )
+        )
+
+    @override_settings(DRF_ACCESS_POLICY={"dump_generated_code": True})
+    def test_dump_generated_code(self):
+        class TestPolicy(HarnessPolicy):
+            codegen = True
+            statements = [{"principal": "*", "action": "list", "effect": "allow"}]
+
+        with self.assertLogs("rest_access_policy", level="INFO") as logs:
+            TestPolicy()._evaluate_statements(
+                TestPolicy.statements, FakeRequest(USERS[0]), None, "list"
+            )
+
+        self.assertIn("Generated decision function for TestPolicy", logs.output[0])
+        self.assertIn("def _decide(policy, request, view, action):", logs.output[0])
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from rest_access_policy import AccessPolicy
+from rest_access_policy.compiled_cache import CompiledCache, policy_hash
+from rest_access_policy.compiler import clear_caches, get_compiled_policy
+from rest_access_policy.field_access_mixin import _read_only_fields_indexes
+from rest_access_policy.precompile import precompile_policies, precompile_policy
+
+
+class CachedPolicy(AccessPolicy):
+    statements = [
+        {
+            "principal": "*",
+            "action": "list",
+            "effect": "allow",
+            "condition_expression": "is_owner and not is_banned",
+        },
+        {"principal": "group:dev", "action": "*", "effect": "deny"},
+    ]
+    field_permissions = {"read_only": [{"principal": "group:dev", "fields": "status"}]}
+    codegen = True
+
+    def is_owner(self, request, view, action):
+        return True
+
+    def is_banned(self, request, view, action):
+        return False
+
+
+class CompiledCacheTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "policies.cache")
+        self.addCleanup(clear_caches)
+        clear_caches()
+
+    def write_cache(self):
+        cache = CompiledCache.load(self.path)
+        precompile_policy(CachedPolicy)
+        cache.update(CachedPolicy)
+        cache.save()
+        clear_caches()
+        _read_only_fields_indexes.pop(CachedPolicy, None)
+
+    def test_restores_parse_trees_code_and_field_index(self):
+        self.write_cache()
+
+        cache = CompiledCache.load(self.path)
+        self.assertTrue(cache.restore(CachedPolicy))
+        self.assertIn(CachedPolicy, _read_only_fields_indexes)
+
+        with mock.patch("rest_access_policy.compiler.parse_expression") as parse, mock.patch(
+            "rest_access_policy.compiler.compile", create=True
+        ) as compile_:
+            self.assertEqual(precompile_policy(CachedPolicy), [])
+
+        parse.assert_not_called()
+        compile_.assert_not_called()
+
+        compiled = get_compiled_policy(CachedPolicy)
+        expression = compiled.get_expression("is_owner and not is_banned")
+        self.assertTrue(expression(CachedPolicy(), None, None, "list"))
+
+    def test_stale_entry_is_recompiled_and_replaced(self):
+        self.write_cache()
+        cache = CompiledCache.load(self.path)
+
+        with mock.patch(
+            "rest_access_policy.compiled_cache.policy_hash", return_value="changed"
+        ):
+            self.assertFalse(cache.restore(CachedPolicy))
+            precompile_policy(CachedPolicy)
+            cache.update(CachedPolicy)
+
+        self.assertTrue(cache.changed)
+        self.assertEqual(cache.entries[f"{__name__}.CachedPolicy"]["hash"], "changed")
+
+    def test_file_from_other_version_is_ignored(self):
+        self.write_cache()
+
+        with mock.patch("rest_access_policy.compiled_cache.__version__", "0.0.0"):
+            with self.assertLogs("rest_access_policy", level="INFO") as logs:
+                cache = CompiledCache.load(self.path)
+
+        self.assertEqual(cache.entries, {})
+        self.assertIn("Ignoring stale compiled cache", logs.output[0])
+
+    def test_corrupt_file_is_ignored(self):
+        with open(self.path, "wb") as outfile:
+            outfile.write(b"not json")
+
+        with self.assertLogs("rest_access_policy", level="WARNING") as logs:
+            cache = CompiledCache.load(self.path)
+
+        self.assertEqual(cache.entries, {})
+        self.assertIn("Ignoring unreadable compiled cache", logs.output[0])
+
+    def test_file_writable_by_others_is_ignored(self):
+        self.write_cache()
+        os.chmod(self.path, 0o666)
+
+        with self.assertLogs("rest_access_policy", level="WARNING") as logs:
+            cache = CompiledCache.load(self.path)
+
+        self.assertEqual(cache.entries, {})
+        self.assertIn("writable by other users", logs.output[0])
+
+    def test_file_of_other_user_is_ignored(self):
+        self.write_cache()
+
+        with mock.patch("os.geteuid", return_value=os.geteuid() + 1):
+            with self.assertLogs("rest_access_policy", level="WARNING") as logs:
+                cache = CompiledCache.load(self.path)
+
+        self.assertEqual(cache.entries, {})
+        self.assertIn("not owned by the current user", logs.output[0])
+
+    def test_file_holds_no_pickles(self):
+        self.write_cache()
+
+        with open(self.path, "rb") as infile:
+            data = json.load(infile)
+
+        entry = data["policies"][f"{__name__}.CachedPolicy"]
+        self.assertEqual(
+            entry["trees"]["is_owner and not is_banned"],
+            ["and", [["operand", "is_owner"], ["not", ["operand", "is_banned"]]]],
+        )
+
+    def test_hash_covers_statements(self):
+        class OtherPolicy(CachedPolicy):
+            statements = CachedPolicy.statements[:1]
+
+        self.assertEqual(policy_hash(CachedPolicy), policy_hash(CachedPolicy))
+        self.assertNotEqual(policy_hash(CachedPolicy), policy_hash(OtherPolicy))
+
+    def test_precompile_policies_writes_cache_file(self):
+        with override_settings(DRF_ACCESS_POLICY={"compiled_cache": self.path}):
+            precompile_policies()
+            modified = os.stat(self.path).st_mtime_ns
+
+            # Nothing changed, so the file is not rewritten
+            precompile_policies()
+            self.assertEqual(os.stat(self.path).st_mtime_ns, modified)
+
+        with open(self.path, "rb") as infile:
+            data = json.load(infile)
+
+        self.assertIn(
+            "test_project.testapp.access_policies.UserAccountAccessPolicy", data["policies"]
+        )
@@ -0,0 +1,184 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from rest_access_policy import AccessPolicy, AccessPolicyException
+from rest_access_policy.compiler import get_compiled_policy
+from rest_access_policy.precompile import precompile_policy
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest
+
+
+class ConditionsPolicy(AccessPolicy):
+    def is_true(self, request, view, action):
+        return True
+
+    def is_false(self, request, view, action):
+        return False
+
+    def equals(self, request, view, action, arg):
+        return arg == action
+
+    @staticmethod
+    def static_true(request, view, action):
+        return True
+
+    @classmethod
+    def class_is(cls, request, view, action, name):
+        return cls.__name__ == name
+
+
+class FakeView(object):
+    action = "create"
+
+
+class FeaturePolicy(AccessPolicy):
+    statements = [{"principal": "*", "action": "*", "effect": "allow", "condition": "feature"}]
+
+
+class CompilerTestCase(SimpleTestCase):
+    def evaluate(self, expression, action="create"):
+        compiled = get_compiled_policy(ConditionsPolicy).get_expression(expression)
+        return compiled(ConditionsPolicy(), None, None, action)
+
+    def test_evaluates_expressions(self):
+        self.assertTrue(self.evaluate("is_true and not is_false"))
+        self.assertTrue(self.evaluate("is_false or equals:create"))
+        self.assertFalse(self.evaluate("equals:destroy or not (is_true or is_false)"))
+        self.assertTrue(self.evaluate("static_true and class_is:ConditionsPolicy"))
+        self.assertFalse(self.evaluate("False or is_false"))
+
+    def test_generated_function_calls_conditions_directly(self):
+        compiled = get_compiled_policy(ConditionsPolicy).get_expression(
+            "is_true and (is_false or not is_true)"
+        )
+
+        self.assertEqual(
+            compiled.__source__,
+            "def _expression(policy, request, view, action):\n"
+            "    return (_c0(policy, request, view, action) and "
+            "(_c1(policy, request, view, action) or "
+            "(not _c0(policy, request, view, action))))\n",
+        )
+
+    def test_short_circuits(self):
+        calls = []
+
+        class TrackingPolicy(AccessPolicy):
+            def yes(self, request, view, action):
+                calls.append("yes")
+                return True
+
+            def no(self, request, view, action):
+                calls.append("no")
+                return False
+
+        compiled = get_compiled_policy(TrackingPolicy)
+        compiled.get_expression("yes or no")(TrackingPolicy(), None, None, "x")
+        compiled.get_expression("no and yes")(TrackingPolicy(), None, None, "x")
+
+        self.assertEqual(calls, ["yes", "no"])
+
+    def test_compiled_once_per_policy(self):
+        compiled = get_compiled_policy(ConditionsPolicy)
+
+        self.assertIs(get_compiled_policy(ConditionsPolicy), compiled)
+        self.assertIs(compiled.get_expression("is_true"), compiled.get_expression("is_true"))
+        self.assertIs(compiled.get_condition("equals:x"), compiled.get_condition("equals:x"))
+
+    def test_subclass_gets_its_own_compiled_policy(self):
+        class SubPolicy(ConditionsPolicy):
+            def is_true(self, request, view, action):
+                return False
+
+        self.assertIsNot(get_compiled_policy(SubPolicy), get_compiled_policy(ConditionsPolicy))
+        self.assertFalse(
+            get_compiled_policy(SubPolicy).get_expression("is_true")(SubPolicy(), None, None, "x")
+        )
+
+    def test_unknown_condition_raises_when_compiled(self):
+        with self.assertRaises(AccessPolicyException) as context:
+            get_compiled_policy(ConditionsPolicy).get_expression("is_true or is_unknown")
+
+        self.assertTrue("condition 'is_unknown' must be a method" in str(context.exception))
+
+    def test_reusable_conditions_recompiled_when_setting_changes(self):
+        compiled = get_compiled_policy(ConditionsPolicy).get_condition("is_a_cat:Garfield")
+        self.assertTrue(compiled(ConditionsPolicy(), None, None, "x"))
+
+        with override_settings(DRF_ACCESS_POLICY={}):
+            with self.assertRaises(AccessPolicyException):
+                get_compiled_policy(ConditionsPolicy).get_condition("is_a_cat:Garfield")
+
+    def assert_allowed(self, policy_cls):
+        for codegen in (False, True):
+            policy = type(policy_cls.__name__, (policy_cls,), {"codegen": codegen})()
+            self.assertTrue(policy.has_permission(FakeRequest(USERS[2]), FakeView()))
+
+    def test_get_condition_method_override(self):
+        class HookPolicy(FeaturePolicy):
+            def _get_condition_method(self, method_name):
+                if method_name == "feature":
+                    return lambda request, view, action: True
+
+                return super()._get_condition_method(method_name)
+
+        self.assert_allowed(HookPolicy)
+
+    def test_check_condition_override(self):
+        checked = []
+
+        class HookPolicy(FeaturePolicy):
+            def feature(self, request, view, action):
+                return True
+
+            def _check_condition(self, condition, request, view, action):
+                checked.append(condition)
+                return super()._check_condition(condition, request, view, action)
+
+        self.assert_allowed(HookPolicy)
+        self.assertEqual(checked, ["feature", "feature"])
+
+    def test_instance_attribute_conditions(self):
+        class InitPolicy(FeaturePolicy):
+            def __init__(self):
+                self.feature = lambda request, view, action: True
+
+        class GetattrPolicy(FeaturePolicy):
+            def __getattr__(self, name):
+                if name == "feature":
+                    return lambda request, view, action: True
+
+                raise AttributeError(name)
+
+        self.assert_allowed(InitPolicy)
+        self.assert_allowed(GetattrPolicy)
+        self.assertEqual(precompile_policy(InitPolicy), [])
+
+    def test_unknown_instance_attribute_condition_reported_by_precompile(self):
+        class InitPolicy(FeaturePolicy):
+            def __init__(self):
+                self.other = lambda request, view, action: True
+
+        errors = precompile_policy(InitPolicy)
+
+        self.assertEqual(len(errors), 1)
+        self.assertIn("condition 'feature' must be a method", errors[0])
+
+    def test_patched_condition_methods(self):
+        class PatchedPolicy(FeaturePolicy):
+            statements = [
+                {"principal": "*", "action": "*", "effect": "allow", "condition": "feature:on"}
+            ]
+
+            def feature(self, request, view, action, arg):
+                return False
+
+        for codegen in (False, True):
+            policy_cls = type("PatchedPolicy", (PatchedPolicy,), {"codegen": codegen})
+            self.assertFalse(policy_cls().has_permission(FakeRequest(USERS[2]), FakeView()))
+
+            with mock.patch.object(PatchedPolicy, "feature", return_value=True) as feature:
+                self.assertTrue(policy_cls().has_permission(FakeRequest(USERS[2]), FakeView()))
+
+            feature.assert_called_once_with(mock.ANY, mock.ANY, "create", "on")
+            self.assertFalse(policy_cls().has_permission(FakeRequest(USERS[2]), FakeView()))
@@ -0,0 +1,128 @@
+from django.test import SimpleTestCase
+
+from rest_access_policy import AccessPolicy, AccessPolicyException, condition
+from rest_access_policy.access_policy import ComposedAccessPolicy
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest, HarnessPolicy
+
+
+class FakeView(object):
+    action = "create"
+
+
+class CountingPolicy(HarnessPolicy):
+    calls = []
+
+    def get_user_group_values(self, user):
+        self.calls.append("groups")
+        return super().get_user_group_values(user)
+
+
+@condition(namespace="compose_test")
+def is_member(request, view, action):
+    CountingPolicy.calls.append("is_member")
+    return True
+
+
+class TenantPolicy(CountingPolicy):
+    statements = [
+        {
+            "principal": "group:dev",
+            "action": "*",
+            "effect": "allow",
+            "condition": "compose_test.is_member",
+        }
+    ]
+
+
+class ResourcePolicy(CountingPolicy):
+    statements = [
+        {
+            "principal": "group:dev",
+            "action": "create",
+            "effect": "allow",
+            "condition": "compose_test.is_member",
+        },
+        {"principal": "id:3", "action": "create", "effect": "deny"},
+    ]
+
+
+class FlagPolicy(HarnessPolicy):
+    required = None
+    statements = [{"principal": "*", "action": "*", "effect": "allow", "condition": "has_flag"}]
+
+    def has_flag(self, request, view, action):
+        return self.required == "a"
+
+
+class FlagAPolicy(FlagPolicy):
+    required = "a"
+
+
+class FlagBPolicy(FlagPolicy):
+    required = "b"
+
+
+class ComposeTestCase(SimpleTestCase):
+    def setUp(self):
+        CountingPolicy.calls.clear()
+
+    def test_allows_only_if_every_policy_allows(self):
+        composed = AccessPolicy.compose(TenantPolicy, ResourcePolicy)
+
+        self.assertTrue(issubclass(composed, ComposedAccessPolicy))
+        self.assertEqual(composed.policies, (TenantPolicy, ResourcePolicy))
+        self.assertTrue(composed().has_permission(FakeRequest(USERS[3]), FakeView()))
+        self.assertFalse(composed().has_permission(FakeRequest(USERS[4]), FakeView()))
+        self.assertFalse(composed().has_permission(FakeRequest(USERS[2]), FakeView()))
+
+    def test_reusable_conditions_resolved_once(self):
+        composed = AccessPolicy.compose(TenantPolicy, ResourcePolicy)
+        request = FakeRequest(USERS[3])
+
+        self.assertTrue(composed().has_permission(request, FakeView()))
+        # Overridden get_user_group_values may read self, so it runs per class
+        self.assertEqual(CountingPolicy.calls, ["groups", "is_member", "groups"])
+        self.assertFalse(hasattr(request, "_access_policy_groups"))
+
+    def test_inherited_methods_not_shared_between_policies(self):
+        request = FakeRequest(USERS[2])
+
+        self.assertTrue(FlagAPolicy().has_permission(request, FakeView()))
+        self.assertFalse(FlagBPolicy().has_permission(request, FakeView()))
+
+        for policies in ((FlagAPolicy, FlagBPolicy), (FlagBPolicy, FlagAPolicy)):
+            composed = AccessPolicy.compose(*policies)
+            self.assertFalse(composed().has_permission(request, FakeView()))
+
+    def test_methods_shared_within_policy_class(self):
+        class CountingFlagPolicy(FlagAPolicy):
+            def has_flag(self, request, view, action):
+                CountingPolicy.calls.append("has_flag")
+                return super().has_flag(request, view, action)
+
+        composed = AccessPolicy.compose(CountingFlagPolicy, CountingFlagPolicy)
+
+        self.assertTrue(composed().has_permission(FakeRequest(USERS[2]), FakeView()))
+        self.assertEqual(CountingPolicy.calls, ["has_flag"])
+
+    def test_separately_evaluated_policies_resolve_again(self):
+        request = FakeRequest(USERS[3])
+
+        self.assertTrue(TenantPolicy().has_permission(request, FakeView()))
+        self.assertTrue(ResourcePolicy().has_permission(request, FakeView()))
+        self.assertEqual(CountingPolicy.calls, ["groups", "is_member"] * 2)
+
+    def test_nested_composition(self):
+        composed = AccessPolicy.compose(TenantPolicy)
+        outer = type("Outer", (ComposedAccessPolicy,), {"policies": (composed, ResourcePolicy)})
+
+        self.assertTrue(outer().has_permission(FakeRequest(USERS[3]), FakeView()))
+        self.assertEqual(CountingPolicy.calls, ["groups", "is_member", "groups"])
+
+    def test_composing_composed_policies_flattens_them(self):
+        composed = AccessPolicy.compose(AccessPolicy.compose(TenantPolicy), ResourcePolicy)
+        self.assertEqual(composed.policies, (TenantPolicy, ResourcePolicy))
+
+    def test_rejects_other_classes(self):
+        with self.assertRaises(AccessPolicyException):
+            AccessPolicy.compose(TenantPolicy, object)
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from rest_access_policy import AccessPolicy, AccessPolicyException, condition
+from rest_access_policy.conditions import ConditionRegistry, registry
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest
+
+MODULES = ["test_project.registered_conditions", "test_project.global_access_conditions"]
+
+
+class FakeView(object):
+    action = "list"
+
+
+class TenantPolicy(AccessPolicy):
+    statements = [
+        {
+            "principal": "*",
+            "action": "list",
+            "effect": "allow",
+            "condition": "tenant.is_member",
+            "condition_expression": "is_weekday and not is_a_cat:Garfield",
+        },
+    ]
+
+
+@override_settings(DRF_ACCESS_POLICY={"reusable_conditions": MODULES})
+class ConditionRegistryTestCase(SimpleTestCase):
+    def test_namespaced_and_renamed_conditions(self):
+        self.assertTrue(TenantPolicy().has_permission(FakeRequest(USERS[2]), FakeView()))
+        self.assertFalse(TenantPolicy().has_permission(FakeRequest(USERS[4]), FakeView()))
+
+    def test_undecorated_functions_of_first_module_take_precedence(self):
+        from test_project import registered_conditions
+
+        self.assertIs(registry.get("is_a_cat"), registered_conditions.is_a_cat)
+        self.assertIsNone(registry.get("weekday_check"))
+        self.assertIsNone(registry.get("is_member"))
+
+    def test_modules_loaded_on_first_use(self):
+        self.assertFalse(registry.loaded)
+        registry.get("is_a_cat")
+        self.assertTrue(registry.loaded)
+
+    def test_patched_module_conditions(self):
+        for codegen in (False, True):
+            policy_cls = type("CatPolicy", (TenantPolicy,), {"codegen": codegen})
+            self.assertTrue(policy_cls().has_permission(FakeRequest(USERS[2]), FakeView()))
+
+            with mock.patch(
+                "test_project.registered_conditions.is_a_cat", return_value=True
+            ) as is_a_cat:
+                self.assertFalse(policy_cls().has_permission(FakeRequest(USERS[2]), FakeView()))
+
+            is_a_cat.assert_called_once_with(mock.ANY, mock.ANY, "list", "Garfield")
+
+    def test_unknown_condition(self):
+        with self.assertRaisesRegex(AccessPolicyException, "must be a method"):
+            AccessPolicy._get_reusable_condition("tenant.is_owner")
+
+    @override_settings(DRF_ACCESS_POLICY={"reusable_conditions": 5})
+    def test_invalid_setting(self):
+        with self.assertRaises(ValueError):
+            registry.get("is_a_cat")
+
+
+class ConditionDecoratorTestCase(SimpleTestCase):
+    def test_collision_raises(self):
+        local = ConditionRegistry()
+
+        def first(request, view, action):
+            return True
+
+        def second(request, view, action):
+            return True
+
+        local.register(first, "shared")
+        local.register(first, "shared")
+
+        with self.assertRaisesRegex(AccessPolicyException, "registered by both"):
+            local.register(second, "shared")
+
+    def test_decorator_collision_raises(self):
+        @condition(name="decorator_test.unique")
+        def unique(request, view, action):
+            return True
+
+        with self.assertRaisesRegex(AccessPolicyException, "decorator_test.unique"):
+
+            @condition(name="unique", namespace="decorator_test")
+            def other(request, view, action):
+                return True
+
+    def test_bare_decorator(self):
+        @condition
+        def decorator_test_bare(request, view, action):
+            return True
+
+        self.assertIs(registry.registered["decorator_test_bare"], decorator_test_bare)
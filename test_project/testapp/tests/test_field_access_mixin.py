@@ -0,0 +1,120 @@
+from typing import Optional
+
+from django.contrib.auth.models import Group, User
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from rest_access_policy import AccessPolicy, FieldAccessMixin
+from rest_access_policy.field_access_mixin import _read_only_fields_indexes
+from test_project.testapp.models import UserAccount
+
+
+class FakeRequest(object):
+    def __init__(self, user: Optional[User], method: str = "GET"):
+        self.user = user
+        self.method = method
+
+
+class FieldPermissionsPolicy(AccessPolicy):
+    field_permissions = {
+        "read_only": [
+            {"principal": "group:dev", "fields": "status"},
+            {"principal": ["id:99", "group:dev"], "fields": ["first_name"]},
+            {"principal": "group:intern", "fields": "*"},
+        ]
+    }
+
+
+class FieldPermissionsSerializer(FieldAccessMixin, serializers.ModelSerializer):
+    class Meta:
+        model = UserAccount
+        fields = ["username", "first_name", "last_name", "status"]
+        access_policy = FieldPermissionsPolicy
+
+
+class FieldAccessMixinTestCase(APITestCase):
+    def setUp(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def _read_only_fields(self, user, method="PATCH"):
+        serializer = FieldPermissionsSerializer(
+            context={"request": FakeRequest(user=user, method=method)}
+        )
+        return sorted(name for name, f in serializer.fields.items() if f.read_only)
+
+    def test_read_only_fields_for_group(self):
+        user = User.objects.create(username="dev")
+        user.groups.add(Group.objects.create(name="dev"))
+
+        self.assertEqual(self._read_only_fields(user), ["first_name", "status"])
+
+    def test_read_only_fields_for_id(self):
+        user = User.objects.create(id=99, username="ninety-nine")
+        self.assertEqual(self._read_only_fields(user), ["first_name"])
+
+    def test_all_fields_read_only_for_star(self):
+        user = User.objects.create(username="intern")
+        user.groups.add(Group.objects.create(name="intern"))
+
+        self.assertEqual(
+            self._read_only_fields(user),
+            ["first_name", "last_name", "status", "username"],
+        )
+
+    def test_no_read_only_fields_for_safe_method(self):
+        user = User.objects.create(username="dev")
+        user.groups.add(Group.objects.create(name="dev"))
+
+        self.assertEqual(self._read_only_fields(user, method="GET"), [])
+
+    def test_no_read_only_fields_for_anonymous_user(self):
+        self.assertEqual(self._read_only_fields(None), [])
+
+    def test_statements_compiled_once_per_policy(self):
+        user = User.objects.create(username="someone")
+        self._read_only_fields(user)
+        statements, index = _read_only_fields_indexes[FieldPermissionsPolicy]
+
+        self._read_only_fields(user)
+
+        self.assertIs(_read_only_fields_indexes[FieldPermissionsPolicy][1], index)
+        self.assertIs(statements, FieldPermissionsPolicy.field_permissions["read_only"])
+        self.assertEqual(index.fields_by_principal["group:dev"], {"status", "first_name"})
+        self.assertEqual(index.all_fields_principals, {"group:intern"})
+        self.assertTrue(index.has_group_principals)
+
+    def test_groups_not_fetched_without_group_principals(self):
+        class IdOnlyPolicy(AccessPolicy):
+            field_permissions = {"read_only": [{"principal": "id:5", "fields": "status"}]}
+
+        class IdOnlySerializer(FieldAccessMixin, serializers.ModelSerializer):
+            class Meta:
+                model = UserAccount
+                fields = ["username", "status"]
+                access_policy = IdOnlyPolicy
+
+        user = User.objects.create(id=5, username="five")
+
+        with self.assertNumQueries(0):
+            serializer = IdOnlySerializer(
+                context={"request": FakeRequest(user=user, method="POST")}
+            )
+
+        self.assertTrue(serializer.fields["status"].read_only)
+        self.assertFalse(serializer.fields["username"].read_only)
+
+    def test_invalid_statement_raises(self):
+        class InvalidPolicy(AccessPolicy):
+            field_permissions = {"read_only": [{"principal": "*"}]}
+
+        class InvalidSerializer(FieldAccessMixin, serializers.ModelSerializer):
+            class Meta:
+                model = UserAccount
+                fields = ["username"]
+                access_policy = InvalidPolicy
+
+        with self.assertRaises(Exception) as context:
+            InvalidSerializer(context={"request": FakeRequest(user=None, method="PUT")})
+
+        self.assertTrue("Must pass fields in statement" in str(context.exception))
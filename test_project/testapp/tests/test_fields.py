@@ -62,6 +62,259 @@ class FieldsTestCase(APITestCase):
         self.assertFalse(serializer.is_valid())
         self.assertTrue("object does not exist" in str(serializer.errors))
 
+    def test_many_validated_with_single_query_in_submitted_order(self):
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset
+
+        class TestSerializer(Serializer):
+            users = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all(), many=True
+            )
+
+        request_user = User.objects.create(username="Requester")
+        users = [User.objects.create(username=f"user {i}") for i in range(5)]
+        submitted = [users[3].pk, str(users[0].pk), users[4].pk, users[3].pk]
+
+        serializer = TestSerializer(
+            data={"users": submitted}, context={"request": FakeRequest(user=request_user)}
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(
+            serializer.validated_data["users"], [users[3], users[0], users[4], users[3]]
+        )
+
+    def test_many_reports_all_out_of_scope_objects(self):
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset.exclude(username__startswith="secret")
+
+        class TestSerializer(Serializer):
+            users = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all(), many=True
+            )
+
+        request_user = User.objects.create(username="Requester")
+        visible = User.objects.create(username="visible")
+        secret1 = User.objects.create(username="secret 1")
+        secret2 = User.objects.create(username="secret 2")
+
+        serializer = TestSerializer(
+            data={"users": [secret1.pk, visible.pk, secret2.pk, 9999]},
+            context={"request": FakeRequest(user=request_user)},
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            str(serializer.errors["users"][0]),
+            f'Invalid pks "{secret1.pk}, {secret2.pk}, 9999" - objects do not exist.',
+        )
+
+    def test_many_rejects_incorrect_type(self):
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset
+
+        class TestSerializer(Serializer):
+            users = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all(), many=True
+            )
+
+        request_user = User.objects.create(username="Requester")
+
+        for value in [["abc"], [True], "1"]:
+            serializer = TestSerializer(
+                data={"users": value}, context={"request": FakeRequest(user=request_user)}
+            )
+            self.assertFalse(serializer.is_valid())
+            self.assertTrue("users" in serializer.errors)
+
+    def test_many_uses_overridden_child_to_internal_value(self):
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset
+
+        class UsernameField(PermittedPkRelatedField):
+            def to_internal_value(self, data):
+                return self.get_queryset().get(username=data)
+
+        class TestSerializer(Serializer):
+            users = UsernameField(access_policy=TestPolicy, queryset=User.objects.all(), many=True)
+
+        request_user = User.objects.create(username="Requester")
+        users = [User.objects.create(username=f"user {i}") for i in range(2)]
+
+        serializer = TestSerializer(
+            data={"users": ["user 1", "user 0"]},
+            context={"request": FakeRequest(user=request_user)},
+        )
+
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data["users"], [users[1], users[0]])
+
+
+class ScopedQuerySetMemoizationTestCase(APITestCase):
+    def test_scope_queryset_called_once_per_request(self):
+        calls = []
+
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                calls.append(request)
+                return queryset
+
+        class TestSerializer(Serializer):
+            owner = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all()
+            )
+            reviewer = PermittedSlugRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all(), slug_field="username"
+            )
+            watchers = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all(), many=True
+            )
+
+        request_user = User.objects.create(username="Requester")
+        user = User.objects.create(username="Test user")
+        item = {"owner": user.pk, "reviewer": "Test user", "watchers": [user.pk]}
+        request = FakeRequest(user=request_user)
+
+        serializer = TestSerializer(
+            data=[item, item, item], many=True, context={"request": request}
+        )
+
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(calls, [request])
+
+        serializer = TestSerializer(data=item, context={"request": FakeRequest(user=request_user)})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(len(calls), 2)
+
+    def test_differently_filtered_querysets_are_scoped_separately(self):
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset
+
+        class TestSerializer(Serializer):
+            anyone = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.all()
+            )
+            staff = PermittedPkRelatedField(
+                access_policy=TestPolicy, queryset=User.objects.filter(is_staff=True)
+            )
+
+        request_user = User.objects.create(username="Requester")
+        user = User.objects.create(username="Test user")
+
+        serializer = TestSerializer(
+            data={"anyone": user.pk, "staff": user.pk},
+            context={"request": FakeRequest(user=request_user)},
+        )
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(serializer.errors), ["staff"])
+
+
+class LazyChoicesTestCase(APITestCase):
+    def setUp(self):
+        self.request_user = User.objects.create(username="Requester")
+
+        for i in range(5):
+            User.objects.create(username=f"user {i}")
+
+        class TestPolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset.exclude(username="Requester")
+
+        self.policy = TestPolicy
+
+    def _bind(self, field):
+        class TestSerializer(Serializer):
+            user = field
+
+        serializer = TestSerializer(
+            context={"request": FakeRequest(user=self.request_user)}
+        )
+        return serializer.fields["user"]
+
+    def test_choices_capped_by_cutoff(self):
+        field = self._bind(
+            PermittedPkRelatedField(
+                access_policy=self.policy,
+                queryset=User.objects.order_by("id"),
+                lazy_choices=True,
+                choices_cutoff=3,
+            )
+        )
+
+        self.assertEqual(len(field.choices), 3)
+        self.assertEqual(len(field.get_choices(cutoff=2)), 2)
+
+    def test_choices_projected_with_display_field(self):
+        field = self._bind(
+            PermittedSlugRelatedField(
+                access_policy=self.policy,
+                queryset=User.objects.order_by("id"),
+                slug_field="username",
+                lazy_choices=True,
+                choices_display_field="username",
+            )
+        )
+
+        with self.assertNumQueries(1):
+            choices = field.get_choices()
+
+        self.assertEqual(list(choices.items())[0], ("user 0", "user 0"))
+        self.assertEqual(len(choices), 5)
+
+    def test_choices_page(self):
+        field = self._bind(
+            PermittedPkRelatedField(
+                access_policy=self.policy,
+                queryset=User.objects.all(),
+                choices_display_field="username",
+            )
+        )
+
+        first = field.get_choices_page(page=1, page_size=2)
+        last = field.get_choices_page(page=3, page_size=2)
+
+        self.assertTrue(first["has_next"])
+        self.assertEqual(
+            [c["display_name"] for c in first["results"]], ["user 0", "user 1"]
+        )
+        self.assertFalse(last["has_next"])
+        self.assertEqual([c["display_name"] for c in last["results"]], ["user 4"])
+
+    def test_validation_uses_scoped_queryset(self):
+        class TestSerializer(Serializer):
+            user = PermittedPkRelatedField(
+                access_policy=self.policy,
+                queryset=User.objects.all(),
+                lazy_choices=True,
+                choices_cutoff=1,
+            )
+
+        last_user = User.objects.get(username="user 4")
+        request = FakeRequest(user=self.request_user)
+
+        serializer = TestSerializer(data={"user": last_user.pk}, context={"request": request})
+        self.assertTrue(serializer.is_valid())
+
+        serializer = TestSerializer(
+            data={"user": self.request_user.pk}, context={"request": request}
+        )
+        self.assertFalse(serializer.is_valid())
+
 
 class SlugFieldsTestCase(APITestCase):
     def test_include_in_scope_object(self):
@@ -0,0 +1,103 @@
+from django.contrib.auth.models import Permission
+from rest_framework import serializers, viewsets
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from rest_access_policy import AccessPolicy, AccessViewSetMixin, object_hints
+from rest_access_policy.compiler import get_compiled_policy
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Permission
+        fields = ["codename"]
+
+
+class ObjectPolicy(AccessPolicy):
+    statements = [
+        {
+            "principal": "*",
+            "action": "retrieve",
+            "effect": "allow",
+            "condition": ["is_app:auth", "has_codename"],
+        },
+        {
+            "principal": "*",
+            "action": "list",
+            "effect": "allow",
+            "condition_expression": "not is_app:admin and has_codename",
+        },
+        {"principal": "*", "action": "destroy", "effect": "allow", "condition": "has_group"},
+    ]
+
+    @object_hints(select_related="content_type")
+    def is_app(self, request, view, action, app_label: str) -> bool:
+        return self.get_object(view).content_type.app_label == app_label
+
+    def has_codename(self, request, view, action) -> bool:
+        return bool(self.get_object(view).codename)
+
+    @object_hints(prefetch_related=["group_set"])
+    def has_group(self, request, view, action) -> bool:
+        return not self.get_object(view).group_set.exists()
+
+
+class UnhintedObjectPolicy(ObjectPolicy):
+    def is_app(self, request, view, action, app_label: str) -> bool:
+        return self.get_object(view).content_type.app_label == app_label
+
+
+class PermissionViewSet(AccessViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    access_policy = ObjectPolicy
+    queryset = Permission.objects.all()
+    serializer_class = PermissionSerializer
+
+
+class GetObjectTestCase(APITestCase):
+    def retrieve(self, pk, access_policy=ObjectPolicy):
+        view = PermissionViewSet.as_view({"get": "retrieve"}, access_policy=access_policy)
+        return view(APIRequestFactory().get("/"), pk=pk)
+
+    def test_object_fetched_once_with_hints(self):
+        permission = Permission.objects.filter(content_type__app_label="auth").first()
+
+        with self.assertNumQueries(1):
+            response = self.retrieve(permission.pk)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"codename": permission.codename})
+
+    def test_without_hints(self):
+        permission = Permission.objects.filter(content_type__app_label="auth").first()
+
+        with self.assertNumQueries(2):
+            response = self.retrieve(permission.pk, access_policy=UnhintedObjectPolicy)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_condition_fails(self):
+        permission = Permission.objects.exclude(content_type__app_label="auth").first()
+
+        self.assertEqual(self.retrieve(permission.pk).status_code, 403)
+
+    def test_not_found(self):
+        self.assertEqual(self.retrieve(0).status_code, 404)
+
+    def test_hints_of_statements_matching_action(self):
+        compiled = get_compiled_policy(ObjectPolicy)
+        policy = ObjectPolicy()
+
+        self.assertEqual(
+            compiled.get_object_hints(policy, ObjectPolicy.statements, "retrieve"),
+            (("content_type",), ()),
+        )
+        self.assertEqual(
+            compiled.get_object_hints(policy, ObjectPolicy.statements, "list"),
+            (("content_type",), ()),
+        )
+        self.assertEqual(
+            compiled.get_object_hints(policy, ObjectPolicy.statements, "destroy"),
+            ((), ("group_set",)),
+        )
+        self.assertEqual(
+            compiled.get_object_hints(policy, ObjectPolicy.statements, "update"), ((), ())
+        )
@@ -0,0 +1,172 @@
+import gc
+import threading
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from rest_access_policy import metrics
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest, HarnessPolicy
+
+
+class FakeView(object):
+    action = "create"
+
+
+class MeteredPolicy(HarnessPolicy):
+    statements = [
+        {"principal": "group:dev", "action": "create", "effect": "allow", "condition": "is_true"},
+        {"principal": "id:1", "action": "*", "effect": "deny"},
+    ]
+
+
+class GeneratedMeteredPolicy(MeteredPolicy):
+    codegen = True
+
+
+class MetricsTestCase(SimpleTestCase):
+    def setUp(self):
+        metrics.enable()
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def counters(self):
+        return metrics.snapshot()["counters"]
+
+    def test_nothing_recorded_when_disabled(self):
+        metrics.disable()
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        self.assertEqual(metrics.snapshot(), {"counters": {}, "histograms": {}})
+
+    def test_records_decisions(self):
+        for user in (USERS[3], USERS[3], USERS[2]):
+            MeteredPolicy().has_permission(FakeRequest(user), FakeView())
+
+        labels = ("MeteredPolicy", "create")
+        counters = self.counters()
+
+        self.assertEqual(counters[("decisions", labels)], 3)
+        self.assertEqual(counters[("allows", labels)], 2)
+        self.assertEqual(counters[("denies", labels)], 1)
+        self.assertEqual(counters[("condition_calls", labels)], 2)
+        self.assertEqual(counters[("group_queries", ("MeteredPolicy",))], 3)
+
+        counts, total_seconds, count = metrics.snapshot()["histograms"][labels]
+        self.assertEqual(count, 3)
+        self.assertEqual(counts[-1], 3)
+        self.assertEqual(len(counts), len(metrics.BUCKETS) + 1)
+        self.assertGreater(total_seconds, 0)
+
+    def test_records_with_generated_functions(self):
+        GeneratedMeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+        GeneratedMeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        labels = ("GeneratedMeteredPolicy", "create")
+        counters = self.counters()
+
+        self.assertEqual(counters[("allows", labels)], 2)
+        self.assertEqual(counters[("condition_calls", labels)], 2)
+        self.assertEqual(counters[("group_queries", ("GeneratedMeteredPolicy",))], 2)
+        self.assertEqual(
+            counters[("cache_misses", ("GeneratedMeteredPolicy", "decision_function"))], 1
+        )
+        self.assertEqual(
+            counters[("cache_hits", ("GeneratedMeteredPolicy", "decision_function"))], 1
+        )
+
+    def test_records_cache_hits_and_misses(self):
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        counters = self.counters()
+
+        self.assertEqual(counters[("cache_misses", ("MeteredPolicy", "view_statements"))], 1)
+        self.assertEqual(counters[("cache_hits", ("MeteredPolicy", "view_statements"))], 1)
+        self.assertEqual(counters[("cache_misses", ("MeteredPolicy", "statement_index"))], 1)
+        self.assertEqual(counters[("cache_hits", ("MeteredPolicy", "statement_index"))], 1)
+
+    def test_merges_threads(self):
+        def decide():
+            for _ in range(10):
+                MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        threads = [threading.Thread(target=decide) for _ in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.counters()[("decisions", ("MeteredPolicy", "create"))], 40)
+        self.assertEqual(metrics.snapshot()["histograms"][("MeteredPolicy", "create")][2], 40)
+
+    def test_finished_threads_folded_into_totals(self):
+        def decide():
+            MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        for _ in range(50):
+            thread = threading.Thread(target=decide)
+            thread.start()
+            thread.join()
+
+        gc.collect()
+        self.assertEqual(self.counters()[("decisions", ("MeteredPolicy", "create"))], 50)
+        self.assertLessEqual(len(metrics._shards), 2)
+
+        metrics.reset()
+        self.assertEqual(self.counters(), {})
+
+    def test_renders_prometheus_text(self):
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+        text = metrics.render_prometheus()
+
+        self.assertIn("# TYPE drf_access_policy_decisions_total counter\n", text)
+        self.assertIn(
+            'drf_access_policy_decisions_total{policy="MeteredPolicy",action="create"} 1\n', text
+        )
+        self.assertIn("# TYPE drf_access_policy_decision_seconds histogram\n", text)
+        self.assertIn(
+            'drf_access_policy_decision_seconds_bucket{policy="MeteredPolicy",action="create",'
+            'le="+Inf"} 1\n',
+            text,
+        )
+        self.assertIn(
+            'drf_access_policy_decision_seconds_count{policy="MeteredPolicy",action="create"} 1\n',
+            text,
+        )
+
+    def test_view(self):
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+        response = metrics.metrics_view(RequestFactory().get("/metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"drf_access_policy_allows_total", response.content)
+
+    def test_setting(self):
+        metrics.disable()
+
+        with override_settings(DRF_ACCESS_POLICY={"metrics": True}):
+            self.assertTrue(metrics.enabled)
+
+        self.assertFalse(metrics.enabled)
+
+    def test_escapes_label_values(self):
+        policy = type('Odd"Policy', (MeteredPolicy,), {})
+        policy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        self.assertIn('policy="Odd\\"Policy"', metrics.render_prometheus())
+
+
+class MetricsDisabledTestCase(SimpleTestCase):
+    def test_policies_compiled_while_enabled_stop_counting(self):
+        metrics.enable()
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+        metrics.disable()
+        metrics.reset()
+        MeteredPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        self.assertEqual(metrics.snapshot()["counters"], {})
@@ -0,0 +1,160 @@
+import itertools
+import re
+import unittest
+
+from django.test import SimpleTestCase
+
+from rest_access_policy import ConditionExpressionSyntaxError
+from rest_access_policy.parsing import BoolOperand, parse_expression
+
+try:
+    from pyparsing import infixNotation, opAssoc
+except ImportError:  # pragma: no cover
+    infixNotation = None
+
+
+# Well-formed expressions that must parse and evaluate the same as the
+# pyparsing grammar used before the built-in parser.
+PARITY_CORPUS = [
+    "is_a",
+    "is_a:arg",
+    "is_a:*",
+    "is_a:some.dotted.value",
+    "not is_a",
+    "not not is_a",
+    "is_a and is_b",
+    "is_a or is_b",
+    "is_a and is_b and is_c",
+    "is_a or is_b or is_c",
+    "is_a and not is_b",
+    "is_a or not is_b and is_c",
+    "is_a or not is_b or not is_c",
+    "not (is_a and is_b)",
+    "is_a or not (is_b and is_c)",
+    "(is_a or is_b) and is_c",
+    "is_a and (is_b or is_c) and not is_a",
+    "((is_a))",
+    "(is_a and (is_b or (is_c and not is_a)))",
+    "  is_a   and\tis_b  ",
+    "is_a:1 or is_b:2 and is_c:3",
+    "not is_a or not is_b and not is_c",
+    "True",
+    "False",
+    "not False",
+    "is_a and True",
+    "is_a or False",
+    "(True and is_b) or (False and is_c)",
+]
+
+
+def _labels(expression: str):
+    return sorted(set(re.findall(r"[A-Za-z0-9_:.*]+", expression)) - {"and", "or", "not"})
+
+
+class _LegacyOperand(object):
+    def __init__(self, t, check_cond_fn):
+        self.label = t[0]
+        self.check_cond_fn = check_cond_fn
+
+    def __bool__(self):
+        return self.check_cond_fn(self.label)
+
+
+class _LegacyBinOp(object):
+    def __init__(self, t):
+        self.args = t[0][0::2]
+
+    def __bool__(self):
+        return self.evalop(bool(a) for a in self.args)
+
+
+class _LegacyAnd(_LegacyBinOp):
+    evalop = all
+
+
+class _LegacyOr(_LegacyBinOp):
+    evalop = any
+
+
+class _LegacyNot(object):
+    def __init__(self, t):
+        self.arg = t[0][1]
+
+    def __bool__(self):
+        return not bool(self.arg)
+
+
+def _evaluate_legacy(expression: str, check_cond_fn) -> bool:
+    operand = BoolOperand()
+    operand.setParseAction(lambda token: _LegacyOperand(token, check_cond_fn))
+    expr = infixNotation(
+        operand,
+        [
+            ("not", 1, opAssoc.RIGHT, _LegacyNot),
+            ("and", 2, opAssoc.LEFT, _LegacyAnd),
+            ("or", 2, opAssoc.LEFT, _LegacyOr),
+        ],
+    )
+    return bool(expr.parseString(expression)[0])
+
+
+class ParseExpressionTestCase(SimpleTestCase):
+    @unittest.skipIf(infixNotation is None, "pyparsing is not installed")
+    def test_parity_with_pyparsing_grammar(self):
+        for expression in PARITY_CORPUS:
+            labels = [l for l in _labels(expression) if l not in ("True", "False")]
+
+            for values in itertools.product([True, False], repeat=len(labels)):
+                truth = dict(zip(labels, values), **{"True": True, "False": False})
+
+                with self.subTest(expression=expression, truth=truth):
+                    self.assertEqual(
+                        parse_expression(expression).evaluate(truth.__getitem__),
+                        _evaluate_legacy(expression, truth.__getitem__),
+                    )
+
+    def test_structure(self):
+        self.assertEqual(str(parse_expression("a and b and c")), "(a & b & c)")
+        self.assertEqual(str(parse_expression("a or b and not c")), "(a | (b & ~c))")
+        self.assertEqual(str(parse_expression("(a or b) and c")), "((a | b) & c)")
+        self.assertEqual(str(parse_expression("not not a:1")), "~~a:1")
+        self.assertEqual(str(parse_expression("True or False")), "(True | False)")
+
+    def test_short_circuits(self):
+        called = []
+
+        def check(label):
+            called.append(label)
+            return label == "yes"
+
+        self.assertTrue(parse_expression("yes or no").evaluate(check))
+        self.assertFalse(parse_expression("no and yes").evaluate(check))
+        self.assertEqual(called, ["yes", "no"])
+
+    def test_operators_are_whole_words(self):
+        self.assertEqual(str(parse_expression("notable")), "notable")
+        self.assertEqual(str(parse_expression("android or oracle")), "(android | oracle)")
+        self.assertEqual(str(parse_expression("Truest")), "Truest")
+
+    def test_parse_is_cached(self):
+        self.assertIs(parse_expression("is_a and is_b"), parse_expression("is_a and is_b"))
+
+    def test_syntax_error_positions(self):
+        cases = [
+            ("", 0, "expected a condition but reached the end"),
+            ("is_a and", 8, "expected a condition but reached the end"),
+            ("is_a and or is_b", 9, "expected a condition but found 'or'"),
+            ("(is_a or is_b", 13, "expected ')'"),
+            ("is_a or is_b)", 12, "unexpected ')'"),
+            ("is_a is_b", 5, "unexpected 'is_b'"),
+            ("is_a and is-b", 11, "unexpected character '-'"),
+            ("not", 3, "expected a condition but reached the end"),
+        ]
+
+        for expression, position, message in cases:
+            with self.subTest(expression=expression):
+                with self.assertRaises(ConditionExpressionSyntaxError) as context:
+                    parse_expression(expression)
+
+                self.assertEqual(context.exception.position, position)
+                self.assertEqual(context.exception.message, message)
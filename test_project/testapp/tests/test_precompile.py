@@ -0,0 +1,219 @@
+from unittest import mock
+
+from django.apps import apps
+from django.conf import settings
+from django.core.signals import request_started
+from django.test import SimpleTestCase
+from django.urls import path
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+import rest_access_policy
+from rest_access_policy import AccessPolicy
+from rest_access_policy.compiler import get_compiled_policy
+from rest_access_policy.field_access_mixin import _read_only_fields_indexes
+from rest_access_policy.precompile import (
+    discover_policies,
+    precompile_on_first_request,
+    precompile_policies,
+    precompile_policy,
+    warmup,
+)
+from test_project.testapp.access_policies import (
+    LandingPageAccessPolicy,
+    LogsAccessPolicy,
+    UserAccountAccessPolicy,
+)
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest
+
+
+class ValidPolicy(AccessPolicy):
+    statements = [
+        {
+            "principal": "*",
+            "action": "*",
+            "effect": "allow",
+            "condition": "is_a_cat:Garfield",
+            "condition_expression": "is_owner or not is_a_cat:Snoopy",
+        }
+    ]
+    field_permissions = {"read_only": [{"principal": "group:dev", "fields": "status"}]}
+
+    def is_owner(self, request, view, action):
+        return True
+
+
+class GeneratedPolicy(AccessPolicy):
+    statements = [
+        {"principal": "*", "action": "generated_view", "effect": "allow"},
+        {"principal": "*", "action": "other_view", "effect": "deny"},
+    ]
+    codegen = True
+
+
+class BrokenPolicy(AccessPolicy):
+    statements = [
+        {"principal": "*", "action": "*", "effect": "allow", "condition": "is_unknown"},
+        {"principal": "*", "action": "*", "effect": "allow", "condition_expression": "a and"},
+    ]
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated & ValidPolicy])
+def combined_view(request):
+    return Response({})
+
+
+@api_view(["GET"])
+@permission_classes([GeneratedPolicy])
+def generated_view(request):
+    return Response({})
+
+
+@api_view(["GET"])
+@permission_classes([BrokenPolicy])
+def broken_view(request):
+    return Response({})
+
+
+class urlconf:
+    urlpatterns = [
+        path("combined/", combined_view),
+        path("broken/", broken_view),
+    ]
+
+
+class generated_urlconf:
+    urlpatterns = [path("generated/", generated_view)]
+
+
+class PrecompileTestCase(SimpleTestCase):
+    def test_discovers_policies_from_project_urls(self):
+        self.assertEqual(
+            discover_policies(),
+            {UserAccountAccessPolicy, LogsAccessPolicy, LandingPageAccessPolicy},
+        )
+
+    def test_discovers_policies_combined_with_operators(self):
+        self.assertEqual(discover_policies(urlconf), {ValidPolicy, BrokenPolicy})
+
+    def test_precompiles_conditions_expressions_and_field_permissions(self):
+        self.assertEqual(precompile_policy(ValidPolicy), [])
+
+        compiled = get_compiled_policy(ValidPolicy)
+        self.assertIn("is_a_cat:Garfield", compiled.conditions)
+        self.assertIn("is_owner or not is_a_cat:Snoopy", compiled.expressions)
+        self.assertIn(ValidPolicy, _read_only_fields_indexes)
+
+    def test_reports_unknown_conditions_and_syntax_errors(self):
+        errors = precompile_policy(BrokenPolicy)
+
+        self.assertEqual(len(errors), 2)
+        self.assertIn("BrokenPolicy: condition 'is_unknown' must be a method", errors[0])
+        self.assertIn("Invalid condition_expression at position 5", errors[1])
+
+    def test_logs_summary(self):
+        with self.assertLogs("rest_access_policy", level="INFO") as logs:
+            result = precompile_policies(urlconf)
+
+        self.assertEqual(result.policies, [BrokenPolicy, ValidPolicy])
+        self.assertEqual(len(result.errors), 2)
+        self.assertTrue(
+            logs.output[-1].startswith(
+                "INFO:rest_access_policy:Precompiled 2 access policies in"
+            )
+        )
+        self.assertTrue(logs.output[-1].endswith("(2 errors)"))
+
+    def test_urlconf_import_errors_are_logged(self):
+        with self.assertLogs("rest_access_policy", level="INFO") as logs:
+            result = precompile_policies("test_project.missing_urls", [ValidPolicy])
+
+        self.assertEqual(result.policies, [ValidPolicy])
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn(
+            "Could not discover the views' policies: ModuleNotFoundError", logs.output[0]
+        )
+
+    def test_without_root_urlconf(self):
+        with self.settings():
+            del settings.ROOT_URLCONF
+
+            with self.assertLogs("rest_access_policy", level="INFO"):
+                result = precompile_policies(policies=[ValidPolicy])
+
+        self.assertEqual(result.policies, [ValidPolicy])
+        self.assertEqual(result.errors, [])
+
+    def test_warmup_compiles_given_policies_and_freezes_gc(self):
+        class UnroutedPolicy(AccessPolicy):
+            statements = [
+                {"principal": "*", "action": "*", "effect": "allow", "condition": "is_a_cat:Tom"}
+            ]
+
+        self.assertIs(rest_access_policy.warmup, warmup)
+
+        with mock.patch("rest_access_policy.precompile.gc") as gc:
+            with self.assertLogs("rest_access_policy", level="INFO"):
+                result = warmup(urlconf, policies=[UnroutedPolicy])
+
+        self.assertIn(UnroutedPolicy, result.policies)
+        self.assertIn("is_a_cat:Tom", get_compiled_policy(UnroutedPolicy).conditions)
+        gc.freeze.assert_called_once_with()
+
+    def test_warmup_without_gc_freeze(self):
+        # Python 3.6 has no gc.freeze
+        with mock.patch("rest_access_policy.precompile.gc", spec=["collect"]) as gc:
+            with self.assertLogs("rest_access_policy", level="INFO"):
+                warmup(urlconf)
+
+        gc.collect.assert_not_called()
+
+    def test_warmup_without_freeze(self):
+        with mock.patch("rest_access_policy.precompile.gc") as gc:
+            with self.assertLogs("rest_access_policy", level="INFO"):
+                warmup(urlconf, freeze=False)
+
+        gc.freeze.assert_not_called()
+
+    def test_precompiles_view_statement_slices(self):
+        with self.assertLogs("rest_access_policy", level="INFO"):
+            precompile_policies(urlconf)
+
+        self.assertIn(combined_view.cls, get_compiled_policy(ValidPolicy).view_statements)
+
+    def test_precompiles_view_decision_functions(self):
+        with self.assertLogs("rest_access_policy", level="INFO"):
+            precompile_policies(generated_urlconf)
+
+        with mock.patch(
+            "rest_access_policy.codegen.generate_decision_function"
+        ) as generate_decision_function:
+            self.assertTrue(
+                GeneratedPolicy().has_permission(FakeRequest(USERS[1]), generated_view.cls())
+            )
+
+        generate_decision_function.assert_not_called()
+
+    def test_precompiled_on_first_request_rather_than_when_ready(self):
+        self.addCleanup(request_started.disconnect, precompile_on_first_request)
+
+        with mock.patch("rest_access_policy.precompile.precompile_policies") as precompile:
+            apps.get_app_config("rest_access_policy").ready()
+            precompile.assert_not_called()
+
+            request_started.send(sender=None)
+            request_started.send(sender=None)
+
+        precompile.assert_called_once_with()
+
+    def test_not_precompiled_on_first_request_after_warmup(self):
+        self.addCleanup(request_started.disconnect, precompile_on_first_request)
+
+        with mock.patch("rest_access_policy.precompile.precompile_policies") as precompile:
+            apps.get_app_config("rest_access_policy").ready()
+            warmup(freeze=False)
+            request_started.send(sender=None)
+
+        precompile.assert_called_once_with(None, ())
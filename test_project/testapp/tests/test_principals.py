@@ -0,0 +1,197 @@
+import itertools
+import random
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+from rest_access_policy import AccessPolicy, AccessPolicyException, PrincipalResolver
+from rest_access_policy.bulk import evaluate_bulk
+from rest_access_policy.compiler import get_compiled_policy
+from rest_access_policy.principals import get_principal_resolvers
+from test_project.testapp.tests.test_codegen import (
+    METHODS,
+    USERS,
+    FakeRequest,
+    HarnessPolicy,
+    StagedPolicy,
+)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ROLES = {2: ["editor"], 3: ["editor", "auditor"], 4: ["admin"]}
+TENANTS = {1: ["acme"], 3: ["acme", "globex"]}
+PRINCIPALS = [
+    "*",
+    "staff",
+    "id:1",
+    "group:dev",
+    "role:editor",
+    "role:auditor",
+    "role:admin",
+    "tenant:acme",
+    "tenant:globex",
+]
+ACTIONS = ["list", "create", "destroy"]
+
+
+class RoleResolver(PrincipalResolver):
+    def __init__(self):
+        self.calls = []
+
+    def resolve(self, policy, user):
+        self.calls.append([user.pk])
+        return ROLES.get(user.pk, [])
+
+    def resolve_many(self, policy, users):
+        self.calls.append([user.pk for user in users])
+        return [ROLES.get(user.pk, []) for user in users]
+
+
+def get_tenants(policy, user):
+    return TENANTS.get(user.pk, [])
+
+
+class ResolvingPolicy(HarnessPolicy):
+    principal_resolvers = {"role:": RoleResolver(), "tenant:": get_tenants}
+
+
+class StagedResolvingPolicy(StagedPolicy):
+    principal_resolvers = ResolvingPolicy.principal_resolvers
+
+
+def random_statement(rng: random.Random) -> dict:
+    return {
+        "principal": rng.sample(PRINCIPALS, rng.randint(1, 3)),
+        "action": rng.sample(ACTIONS + ["*"], rng.randint(1, 2)),
+        "effect": rng.choice(["allow", "allow", "deny"]),
+        "condition": rng.choice([[], [], ["is_true"], ["is_false"]]),
+    }
+
+
+class PrincipalResolversTestCase(SimpleTestCase):
+    def setUp(self):
+        self.resolver = ResolvingPolicy.principal_resolvers["role:"]
+        self.resolver.calls = []
+
+    def assert_decisions_match(self, statements):
+        interpreted = type(
+            "InterpretedPolicy", (StagedResolvingPolicy,), {"statements": statements}
+        )
+        indexed = type("IndexedPolicy", (ResolvingPolicy,), {"statements": statements})
+        generated = type(
+            "GeneratedPolicy", (ResolvingPolicy,), {"statements": statements, "codegen": True}
+        )
+
+        for user, method, action in itertools.product(USERS, METHODS, ACTIONS):
+            expected = interpreted()._evaluate_statements(
+                statements, FakeRequest(user, method), None, action
+            )
+
+            for policy in (indexed, generated):
+                self.assertEqual(
+                    policy()._evaluate_statements(
+                        statements, FakeRequest(user, method), None, action
+                    ),
+                    expected,
+                    f"{policy.__name__}: user={user and user.pk}, action={action}\n{statements}",
+                )
+
+    def test_resolved_principals_match(self):
+        self.assert_decisions_match(
+            [
+                {"principal": "role:editor", "action": ["create", "list"], "effect": "allow"},
+                {"principal": ["tenant:globex", "id:1"], "action": "destroy", "effect": "allow"},
+                {"principal": "role:auditor", "action": "create", "effect": "deny"},
+            ]
+        )
+
+    def test_random_policies_match(self):
+        rng = random.Random(5678)
+
+        for _ in range(100):
+            self.assert_decisions_match(
+                [random_statement(rng) for _ in range(rng.randint(1, 5))]
+            )
+
+    def test_resolved_once_per_request(self):
+        statements = [
+            {"principal": "role:auditor", "action": "create", "effect": "deny"},
+            {"principal": "role:editor", "action": "create", "effect": "allow"},
+        ]
+
+        for codegen in (False, True):
+            policy = type(
+                "Policy", (ResolvingPolicy,), {"statements": statements, "codegen": codegen}
+            )()
+            request = FakeRequest(USERS[3])
+            self.resolver.calls = []
+
+            self.assertTrue(policy._evaluate_statements(statements, request, None, "create"))
+            self.assertTrue(policy._evaluate_statements(statements, request, None, "create"))
+            self.assertEqual(self.resolver.calls, [[2]])
+
+    def test_not_resolved_when_not_needed(self):
+        statements = [
+            {"principal": ["staff", "role:editor"], "action": "list", "effect": "allow"}
+        ]
+
+        for codegen in (False, True):
+            policy = type(
+                "Policy", (ResolvingPolicy,), {"statements": statements, "codegen": codegen}
+            )()
+
+            self.assertTrue(
+                policy._evaluate_statements(statements, FakeRequest(USERS[4]), None, "list")
+            )
+            self.assertFalse(
+                policy._evaluate_statements(statements, FakeRequest(USERS[2]), None, "create")
+            )
+            self.assertEqual(self.resolver.calls, [])
+
+    def test_get_principals(self):
+        principals = ResolvingPolicy._get_principals(FakeRequest(USERS[4]))
+
+        self.assertTrue({"role:editor", "role:auditor", "tenant:acme"} <= principals)
+        self.assertNotIn(
+            "role:editor", ResolvingPolicy._get_principals(FakeRequest(USERS[4]), False)
+        )
+
+    def test_function_resolver(self):
+        resolver = get_principal_resolvers(ResolvingPolicy)["tenant:"]
+
+        self.assertEqual(resolver.resolve(ResolvingPolicy(), USERS[4]), ["acme", "globex"])
+        self.assertIs(get_principal_resolvers(ResolvingPolicy)["tenant:"], resolver)
+
+    def test_invalid_resolver_raises(self):
+        class InvalidPolicy(AccessPolicy):
+            statements = [{"principal": "role:editor", "action": "*", "effect": "allow"}]
+            principal_resolvers = {"role:": "roles"}
+
+        with self.assertRaisesRegex(AccessPolicyException, "role:"):
+            get_compiled_policy(InvalidPolicy).get_statement_index(
+                InvalidPolicy(), InvalidPolicy.statements
+            )
+
+    @skipUnless(numpy, "requires numpy")
+    def test_bulk_resolves_each_chunk_at_once(self):
+        statements = [
+            {"principal": "role:editor", "action": ["create", "list"], "effect": "allow"},
+            {"principal": "tenant:globex", "action": "destroy", "effect": "allow"},
+            {"principal": "role:auditor", "action": "create", "effect": "deny"},
+        ]
+        policy = type("BulkPolicy", (ResolvingPolicy,), {"statements": statements})()
+        result = evaluate_bulk(policy, USERS, ACTIONS, chunk_size=4)
+
+        self.assertEqual(self.resolver.calls, [[None, None, 1, 2], [3, 4]])
+
+        for row, user in enumerate(USERS):
+            for column, action in enumerate(ACTIONS):
+                self.assertEqual(
+                    bool(result[row, column]),
+                    policy._evaluate_statements(
+                        statements, FakeRequest(user, "GET"), None, action
+                    ),
+                )
@@ -0,0 +1,156 @@
+from django.test import SimpleTestCase, override_settings
+
+from rest_access_policy import slow_conditions
+from rest_access_policy.slow_conditions import SlowConditionDetector, slow_condition
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest, HarnessPolicy
+
+
+class FakeView(object):
+    action = "create"
+
+
+class TimedPolicy(HarnessPolicy):
+    statements = [
+        {
+            "principal": "*",
+            "action": "create",
+            "effect": "allow",
+            "condition": ["is_true", "arg_is:yes"],
+        },
+    ]
+
+
+class GeneratedTimedPolicy(TimedPolicy):
+    codegen = True
+
+
+class SlowConditionsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.events = []
+        slow_condition.connect(self.receive)
+
+    def tearDown(self):
+        slow_condition.disconnect(self.receive)
+        slow_conditions.disable()
+
+    def receive(self, sender, **kwargs):
+        self.events.append((sender, kwargs))
+
+    def decide(self, policy=TimedPolicy):
+        return policy().has_permission(FakeRequest(USERS[2]), FakeView())
+
+    def test_reports_slow_conditions(self):
+        slow_conditions.enable(threshold=-1)
+
+        with self.assertLogs("rest_access_policy", "WARNING") as logs:
+            self.assertTrue(self.decide())
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("Slow condition is_true of TimedPolicy", logs.output[0])
+        self.assertEqual(logs.records[1].condition_argument, "yes")
+
+        sender, event = self.events[1]
+        self.assertIs(sender, TimedPolicy)
+        self.assertEqual(
+            {k: v for k, v in event.items() if k not in ("signal", "duration")},
+            {
+                "policy": "TimedPolicy",
+                "condition": "arg_is",
+                "argument": "yes",
+                "action": "create",
+                "suppressed": 0,
+            },
+        )
+        self.assertGreaterEqual(event["duration"], 0)
+
+    def test_generated_functions_are_timed(self):
+        slow_conditions.enable(threshold=-1)
+
+        with self.assertLogs("rest_access_policy", "WARNING"):
+            self.decide(GeneratedTimedPolicy)
+
+        self.assertEqual(len(self.events), 2)
+
+    def test_fast_conditions_not_reported(self):
+        slow_conditions.enable(threshold=10)
+        self.decide()
+
+        self.assertEqual(self.events, [])
+        self.assertEqual(slow_conditions.detector.top(), [])
+
+    def test_rate_limited(self):
+        slow_conditions.enable(threshold=-1)
+
+        with self.assertLogs("rest_access_policy", "WARNING") as logs:
+            for _ in range(3):
+                self.decide()
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(slow_conditions.detector.top()[0].count, 3)
+
+        slow_conditions.detector.log_interval = 0
+
+        with self.assertLogs("rest_access_policy", "WARNING") as logs:
+            self.decide()
+
+        self.assertEqual(self.events[-1][1]["suppressed"], 2)
+        self.assertIn("2 more since last report", logs.output[-1])
+
+    def test_sampling(self):
+        slow_conditions.enable(threshold=-1, sample_rate=0)
+        self.decide()
+
+        self.assertEqual(self.events, [])
+
+    def test_disable(self):
+        slow_conditions.enable(threshold=-1)
+        slow_conditions.disable()
+        self.decide()
+
+        self.assertIsNone(slow_conditions.detector)
+        self.assertEqual(self.events, [])
+
+    def test_setting(self):
+        with override_settings(DRF_ACCESS_POLICY={"slow_conditions": {"threshold": 0.5}}):
+            self.assertEqual(slow_conditions.detector.threshold, 0.5)
+
+        self.assertIsNone(slow_conditions.detector)
+
+
+class SlowConditionDetectorTestCase(SimpleTestCase):
+    def test_top(self):
+        detector = SlowConditionDetector(top=2, log_interval=3600)
+
+        with self.assertLogs("rest_access_policy", "WARNING"):
+            detector.observe(TimedPolicy, "is_true", "create", 0.02)
+            detector.observe(TimedPolicy, "arg_is:yes", "create", 0.05)
+            detector.observe(TimedPolicy, "is_false", "list", 0.03)
+            detector.observe(TimedPolicy, "is_true", "list", 0.04)
+
+        top = detector.top()
+        self.assertEqual(
+            [(e.condition, e.argument) for e in top], [("arg_is", "yes"), ("is_true", None)]
+        )
+        self.assertEqual(
+            (top[1].count, top[1].max_duration, top[1].last_action), (2, 0.04, "list")
+        )
+        self.assertEqual(len(detector.top(5)), 3)
+
+    def test_window(self):
+        detector = SlowConditionDetector(window=-1)
+
+        with self.assertLogs("rest_access_policy", "WARNING"):
+            detector.observe(TimedPolicy, "is_true", "create", 0.02)
+
+        self.assertEqual(detector.top(), [])
+
+    def test_bounded(self):
+        detector = SlowConditionDetector(top=1, log_interval=3600)
+
+        with self.assertLogs("rest_access_policy", "WARNING"):
+            for i in range(30):
+                detector.observe(TimedPolicy, f"arg_is:{i}", "create", i / 1000)
+
+        self.assertLessEqual(len(detector.entries), 10)
+        self.assertEqual(detector.top()[0].argument, "29")
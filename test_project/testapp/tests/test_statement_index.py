@@ -0,0 +1,138 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from rest_access_policy import AccessPolicy
+from rest_access_policy.compiler import get_compiled_policy
+from rest_access_policy.statement_index import StatementIndex
+from test_project.testapp.tests.test_codegen import (
+    USERS,
+    FakeRequest,
+    HarnessPolicy,
+    StagedPolicy,
+)
+
+
+class IndexedPolicy(HarnessPolicy):
+    statements = [
+        {
+            "principal": ["staff", "group:dev"],
+            "action": ["list", "<safe_methods>"],
+            "effect": "allow",
+        },
+        {"principal": "id:2", "action": "<method:delete>", "effect": "deny"},
+        {"principal": "*", "action": "*", "effect": "allow", "condition": "is_false"},
+        {
+            "principal": "authenticated",
+            "action": "create",
+            "effect": "allow",
+            "condition_expression": "is_true",
+        },
+    ]
+
+
+class StatementIndexTestCase(SimpleTestCase):
+    def test_masks(self):
+        index = StatementIndex(
+            IndexedPolicy, IndexedPolicy()._normalize_statements(IndexedPolicy.statements)
+        )
+
+        self.assertEqual(index.any_principal_mask, 0b0100)
+        self.assertEqual(index.principal_masks, {"staff": 0b0001, "authenticated": 0b1000})
+        self.assertEqual(index.id_masks, {"2": 0b0010})
+        self.assertEqual(index.group_masks, {"dev": 0b0001})
+        self.assertEqual(index.action_masks["list"], 0b0001)
+        self.assertEqual(index.method_masks, {"delete": 0b0010})
+        self.assertEqual(index.safe_methods_mask, 0b0001)
+        self.assertEqual(index.any_action_mask, 0b0100)
+        self.assertEqual(index.deny_mask, 0b0010)
+        self.assertEqual(index.conditional_mask, 0b1100)
+
+    def test_match(self):
+        compiled = get_compiled_policy(IndexedPolicy)
+        index = compiled.get_statement_index(IndexedPolicy(), IndexedPolicy.statements)
+
+        policy = IndexedPolicy()
+
+        self.assertEqual(index.match(policy, FakeRequest(USERS[3]), "list"), 0b0101)
+        self.assertEqual(index.match(policy, FakeRequest(USERS[2], "POST"), "create"), 0b1100)
+        self.assertEqual(index.match(policy, FakeRequest(USERS[3], "DELETE"), "x"), 0b0110)
+
+    def test_default_policies_use_index(self):
+        self.assertTrue(get_compiled_policy(IndexedPolicy).uses_statement_index)
+        self.assertFalse(get_compiled_policy(StagedPolicy).uses_statement_index)
+
+        with mock.patch.object(
+            AccessPolicy, "_get_statements_matching_principal"
+        ) as matching_principal:
+            self.assertTrue(
+                IndexedPolicy()._evaluate_statements(
+                    IndexedPolicy.statements, FakeRequest(USERS[2], "POST"), None, "create"
+                )
+            )
+
+        matching_principal.assert_not_called()
+
+    def test_groups_only_fetched_when_needed(self):
+        policy = IndexedPolicy()
+
+        with mock.patch.object(
+            IndexedPolicy, "get_user_group_values", return_value=["dev"]
+        ) as groups:
+            # Staff already matches the statement naming group:dev
+            self.assertTrue(
+                policy._evaluate_statements(policy.statements, FakeRequest(USERS[4]), None, "list")
+            )
+            groups.assert_not_called()
+
+            self.assertTrue(
+                policy._evaluate_statements(policy.statements, FakeRequest(USERS[3]), None, "list")
+            )
+            groups.assert_called_once()
+
+    def test_index_rebuilt_when_statements_change(self):
+        compiled = get_compiled_policy(IndexedPolicy)
+        statements = list(IndexedPolicy.statements)
+        index = compiled.get_statement_index(IndexedPolicy(), statements)
+
+        self.assertIs(compiled.get_statement_index(IndexedPolicy(), statements), index)
+
+        statements.append({"principal": "*", "action": "*", "effect": "deny"})
+        rebuilt = compiled.get_statement_index(IndexedPolicy(), statements)
+
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(len(rebuilt.statements), 5)
+
+    def test_fresh_statement_lists_from_many_threads(self):
+        # As with statements loaded per request in get_policy_statements
+        errors = []
+
+        def decide():
+            try:
+                for _ in range(200):
+                    statements = [dict(s) for s in IndexedPolicy.statements]
+
+                    for codegen in (False, True):
+                        policy = IndexedPolicy()
+                        policy.codegen = codegen
+                        policy._evaluate_statements(
+                            statements, FakeRequest(USERS[3]), None, "list"
+                        )
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=decide) for _ in range(16)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        compiled = get_compiled_policy(IndexedPolicy)
+        self.assertLessEqual(len(compiled.statement_indexes), compiled.max_statement_indexes)
+        self.assertLessEqual(
+            len(compiled.decision_functions), compiled.max_decision_functions
+        )
@@ -0,0 +1,185 @@
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers
+
+from rest_access_policy import AccessPolicy, FieldAccessMixin, PermittedPkRelatedField, tracing
+from rest_access_policy.tracing import InMemoryTracer, OpenTelemetryTracer
+from test_project.testapp.models import UserAccount
+from test_project.testapp.tests.test_codegen import (
+    USERS,
+    FakeRequest,
+    HarnessPolicy,
+    StagedPolicy,
+)
+
+
+class FakeView(object):
+    action = "create"
+
+
+class TracedPolicy(HarnessPolicy):
+    statements = [
+        {"principal": "id:1", "action": "*", "effect": "deny"},
+        {
+            "principal": "group:dev",
+            "action": "create",
+            "effect": "allow",
+            "condition": "is_true",
+            "condition_expression": "arg_is:yes or is_false",
+        },
+    ]
+
+
+class GeneratedTracedPolicy(TracedPolicy):
+    codegen = True
+
+
+class StagedTracedPolicy(StagedPolicy):
+    statements = TracedPolicy.statements
+
+
+class TracingTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tracer = InMemoryTracer()
+        tracing.set_tracer(self.tracer)
+
+    def tearDown(self):
+        tracing.set_tracer(None)
+
+    def by_name(self, name):
+        return next(span for span in self.tracer.spans if span.name == name)
+
+    def assert_decision_spans(self, policy):
+        self.assertTrue(policy().has_permission(FakeRequest(USERS[3]), FakeView()))
+
+        root = self.by_name("access_policy.has_permission")
+        self.assertIsNone(root.parent)
+        self.assertEqual(
+            root.attributes,
+            {"policy": policy.__name__, "action": "create", "allowed": True},
+        )
+        self.assertIs(self.tracer.spans[-1], root)
+
+        groups = self.by_name("access_policy.resolve_groups")
+        self.assertEqual(groups.attributes["groups"], 1)
+
+        condition = self.by_name("access_policy.condition")
+        self.assertEqual(condition.attributes["condition"], "is_true")
+        self.assertIs(condition.attributes["result"], True)
+
+        expression = self.by_name("access_policy.condition_expression")
+        self.assertEqual(
+            expression.attributes["condition_expression"], "arg_is:yes or is_false"
+        )
+        # The expression's conditions are nested in its span
+        nested = [s for s in self.tracer.spans if s.parent is expression]
+        self.assertEqual([s.attributes["condition"] for s in nested], ["arg_is:yes"])
+
+        self.assertIn("access_policy.match_statements", self.tracer.names())
+
+        for span in self.tracer.spans:
+            self.assertGreaterEqual(span.duration, 0)
+
+    def test_statement_index(self):
+        self.assert_decision_spans(TracedPolicy)
+
+        match = self.by_name("access_policy.match_statements")
+        self.assertEqual(match.attributes["matched"], 1)
+        self.assertIs(self.by_name("access_policy.resolve_groups").parent, match)
+
+    def test_generated_function(self):
+        self.assert_decision_spans(GeneratedTracedPolicy)
+
+        match = self.by_name("access_policy.match_statements")
+        self.assertIs(self.by_name("access_policy.condition_expression").parent, match)
+
+    def test_interpreted_stages(self):
+        self.assert_decision_spans(StagedTracedPolicy)
+
+        self.assertEqual(self.by_name("access_policy.match_statements").attributes["matched"], 1)
+
+    def test_no_tracer(self):
+        tracing.set_tracer(None)
+        TracedPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        self.assertFalse(tracing.enabled)
+        self.assertEqual(self.tracer.spans, [])
+
+    def test_records_errors(self):
+        class FailingPolicy(TracedPolicy):
+            def is_true(self, request, view, action):
+                raise ValueError()
+
+        with self.assertRaises(ValueError):
+            FailingPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        self.assertEqual(self.by_name("access_policy.condition").attributes["error"], "ValueError")
+
+    def test_scope_fields(self):
+        class Serializer(FieldAccessMixin, serializers.ModelSerializer):
+            class Meta:
+                model = UserAccount
+                fields = ["username", "status"]
+                access_policy = TracedPolicy
+
+        Serializer(context={"request": FakeRequest(USERS[3], "PATCH")})
+
+        self.assertEqual(
+            self.by_name("access_policy.scope_fields").attributes,
+            {"policy": "TracedPolicy", "serializer": "Serializer"},
+        )
+
+    def test_setting(self):
+        tracing.set_tracer(None)
+        path = "rest_access_policy.tracing.InMemoryTracer"
+
+        with override_settings(DRF_ACCESS_POLICY={"tracer": path}):
+            self.assertIsInstance(tracing.get_tracer(), InMemoryTracer)
+            self.assertTrue(tracing.enabled)
+
+        self.assertFalse(tracing.enabled)
+
+    def test_open_telemetry_adapter(self):
+        started = []
+
+        class FakeOpenTelemetryTracer(object):
+            @contextmanager
+            def start_as_current_span(self, name, attributes=None):
+                started.append((name, dict(attributes)))
+                yield InMemoryTracer().start_span(name, {}).span
+
+        tracing.set_tracer(OpenTelemetryTracer(FakeOpenTelemetryTracer()))
+        TracedPolicy().has_permission(FakeRequest(USERS[3]), FakeView())
+
+        self.assertEqual(
+            started[0],
+            ("access_policy.has_permission", {"policy": "TracedPolicy", "action": "create"}),
+        )
+
+
+class RelatedFieldTracingTestCase(TestCase):
+    def setUp(self):
+        self.tracer = InMemoryTracer()
+        tracing.set_tracer(self.tracer)
+
+    def tearDown(self):
+        tracing.set_tracer(None)
+
+    def test_scope_queryset(self):
+        class ScopePolicy(AccessPolicy):
+            @classmethod
+            def scope_queryset(cls, request, queryset):
+                return queryset
+
+        class Serializer(serializers.Serializer):
+            user = PermittedPkRelatedField(access_policy=ScopePolicy, queryset=User.objects.all())
+
+        user = User.objects.create(username="user")
+        serializer = Serializer(data={"user": user.pk}, context={"request": FakeRequest(user)})
+
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(
+            self.tracer.spans[0].attributes, {"policy": "ScopePolicy", "field": "user"}
+        )
@@ -0,0 +1,135 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.module_loading import import_string
+from rest_framework.decorators import action, api_view
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from rest_access_policy import AccessPolicy
+from rest_access_policy.compiler import get_compiled_policy
+from rest_access_policy.view_actions import ViewActions, get_view_actions
+from test_project.testapp.tests.test_codegen import USERS, FakeRequest
+
+
+class ArticleViewSet(ViewSet):
+    def list(self, request):
+        return Response([])
+
+    def destroy(self, request, pk=None):
+        return Response()
+
+    @action(detail=True, methods=["post"])
+    def publish(self, request, pk=None):
+        return Response()
+
+    @publish.mapping.delete
+    def unpublish(self, request, pk=None):
+        return Response()
+
+    def get_serializer_context(self):
+        return {}
+
+
+@api_view(["GET"])
+def landing_page(request):
+    return Response()
+
+
+class SlicedPolicy(AccessPolicy):
+    statements = [
+        {"principal": "*", "action": ["list", "publish"], "effect": "allow"},
+        {"principal": "*", "action": "update_billing", "effect": "allow"},
+        {"principal": "*", "action": "<method:delete>", "effect": "deny"},
+        {"principal": "*", "action": "landing_page", "effect": "allow"},
+        {"principal": "admin", "action": "*", "effect": "allow"},
+    ]
+
+
+class ViewActionsTestCase(SimpleTestCase):
+    def test_view_set_actions_include_extra_actions(self):
+        actions = get_view_actions(ArticleViewSet).actions
+
+        self.assertEqual(actions, {"list", "destroy", "publish", "unpublish"})
+
+    def test_api_view_action_is_its_name(self):
+        self.assertEqual(get_view_actions(landing_page.cls).actions, {"landing_page"})
+
+    def test_statements_sliced_per_view_class(self):
+        compiled = get_compiled_policy(SlicedPolicy)
+        policy = SlicedPolicy()
+        statements = SlicedPolicy.statements
+
+        sliced = compiled.get_view_statements(policy, statements, ArticleViewSet, "list")
+        self.assertEqual([statements.index(s) for s in sliced], [0, 2, 4])
+        self.assertIs(
+            compiled.get_view_statements(policy, statements, ArticleViewSet, "publish"), sliced
+        )
+
+        sliced = compiled.get_view_statements(policy, statements, landing_page.cls, "landing_page")
+        self.assertEqual([statements.index(s) for s in sliced], [2, 3, 4])
+
+    def test_unknown_action_uses_all_statements(self):
+        compiled = get_compiled_policy(SlicedPolicy)
+        statements = SlicedPolicy.statements
+
+        self.assertIs(
+            compiled.get_view_statements(
+                SlicedPolicy(), statements, ArticleViewSet, "update_billing"
+            ),
+            statements,
+        )
+
+    def test_compiled_once_per_view_beyond_cache_size(self):
+        view_classes = [
+            type(f"View{i}", (ArticleViewSet,), {})
+            for i in range(get_compiled_policy(SlicedPolicy).max_statement_indexes + 4)
+        ]
+
+        for codegen, target in (
+            (False, "rest_access_policy.compiler.StatementIndex"),
+            (True, "rest_access_policy.codegen.generate_decision_function"),
+        ):
+            policy_cls = type("ManyViewsPolicy", (SlicedPolicy,), {"codegen": codegen})
+
+            with mock.patch(target, wraps=import_string(target)) as compile_statements:
+                for _ in range(3):
+                    for view_cls in view_classes:
+                        view = view_cls()
+                        view.action = "list"
+                        view.action_map = {"get": "list"}
+                        policy_cls().has_permission(FakeRequest(USERS[2]), view)
+
+            self.assertEqual(compile_statements.call_count, len(view_classes))
+
+    def test_has_permission_with_sliced_statements(self):
+        view = ArticleViewSet()
+        view.action = "publish"
+        view.action_map = {"post": "publish"}
+
+        self.assertTrue(SlicedPolicy().has_permission(FakeRequest(USERS[2], "POST"), view))
+        self.assertFalse(SlicedPolicy().has_permission(FakeRequest(USERS[2], "DELETE"), view))
+
+        view.action = "update_billing"
+        self.assertTrue(SlicedPolicy().has_permission(FakeRequest(USERS[2], "POST"), view))
+
+    def test_default_action_from_action_map(self):
+        view = ArticleViewSet()
+        view.action = None
+        view.action_map = {"get": "list", "post": "create"}
+
+        self.assertEqual(AccessPolicy()._get_invoked_action(view), "list")
+        self.assertEqual(
+            get_view_actions(ArticleViewSet).default_actions[id(view.action_map)][1], "list"
+        )
+
+    def test_default_actions_bounded(self):
+        view_actions = ViewActions(ArticleViewSet)
+
+        with mock.patch.object(ViewActions, "max_action_maps", 2):
+            for action_name in ("list", "retrieve", "destroy"):
+                self.assertEqual(
+                    view_actions.get_default_action({"get": action_name}), action_name
+                )
+
+        self.assertEqual(len(view_actions.default_actions), 2)
@@ -2,7 +2,7 @@ from rest_framework.test import APITestCase
 
 from rest_access_policy import AccessViewSetMixin, AccessPolicy
 from rest_framework.viewsets import ViewSet
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
 
 class AccessViewSetTestCase(APITestCase):
@@ -28,3 +28,53 @@ class AccessViewSetTestCase(APITestCase):
         v = MyViewSet()
         self.assertEqual(v.permission_classes, [AccessPolicy, AllowAny])
         self.assertEqual(MyViewSet.permission_classes, [AllowAny])
+
+    def test_permission_classes_combined_once_per_class(self):
+        class MyViewSet(AccessViewSetMixin, ViewSet):
+            access_policy = AccessPolicy
+
+        combined = MyViewSet._get_access_permissions()
+        self.assertIs(MyViewSet._get_access_permissions(), combined)
+        self.assertEqual(MyViewSet().permission_classes, [AccessPolicy, AllowAny])
+
+        MyViewSet.permission_classes = [IsAuthenticated]
+        self.assertEqual(MyViewSet().permission_classes, [AccessPolicy, IsAuthenticated])
+
+    def test_permission_classes_changed_per_instance(self):
+        class MyViewSet(AccessViewSetMixin, ViewSet):
+            access_policy = AccessPolicy
+
+        v = MyViewSet()
+        v.permission_classes.append(IsAuthenticated)
+
+        self.assertIsInstance(v.get_permissions()[2], IsAuthenticated)
+        self.assertEqual(MyViewSet().permission_classes, [AccessPolicy, AllowAny])
+        self.assertEqual(len(MyViewSet().get_permissions()), 2)
+
+    def test_permission_classes_overridden_per_instance(self):
+        class MyViewSet(AccessViewSetMixin, ViewSet):
+            access_policy = AccessPolicy
+
+        v = MyViewSet(permission_classes=[IsAuthenticated])
+        self.assertEqual(v.permission_classes, [AccessPolicy, IsAuthenticated])
+        self.assertIsInstance(v.get_permissions()[1], IsAuthenticated)
+
+    def test_stateless_policy_instance_shared(self):
+        class StatelessPolicy(AccessPolicy):
+            stateless = True
+
+        class MyViewSet(AccessViewSetMixin, ViewSet):
+            access_policy = StatelessPolicy
+
+        first = MyViewSet().get_permissions()
+        second = MyViewSet().get_permissions()
+
+        self.assertIs(first[0], second[0])
+        self.assertIsNot(first[1], second[1])
+        self.assertIsInstance(first[1], AllowAny)
+
+    def test_policy_instances_not_shared_by_default(self):
+        class MyViewSet(AccessViewSetMixin, ViewSet):
+            access_policy = AccessPolicy
+
+        self.assertIsNot(MyViewSet().get_permissions()[0], MyViewSet().get_permissions()[0])